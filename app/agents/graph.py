@@ -1,130 +1,235 @@
 """
 LangGraph definition connecting all agents in a workflow.
 """
-from typing import Dict, Any, Annotated, TypedDict
+import asyncio
+import operator
+from typing import Dict, Any, Annotated, Awaitable, List, Optional, Tuple, TypedDict
 from langgraph.graph import StateGraph, END
-from langchain_core.language_models import BaseChatModel
+from langgraph.graph.state import CompiledStateGraph
 
 from app.agents.planner_agent import PlannerAgent
 from app.agents.motivator_agent import MotivatorAgent
 from app.agents.wellness_agent import WellnessAgent
 from app.agents.summary_agent import SummaryAgent
+from app.core.config import settings
+from app.schemas.records import EventRecord, TaskRecord, build_event_records, build_task_records
 from app.core.logger import logger
+from app.services.calendar_service import calendar_service
+from app.services.llm_gateway import LLMGateway
+from app.services.model_router import create_model_router
+from app.services.metrics import traced_node
+from app.services.user_memory import user_memory
+from app.services.wellness_schedule import WellnessSchedule
 
 
 class BriefingState(TypedDict):
     """
     State schema for the briefing generation workflow.
+
+    Nodes return partial updates rather than the full state, so that the
+    motivator and wellness branches can write concurrently. Keys written by
+    more than one node in the same step need a reducer (see ``errors``).
     """
     # Input
     user_id: str
     preferences: Dict[str, Any]
+    goals: list
     context: Dict[str, Any]
 
-    # Calendar and tasks
-    calendar_events: list
-    tasks: list
+    # Calendar and tasks (EventRecord / TaskRecord, see app.schemas.records)
+    calendar_events: List[EventRecord]
+    tasks: List[TaskRecord]
     priorities: list
+    keywords: List[str]  # recurring themes from the user's history
+
+    # Precomputed by batch runs (see app.services.wellness_schedule)
+    wellness_schedule: Optional[WellnessSchedule]
 
     # Agent outputs
     planner_output: Dict[str, Any]
     motivator_output: Dict[str, Any]
     wellness_output: Dict[str, Any]
+    summary_draft: Dict[str, Any]  # speculative summary written from the plan alone
     summary_output: Dict[str, Any]
 
     # Metadata
-    errors: list
+    errors: Annotated[list, operator.add]
+    node_metrics: Annotated[list, operator.add]  # one NodeTrace dict per node run
 
 
-def create_briefing_graph(llm: BaseChatModel = None) -> StateGraph:
+def create_briefing_graph(
+    llm: Optional[LLMGateway] = None,
+    speculative_summary: Optional[bool] = None
+) -> CompiledStateGraph:
     """
     Create the LangGraph workflow for generating daily briefings.
 
     The workflow:
-    1. Load user context (calendar, tasks, preferences)
+    1. Load user context (calendar, tasks, preferences) unless pre-loaded
     2. Run planner agent to create daily schedule
     3. Run motivator and wellness agents in parallel
     4. Run summary agent to compile everything
     5. Return final briefing
 
+    With a speculative summary, the summary is drafted from the plan in
+    parallel with step 3, and step 4 only slots the motivator and wellness
+    outputs into the draft.
+
     Args:
-        llm: Language model instance (TODO: initialize from config)
+        llm: LLM gateway shared by all agents (if not provided, each agent
+            is routed to its configured model tier and temperature)
+        speculative_summary: Draft the summary alongside the motivator and
+            wellness agents (defaults to ``summary_speculative``)
 
     Returns:
         Compiled LangGraph workflow
     """
-    # TODO: Initialize LLM from config if not provided
-    # if llm is None:
-    #     from app.core.config import settings
-    #     if settings.llm_provider == "openai":
-    #         from langchain_openai import ChatOpenAI
-    #         llm = ChatOpenAI(model=settings.llm_model)
-    #     elif settings.llm_provider == "anthropic":
-    #         from langchain_anthropic import ChatAnthropic
-    #         llm = ChatAnthropic(model=settings.llm_model)
+    if speculative_summary is None:
+        speculative_summary = settings.summary_speculative
+
+    router = create_model_router() if llm is None else None
+
+    def agent_llm(agent: str):
+        return llm if router is None else router.for_agent(agent)
 
     # Initialize agents
-    # planner = PlannerAgent(llm)
-    # motivator = MotivatorAgent(llm)
-    # wellness = WellnessAgent(llm)
-    # summary = SummaryAgent(llm)
+    planner = PlannerAgent(agent_llm("planner"))
+    motivator = MotivatorAgent(agent_llm("motivator"))
+    wellness = WellnessAgent(agent_llm("wellness"))
+    summary = SummaryAgent(agent_llm("summary"))
 
     # Create graph
     workflow = StateGraph(BriefingState)
 
-    # TODO: Define nodes
-    # workflow.add_node("load_context", load_user_context)
-    # workflow.add_node("planner", planner.invoke)
-    # workflow.add_node("motivator", motivator.invoke)
-    # workflow.add_node("wellness", wellness.invoke)
-    # workflow.add_node("summary", summary.invoke)
+    # Every node is traced (see app.services.metrics)
+    workflow.add_node("load_context", traced_node("load_context", load_user_context))
+    workflow.add_node("planner", traced_node("planner", planner.invoke))
+    workflow.add_node("motivator", traced_node("motivator", motivator.invoke))
+    workflow.add_node("wellness", traced_node("wellness", wellness.invoke))
+    if speculative_summary:
+        workflow.add_node("summary_draft", traced_node("summary_draft", summary.draft))
+        workflow.add_node("summary", traced_node("summary", summary.merge))
+    else:
+        workflow.add_node("summary", traced_node("summary", summary.invoke))
+
+    # Motivator and wellness both depend only on the planner, so they share
+    # a superstep and run concurrently. Summary waits for both branches.
+    workflow.set_conditional_entry_point(
+        _route_entry,
+        {"load_context": "load_context", "planner": "planner"}
+    )
+    workflow.add_edge("load_context", "planner")
+    workflow.add_edge("planner", "motivator")
+    workflow.add_edge("planner", "wellness")
+    if speculative_summary:
+        workflow.add_edge("planner", "summary_draft")
+        workflow.add_edge(["motivator", "wellness", "summary_draft"], "summary")
+    else:
+        workflow.add_edge(["motivator", "wellness"], "summary")
+    workflow.add_edge("summary", END)
+
+    return workflow.compile()
+
+
+def _route_entry(state: BriefingState) -> str:
+    """
+    Skip context loading when the caller already supplied it.
 
-    # TODO: Define edges (workflow)
-    # workflow.set_entry_point("load_context")
-    # workflow.add_edge("load_context", "planner")
-    # workflow.add_edge("planner", "motivator")
-    # workflow.add_edge("planner", "wellness")
-    # workflow.add_edge("motivator", "summary")
-    # workflow.add_edge("wellness", "summary")
-    # workflow.add_edge("summary", END)
+    Args:
+        state: Initial briefing state
+
+    Returns:
+        Name of the first node to run
+    """
+    if state.get("calendar_events") is not None and state.get("tasks") is not None:
+        return "planner"
+    return "load_context"
 
-    # TODO: Compile graph
-    # app = workflow.compile()
-    # return app
 
-    logger.warning("Graph creation not yet implemented - returning placeholder")
-    return workflow
+# Compiled graph shared by all requests (built lazily or at startup)
+_briefing_graph: Optional[CompiledStateGraph] = None
 
 
-async def load_user_context(state: BriefingState) -> BriefingState:
+def get_briefing_graph() -> CompiledStateGraph:
     """
-    Load user context including calendar, tasks, and preferences.
+    Get the shared compiled briefing graph, building it on first use.
+
+    Returns:
+        Compiled LangGraph workflow
+    """
+    global _briefing_graph
+    if _briefing_graph is None:
+        logger.info("Compiling briefing graph")
+        _briefing_graph = create_briefing_graph()
+    return _briefing_graph
+
+
+async def _fetch_source(
+    name: str,
+    source: Awaitable[Any],
+    default: Any,
+    timeout: float
+) -> Tuple[Any, Optional[str]]:
+    """
+    Await a single context source with a timeout.
 
     Args:
-        state: Current briefing state
+        name: Source name used in error messages
+        source: Awaitable returning the source data
+        default: Value to use if the source fails or times out
+        timeout: Timeout in seconds
 
     Returns:
-        Updated state with user context loaded
+        Tuple of (data, error message or None)
     """
     try:
-        logger.info(f"Loading context for user: {state['user_id']}")
+        return await asyncio.wait_for(source, timeout=timeout), None
+    except asyncio.TimeoutError:
+        logger.warning(f"Context source '{name}' timed out after {timeout}s")
+        return default, f"{name}: timed out after {timeout}s"
+    except Exception as e:
+        logger.error(f"Error loading context source '{name}': {str(e)}")
+        return default, f"{name}: {str(e)}"
 
-        # TODO: Fetch calendar events from calendar service
-        # from app.services.calendar_service import get_calendar_events
-        # calendar_events = await get_calendar_events(state['user_id'])
 
-        # TODO: Fetch tasks and priorities from user memory
-        # from app.services.user_memory import get_user_tasks
-        # tasks = await get_user_tasks(state['user_id'])
+async def load_user_context(state: BriefingState) -> Dict[str, Any]:
+    """
+    Load user context including calendar, tasks, and preferences.
 
-        # Placeholder data
-        state["calendar_events"] = []
-        state["tasks"] = []
-        state["priorities"] = []
+    Calendar events, tasks, the user profile and the user's history
+    keywords are fetched concurrently, each with its own timeout. A slow or
+    failing source contributes an empty default and an ``errors`` entry
+    instead of failing the briefing. New event and task titles are added to
+    the keyword index, and events and tasks are converted to compact
+    records here, once, so downstream nodes never re-parse their timestamps.
 
-        return state
+    Args:
+        state: Current briefing state
 
-    except Exception as e:
-        logger.error(f"Error loading user context: {str(e)}")
-        state["errors"].append(str(e))
-        return state
+    Returns:
+        State update with user context loaded
+    """
+    user_id = state["user_id"]
+    timeout = settings.context_source_timeout
+    logger.info(f"Loading context for user: {user_id}")
+
+    (events, events_error), (tasks, tasks_error), (profile, profile_error), (keywords, keywords_error) = await asyncio.gather(
+        _fetch_source("calendar", calendar_service.get_today_events(user_id), [], timeout),
+        _fetch_source("tasks", user_memory.get_user_tasks(user_id), [], timeout),
+        _fetch_source("profile", user_memory.get_user_profile(user_id), {}, timeout),
+        _fetch_source("keywords", user_memory.get_top_keywords(user_id), [], timeout)
+    )
+    user_memory.index_context(user_id, events, tasks)
+
+    # Explicit request preferences take precedence over stored ones
+    preferences = {**profile.get("preferences", {}), **(state.get("preferences") or {})}
+
+    return {
+        "preferences": preferences,
+        "goals": profile.get("goals", []),
+        "calendar_events": build_event_records(events),
+        "tasks": build_task_records(tasks),
+        "priorities": preferences.get("focus_areas", []),
+        "keywords": keywords,
+        "errors": [e for e in (events_error, tasks_error, profile_error, keywords_error) if e]
+    }
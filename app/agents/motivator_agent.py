@@ -1,11 +1,16 @@
 """
 Motivator Agent - Provides encouragement and motivation.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.language_models import BaseChatModel
 
+from app.agents.prompt_budget import format_output
+from app.agents.structured_output import generate_structured, schema_instructions
+from app.core.config import settings
 from app.core.logger import logger
+from app.schemas.dashboard import MotivatorOutput
+from app.services.llm_gateway import LLMGateway
+from app.services.model_router import AgentLLM, route_llm
 
 
 class MotivatorAgent:
@@ -14,14 +19,17 @@ class MotivatorAgent:
     based on user's goals, progress, and current context.
     """
 
-    def __init__(self, llm: BaseChatModel):
+    def __init__(self, llm: Union[LLMGateway, AgentLLM], max_prompt_tokens: Optional[int] = None):
         """
         Initialize the Motivator Agent.
 
         Args:
-            llm: Language model instance for generating motivational content
+            llm: LLM gateway, or a routed agent LLM, for generating motivational content
+            max_prompt_tokens: Token budget for prompt context
+                (defaults to ``memory_max_tokens``)
         """
         self.llm = llm
+        self.max_prompt_tokens = max_prompt_tokens or settings.memory_max_tokens
         self.system_prompt = """You are an empathetic and encouraging motivational coach.
             Your role is to inspire and energize the user for their day ahead. Consider:
             - Their current goals and progress
@@ -41,37 +49,40 @@ class MotivatorAgent:
             state: Current state with user context and planner output
 
         Returns:
-            Updated state with motivator output
+            State update with motivator output
         """
         try:
             logger.info("Motivator agent processing...")
 
-            # TODO: Extract relevant context from state
-            # planner_output = state.get("planner_output", {})
-            # user_goals = state.get("user_goals", [])
-            # recent_achievements = state.get("achievements", [])
-
-            # TODO: Build motivational prompt
-            # prompt = self._build_prompt(planner_output, user_goals, recent_achievements)
-
-            # TODO: Call LLM to generate motivation
-            # messages = [
-            #     SystemMessage(content=self.system_prompt),
-            #     HumanMessage(content=prompt)
-            # ]
-            # response = await self.llm.ainvoke(messages)
-
-            # Placeholder response
-            motivation = {
-                "message": "You've got this! Focus on your top priorities today.",
-                "affirmation": "You are capable and prepared.",
-                "focus_tip": "Start with your most important task."
-            }
-
-            state["motivator_output"] = motivation
+            prompt = self._build_prompt(
+                state.get("planner_output", {}),
+                state.get("goals", []),
+                state.get("achievements", []),
+                state.get("keywords", [])
+            )
+            messages = [
+                SystemMessage(content=self.system_prompt),
+                HumanMessage(content=prompt)
+            ]
+
+            # Similar schedules get similar advice, so near-duplicate
+            # prompts may share a cached response
+            output = await generate_structured(
+                route_llm(self.llm, state), messages, MotivatorOutput, node="motivator", near_duplicates=True
+            )
+
+            if output is not None:
+                motivation = output.model_dump(exclude_none=True)
+            else:
+                motivation = {
+                    "message": "You've got this! Focus on your top priorities today.",
+                    "affirmation": "You are capable and prepared.",
+                    "focus_tip": "Start with your most important task."
+                }
+
             logger.info("Motivator agent completed")
 
-            return state
+            return {"motivator_output": motivation}
 
         except Exception as e:
             logger.error(f"Error in motivator agent: {str(e)}")
@@ -81,7 +92,8 @@ class MotivatorAgent:
         self,
         planner_output: Dict[str, Any],
         goals: list,
-        achievements: list
+        achievements: list,
+        keywords: Optional[List[str]] = None
     ) -> str:
         """
         Build the prompt for the motivator LLM.
@@ -90,16 +102,17 @@ class MotivatorAgent:
             planner_output: Output from planner agent
             goals: User's current goals
             achievements: Recent achievements
+            keywords: Recurring themes from the user's history
 
         Returns:
             Formatted prompt string
         """
-        # TODO: Implement prompt building logic
-        prompt = f"""
-        Today's Plan: {planner_output}
-        Goals: {goals}
-        Recent Achievements: {achievements}
-
-        Please create a motivational message for the user.
-        """
+        budget = self.max_prompt_tokens
+        prompt = f"""Today's Plan: {format_output(planner_output, budget // 2)}
+Goals: {format_output(goals, budget // 4)}
+Recent Achievements: {format_output(achievements, budget // 4)}
+Recurring Themes: {", ".join(keywords or []) or "None"}
+
+Please create a motivational message for the user.
+{schema_instructions(MotivatorOutput)}"""
         return prompt
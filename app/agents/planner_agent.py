@@ -1,11 +1,41 @@
 """
 Planner Agent - Manages daily schedule and task prioritization.
 """
-from typing import Dict, Any, List
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Union
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.language_models import BaseChatModel
 
+from app.agents.prompt_budget import (
+    estimate_text_tokens,
+    format_events,
+    format_output,
+    format_tasks,
+    truncate_to_tokens
+)
+from app.agents.structured_output import generate_structured, schema_instructions
+from app.core.config import settings
 from app.core.logger import logger
+from app.schemas.dashboard import PlannerOutput
+from app.schemas.records import EventRecord, TaskRecord
+from app.services.free_busy import FreeBusyIndex
+from app.services.llm_gateway import LLMGateway
+from app.services.model_router import AgentLLM, route_llm
+from app.utils.timestamps import to_wall_seconds
+from app.utils.time_helpers import (
+    calculate_duration,
+    from_wall_seconds,
+    get_current_time,
+    is_within_work_hours,
+    parse_time_string,
+    parse_wall_time,
+    wall_seconds
+)
+
+
+# Rule-based scheduling defaults
+_DEFAULT_TASK_MINUTES = 30  # tasks without an estimated_duration
+_MIN_SLOT_MINUTES = 15  # free time shorter than this is not worth scheduling
+_BUFFER = timedelta(minutes=5)  # gap kept after events and scheduled tasks
 
 
 class PlannerAgent:
@@ -14,14 +44,17 @@ class PlannerAgent:
     to create an optimized daily plan.
     """
 
-    def __init__(self, llm: BaseChatModel):
+    def __init__(self, llm: Union[LLMGateway, AgentLLM], max_prompt_tokens: Optional[int] = None):
         """
         Initialize the Planner Agent.
 
         Args:
-            llm: Language model instance for generating plans
+            llm: LLM gateway, or a routed agent LLM, for generating plans
+            max_prompt_tokens: Token budget for prompt context
+                (defaults to ``memory_max_tokens``)
         """
         self.llm = llm
+        self.max_prompt_tokens = max_prompt_tokens or settings.memory_max_tokens
         self.system_prompt = """You are a professional planning assistant.
 Your role is to analyze the user's calendar, tasks, and priorities to create
 an optimized daily schedule. Consider:
@@ -41,84 +74,216 @@ Provide actionable, realistic plans."""
             state: Current state with user context, calendar, tasks
 
         Returns:
-            Updated state with planner output
+            State update with planner output
         """
         try:
             logger.info("Planner agent processing...")
 
-            # TODO: Extract calendar events from state
-            # calendar_events = state.get("calendar_events", [])
+            calendar_events = state.get("calendar_events") or []
+            tasks = state.get("tasks") or []
+            priorities = state.get("priorities") or []
+            preferences = state.get("preferences") or {}
 
-            # TODO: Extract tasks and priorities
-            # tasks = state.get("tasks", [])
-            # priorities = state.get("priorities", [])
+            index = FreeBusyIndex(
+                (to_wall_seconds(event.start), to_wall_seconds(event.end), event)
+                for event in calendar_events
+            )
+            schedule = self._rule_based_plan(index, tasks, preferences)
 
-            # TODO: Build prompt with calendar and task data
-            # prompt = self._build_prompt(calendar_events, tasks, priorities)
+            # Simple days are fully planned by the rules; no LLM round trip
+            if self._is_simple_day(index, schedule):
+                logger.info("Planner agent completed (rule-based)")
+                return {"planner_output": schedule}
 
-            # TODO: Call LLM to generate plan
-            # messages = [
-            #     SystemMessage(content=self.system_prompt),
-            #     HumanMessage(content=prompt)
-            # ]
-            # response = await self.llm.ainvoke(messages)
+            prompt = self._build_prompt(calendar_events, tasks, priorities, schedule)
+            messages = [
+                SystemMessage(content=self.system_prompt),
+                HumanMessage(content=prompt)
+            ]
 
-            # TODO: Parse and structure the plan
-            # plan = self._parse_plan(response.content)
+            # Falls back to the rule-based plan if the LLM is unavailable
+            output = await generate_structured(route_llm(self.llm, state), messages, PlannerOutput, node="planner")
+            if output is not None:
+                plan = {**schedule, **output.model_dump(exclude_unset=True), "source": "llm"}
+            else:
+                plan = schedule
 
-            # Placeholder response
-            plan = {
-                "daily_schedule": [],
-                "top_priorities": [],
-                "time_blocks": [],
-                "recommendations": []
-            }
-
-            state["planner_output"] = plan
             logger.info("Planner agent completed")
 
-            return state
+            return {"planner_output": plan}
 
         except Exception as e:
             logger.error(f"Error in planner agent: {str(e)}")
             raise
 
-    def _build_prompt(
-        self,
-        calendar_events: List[Dict],
-        tasks: List[Dict],
-        priorities: List[str]
-    ) -> str:
+    def _is_simple_day(self, index: FreeBusyIndex[EventRecord], schedule: Dict[str, Any]) -> bool:
         """
-        Build the prompt for the planner LLM.
+        Decide whether the rule-based plan can stand on its own.
+
+        A day is simple when it has few events, no overlapping events and
+        every open task fits into the free time.
 
         Args:
-            calendar_events: List of calendar events
-            tasks: List of tasks to complete
-            priorities: User's priority areas
+            index: Free/busy index over the day's events
+            schedule: Rule-based plan
 
         Returns:
-            Formatted prompt string
+            True if the LLM can be skipped
+        """
+        if len(index) > settings.planner_fast_path_max_events:
+            return False
+        if schedule["unscheduled_tasks"]:
+            return False
+        return not index.has_conflicts()
+
+    def _rule_based_plan(
+        self,
+        index: FreeBusyIndex[EventRecord],
+        tasks: List[TaskRecord],
+        preferences: Dict[str, Any]
+    ) -> Dict[str, Any]:
         """
-        # TODO: Implement prompt building logic
-        prompt = f"""
-        Calendar Events: {calendar_events}
-        Tasks: {tasks}
-        Priorities: {priorities}
+        Pack open tasks into free time between events within work hours.
 
-        Please create an optimized daily plan.
+        Tasks are placed first-fit in priority then due-date order, each
+        taking its ``estimated_duration`` (or a default) plus a short buffer.
+
+        Args:
+            index: Free/busy index over the day's events, on wall-clock time
+            tasks: Task records
+            preferences: User preferences with optional ``work_hours``
+
+        Returns:
+            Plan in the planner output shape, plus ``unscheduled_tasks``
         """
-        return prompt
+        work_hours = preferences.get("work_hours") or {}
+        work_start = work_hours.get("start", "09:00")
+        work_end = work_hours.get("end", "17:00")
 
-    def _parse_plan(self, llm_response: str) -> Dict[str, Any]:
+        events = list(index)
+        if events:
+            day = parse_wall_time(events[0].start).date()
+        else:
+            day = get_current_time(preferences.get("timezone", "UTC")).date()
+
+        free_slots = [
+            (from_wall_seconds(start), from_wall_seconds(end))
+            for start, end in index.free_slots(
+                wall_seconds(datetime.combine(day, parse_time_string(work_start))),
+                wall_seconds(datetime.combine(day, parse_time_string(work_end))),
+                min_length=_MIN_SLOT_MINUTES * 60,
+                buffer=int(_BUFFER.total_seconds())
+            )
+        ]
+
+        open_tasks = sorted(
+            (task for task in tasks if not task.completed),
+            key=lambda task: (task.priority_rank, task.due_ts is None, task.due_ts or 0)
+        )
+
+        blocks = []
+        unscheduled = []
+        for task in open_tasks:
+            duration = timedelta(minutes=task.estimated_duration or _DEFAULT_TASK_MINUTES)
+            for i, (slot_start, slot_end) in enumerate(free_slots):
+                task_end = slot_start + duration
+                if task_end > slot_end or not is_within_work_hours(task_end, work_start, work_end):
+                    continue
+                blocks.append({
+                    "task_id": task.id,
+                    "title": task.title,
+                    "priority": task.priority,
+                    "start": slot_start.isoformat(),
+                    "end": task_end.isoformat()
+                })
+                free_slots[i] = (min(task_end + _BUFFER, slot_end), slot_end)
+                break
+            else:
+                unscheduled.append(task.title)
+
+        daily_schedule = [
+            {
+                "type": "event",
+                "title": event.title,
+                "start": parse_wall_time(event.start).isoformat(),
+                "end": parse_wall_time(event.end).isoformat()
+            }
+            for event in events
+        ] + [{"type": "task", **block} for block in blocks]
+        daily_schedule.sort(key=lambda item: item["start"])
+
+        recommendations = []
+        if unscheduled:
+            recommendations.append(
+                f"Not enough free time for: {', '.join(unscheduled)}. Consider rescheduling."
+            )
+
+        return {
+            "daily_schedule": daily_schedule,
+            "top_priorities": [task.title for task in open_tasks[:3]],
+            "time_blocks": blocks,
+            "recommendations": recommendations,
+            "free_slots": [
+                {"start": start.isoformat(), "end": end.isoformat(), "minutes": calculate_duration(start, end)}
+                for start, end in free_slots
+                if calculate_duration(start, end) >= _MIN_SLOT_MINUTES
+            ],
+            "unscheduled_tasks": unscheduled,
+            "source": "rules"
+        }
+
+    def _build_prompt(
+        self,
+        calendar_events: List[EventRecord],
+        tasks: List[TaskRecord],
+        priorities: List[str],
+        schedule: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
-        Parse LLM response into structured plan format.
+        Build the prompt for the planner LLM within the prompt token budget.
+
+        The labels and output instructions are counted first; of what is
+        left, events get two fifths, tasks a third and the rest is shared
+        by priorities and the rule-based plan, so the whole prompt stays
+        within the budget. The highest-value items are kept and the
+        remainder summarized. Free slots from the rule-based plan are
+        included so the LLM refines the packing rather than recomputing it.
 
         Args:
-            llm_response: Raw LLM output
+            calendar_events: Calendar event records
+            tasks: Task records
+            priorities: User's priority areas
+            schedule: Rule-based plan to refine, if already computed
 
         Returns:
-            Structured plan dictionary
+            Formatted prompt string
         """
-        # TODO: Implement parsing logic (may use JSON mode or structured output)
-        return {}
+        def render(events: str, task_list: str, focus: str, free_slots: str, unfit: str) -> str:
+            precomputed = ""
+            if schedule is not None:
+                precomputed = f"""
+Free Slots: {free_slots}
+Could Not Fit: {unfit}
+"""
+            return f"""Calendar Events:
+{events}
+Tasks:
+{task_list}
+Priorities: {focus}
+{precomputed}
+Please create an optimized daily plan.
+{schema_instructions(PlannerOutput)}"""
+
+        budget = max(self.max_prompt_tokens - estimate_text_tokens(render("", "", "", "", "")), 0)
+        free_slots = unfit = ""
+        if schedule is not None:
+            free_slots = format_output(schedule["free_slots"], budget // 10)
+            unfit = format_output(schedule["unscheduled_tasks"], budget // 10)
+
+        return render(
+            format_events(calendar_events, budget * 2 // 5),
+            format_tasks(tasks, budget // 3),
+            truncate_to_tokens(", ".join(priorities), budget // 15),
+            free_slots,
+            unfit
+        )
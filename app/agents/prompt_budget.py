@@ -0,0 +1,230 @@
+"""
+Prompt assembly under a token budget.
+Formats events, tasks and upstream agent outputs compactly, keeping the
+highest-value items and truncating the rest to fit.
+"""
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.schemas.records import EventRecord, TaskRecord
+from app.utils.text_cleaner import TextCleaner, truncate_text
+
+
+# Rough characters per token for English prompt text
+CHARS_PER_TOKEN = 4
+
+# Longest title or description kept for a single item, in characters
+_MAX_TITLE_CHARS = 80
+_MAX_DESCRIPTION_CHARS = 120
+
+_clean_title = TextCleaner(strip_html=False, max_length=_MAX_TITLE_CHARS)
+# Descriptions are often HTML bodies from the calendar provider
+_clean_description = TextCleaner(max_length=_MAX_DESCRIPTION_CHARS)
+
+
+def estimate_text_tokens(text: str) -> int:
+    """
+    Estimate the token count of a piece of text.
+
+    Uses the ~4 characters per token heuristic, which is close enough to
+    size prompts without running a tokenizer.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Estimated token count
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text to fit a token budget.
+
+    Args:
+        text: Input text
+        max_tokens: Token budget
+
+    Returns:
+        Text no longer than the budget allows
+    """
+    return truncate_text(text, max(max_tokens, 1) * CHARS_PER_TOKEN)
+
+
+def _event_value(event: EventRecord) -> Tuple[int, int, int]:
+    """Rank events by attendees, then duration, then earliest start."""
+    return (len(event.attendees) > 0, min(event.duration_minutes, 240), -event.start_ts)
+
+
+def _alias_table(prefix: str, values: Sequence[str]) -> Dict[str, str]:
+    """Assign short aliases to values seen more than once."""
+    counts: Dict[str, int] = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    repeated = [value for value, count in counts.items() if count > 1]
+    return {value: f"{prefix}{i}" for i, value in enumerate(repeated, 1)}
+
+
+def _legend_line(label: str, aliases: Dict[str, str]) -> str:
+    """Write an alias table as one legend line."""
+    return f"{label}: " + ", ".join(f"{alias}={name}" for name, alias in aliases.items())
+
+
+def _event_line(
+    event: EventRecord,
+    title: str,
+    description: str,
+    people: Dict[str, str],
+    places: Dict[str, str]
+) -> str:
+    """Format one event, referencing aliased attendees and locations."""
+    line = f"- {event.start[11:16]}-{event.end[11:16]} {title}"
+    if event.location:
+        line += f" @ {places.get(event.location, event.location)}"
+    if event.attendees:
+        line += " with " + ", ".join(people.get(a, a) for a in dict.fromkeys(event.attendees))
+    if description:
+        line += f": {description}"
+    return line
+
+
+def format_events(events: List[EventRecord], max_tokens: int) -> str:
+    """
+    Format calendar events compactly within a token budget.
+
+    Events with attendees and longer events are kept first; the kept events
+    are listed in start order. Attendees and locations that appear on more
+    than one kept event are written once in a legend and referenced by
+    alias. The legend and the omitted-events note count against the budget.
+
+    Args:
+        events: Event records
+        max_tokens: Token budget for the section
+
+    Returns:
+        Formatted events section
+    """
+    if not events:
+        return "No events scheduled."
+
+    people = _alias_table("P", [a for event in events for a in event.attendees])
+    places = _alias_table("L", [event.location for event in events if event.location])
+
+    titles = _clean_title.clean_many(event.title for event in events)
+    descriptions = _clean_description.clean_many(event.description for event in events)
+
+    # Legend lengths in characters, charged as aliases are first referenced
+    legend_chars = {"People": 0, "Places": 0}
+
+    def legend_cost() -> int:
+        return sum(
+            (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN + 1
+            for chars in legend_chars.values() if chars
+        )
+
+    # Reserve room for the omitted-events note up front
+    remaining = max_tokens - estimate_text_tokens(f"(+{len(events)} lower-priority events omitted)") - 1
+    kept: List[int] = []
+    referenced = set()
+    for i in sorted(range(len(events)), key=lambda i: _event_value(events[i]), reverse=True):
+        event = events[i]
+        line = _event_line(event, titles[i], descriptions[i], people, places)
+
+        added = {"People": 0, "Places": 0}
+        new_refs = []
+        for label, table, values in (
+            ("People", people, event.attendees),
+            ("Places", places, [event.location] if event.location else [])
+        ):
+            for value in dict.fromkeys(values):
+                if value in table and (label, value) not in referenced:
+                    new_refs.append((label, value))
+                    separator = 2 if legend_chars[label] + added[label] else len(label) + 2
+                    added[label] += separator + len(f"{table[value]}={value}")
+
+        before = legend_cost()
+        for label, chars in added.items():
+            legend_chars[label] += chars
+        cost = estimate_text_tokens(line) + 1 + legend_cost() - before
+        if cost > remaining:
+            for label, chars in added.items():
+                legend_chars[label] -= chars
+            continue
+        remaining -= cost
+        referenced.update(new_refs)
+        kept.append(i)
+
+    # Alias only what repeats among the kept events. Aliases keep their
+    # relative order, so none grows longer than the one charged for above.
+    kept.sort()
+    kept_people = _alias_table("P", [a for i in kept for a in events[i].attendees])
+    kept_places = _alias_table("L", [events[i].location for i in kept if events[i].location])
+    people = {name: f"P{n}" for n, name in enumerate((name for name in people if name in kept_people), 1)}
+    places = {name: f"L{n}" for n, name in enumerate((name for name in places if name in kept_places), 1)}
+
+    lines = []
+    if people:
+        lines.append(_legend_line("People", people))
+    if places:
+        lines.append(_legend_line("Places", places))
+    ordered = sorted(kept, key=lambda i: events[i].start_ts)
+    lines.extend(_event_line(events[i], titles[i], descriptions[i], people, places) for i in ordered)
+    if len(kept) < len(events):
+        lines.append(f"(+{len(events) - len(kept)} lower-priority events omitted)")
+    return "\n".join(lines)
+
+
+def format_tasks(tasks: List[TaskRecord], max_tokens: int) -> str:
+    """
+    Format open tasks compactly within a token budget.
+
+    Tasks are ordered by priority, then due time; completed tasks are
+    dropped and anything past the budget is summarized as a count.
+
+    Args:
+        tasks: Task records
+        max_tokens: Token budget for the section
+
+    Returns:
+        Formatted tasks section
+    """
+    open_tasks = [task for task in tasks if not task.completed]
+    if not open_tasks:
+        return "No open tasks."
+
+    open_tasks.sort(key=lambda task: (task.priority_rank, task.due_ts is None, task.due_ts or 0))
+
+    remaining = max_tokens
+    lines = []
+    for task in open_tasks:
+        line = f"- [{task.priority}] {_clean_title(task.title)}"
+        if task.due_date:
+            line += f" (due {task.due_date[:16]})"
+        if task.estimated_duration:
+            line += f" ~{task.estimated_duration}m"
+
+        cost = estimate_text_tokens(line) + 1
+        if cost > remaining:
+            break
+        remaining -= cost
+        lines.append(line)
+
+    if len(lines) < len(open_tasks):
+        lines.append(f"(+{len(open_tasks) - len(lines)} lower-priority tasks omitted)")
+    return "\n".join(lines)
+
+
+def format_output(output: Any, max_tokens: int) -> str:
+    """
+    Serialize an upstream agent output compactly within a token budget.
+
+    Args:
+        output: Agent output (usually a dict)
+        max_tokens: Token budget for the section
+
+    Returns:
+        Compact JSON, truncated if over budget
+    """
+    text = json.dumps(output, separators=(",", ":"), ensure_ascii=False, default=str)
+    return truncate_to_tokens(text, max_tokens)
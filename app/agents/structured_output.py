@@ -0,0 +1,444 @@
+"""
+Structured output for agent LLM calls.
+Parses the LLM token stream incrementally into an output schema, exposing
+partial objects as tokens arrive and rejecting malformed output early.
+"""
+import copy
+import json
+from contextlib import aclosing
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+
+from langchain_core.messages import BaseMessage
+from langgraph.config import get_stream_writer
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.core.logger import logger
+from app.services.llm_gateway import LLMGateway
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_CHARS = set("0123456789+-.eE")
+_LITERALS = ("true", "false", "null")
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_FENCES = ("```json", "```")
+
+# Field validators per schema, built on first use
+_FIELD_ADAPTERS: Dict[Type[BaseModel], Dict[str, TypeAdapter]] = {}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when LLM output cannot be parsed into the expected schema."""
+
+
+def _field_adapters(schema: Type[BaseModel]) -> Dict[str, TypeAdapter]:
+    """Get validators for each top-level field of a schema."""
+    adapters = _FIELD_ADAPTERS.get(schema)
+    if adapters is None:
+        adapters = {
+            name: TypeAdapter(field.annotation)
+            for name, field in schema.model_fields.items()
+        }
+        _FIELD_ADAPTERS[schema] = adapters
+    return adapters
+
+
+class IncrementalJSONParser:
+    """
+    Streaming parser for a single JSON object.
+
+    Text is fed in chunks as the LLM produces it. After each chunk the
+    partially built object is available, with any string still being
+    written included so far. Input that can no longer become valid JSON
+    raises immediately, and with a schema each top-level field is validated
+    as soon as its value is complete, so a bad response can be abandoned
+    long before it finishes. A surrounding Markdown code fence is tolerated.
+    """
+
+    def __init__(self, schema: Optional[Type[BaseModel]] = None):
+        """
+        Initialize the parser.
+
+        Args:
+            schema: Model whose top-level fields are validated as they complete
+        """
+        self.schema = schema
+        self._adapters = _field_adapters(schema) if schema is not None else {}
+        self._root: Optional[Dict[str, Any]] = None
+        # Open containers as [container, pending key, state]
+        self._stack: List[list] = []
+        self._prefix = ""
+        self._string: Optional[List[str]] = None
+        self._string_is_key = False
+        self._escape: Optional[str] = None
+        self._scalar: Optional[str] = None
+        self.done = False
+
+    def feed(self, text: str) -> None:
+        """
+        Consume the next chunk of output.
+
+        Args:
+            text: Output text
+
+        Raises:
+            StructuredOutputError: If the output is not valid JSON for the schema
+        """
+        for char in text:
+            if self.done:
+                break
+            self._feed_char(char)
+
+        if self._string is not None and not self._string_is_key:
+            self._place_partial("".join(self._string))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get a copy of the object parsed so far.
+
+        Returns:
+            Partial object (empty before the object starts)
+        """
+        return copy.deepcopy(self._root) if self._root is not None else {}
+
+    def result(self) -> BaseModel:
+        """
+        Validate the complete object against the schema.
+
+        Returns:
+            Schema instance
+
+        Raises:
+            StructuredOutputError: If the object is incomplete or invalid
+        """
+        if not self.done:
+            raise StructuredOutputError("Output ended before the JSON object was complete")
+        if self.schema is None:
+            raise StructuredOutputError("No schema to validate against")
+        try:
+            return self.schema.model_validate(self._root)
+        except ValidationError as e:
+            raise StructuredOutputError(str(e)) from e
+
+    def _fail(self, message: str) -> None:
+        raise StructuredOutputError(message)
+
+    def _feed_char(self, char: str) -> None:
+        if self._string is not None:
+            self._feed_string(char)
+            return
+
+        if self._scalar is not None:
+            if char in _SCALAR_CHARS or char.isalpha():
+                self._scalar += char
+                if not (set(self._scalar) <= _SCALAR_CHARS or any(l.startswith(self._scalar) for l in _LITERALS)):
+                    self._fail(f"Invalid literal {self._scalar!r}")
+                return
+            self._end_scalar()
+
+        if char in _WHITESPACE:
+            return
+
+        if self._root is None:
+            self._feed_prefix(char)
+            return
+
+        frame = self._stack[-1]
+        container, _, state = frame
+
+        if isinstance(container, dict):
+            if state in ("key_or_end", "key"):
+                if char == '"':
+                    self._string, self._string_is_key = [], True
+                elif char == "}" and state == "key_or_end":
+                    self._close()
+                else:
+                    self._fail(f"Expected an object key, got {char!r}")
+            elif state == "colon":
+                if char != ":":
+                    self._fail(f"Expected ':', got {char!r}")
+                frame[2] = "value"
+            elif state == "value":
+                self._start_value(char)
+            elif char == ",":
+                frame[2] = "key"
+            elif char == "}":
+                self._close()
+            else:
+                self._fail(f"Expected ',' or '}}', got {char!r}")
+        else:
+            if state in ("value_or_end", "value"):
+                if char == "]" and state == "value_or_end":
+                    self._close()
+                else:
+                    self._start_value(char)
+            elif char == ",":
+                frame[2] = "value"
+            elif char == "]":
+                self._close()
+            else:
+                self._fail(f"Expected ',' or ']', got {char!r}")
+
+    def _feed_prefix(self, char: str) -> None:
+        """Skip an opening code fence, then start the root object."""
+        if char == "{" and self._prefix in ("",) + _FENCES:
+            self._root = {}
+            self._stack.append([self._root, None, "key_or_end"])
+            return
+        self._prefix += char
+        if not any(fence.startswith(self._prefix) for fence in _FENCES):
+            self._fail("Output does not start with a JSON object")
+
+    def _feed_string(self, char: str) -> None:
+        if self._escape is not None:
+            if self._escape == "":
+                if char == "u":
+                    self._escape = "u"
+                    return
+                if char not in _ESCAPES:
+                    self._fail(f"Invalid escape '\\{char}'")
+                self._string.append(_ESCAPES[char])
+                self._escape = None
+                return
+            self._escape += char
+            if len(self._escape) == 5:
+                try:
+                    code = int(self._escape[1:], 16)
+                except ValueError:
+                    self._fail(f"Invalid unicode escape '\\{self._escape}'")
+                if 0xDC00 <= code <= 0xDFFF and self._string and "\ud800" <= self._string[-1] <= "\udbff":
+                    # Second half of a surrogate pair
+                    high = ord(self._string.pop())
+                    code = 0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)
+                self._string.append(chr(code))
+                self._escape = None
+            return
+
+        if char == "\\":
+            self._escape = ""
+        elif char == '"':
+            value = "".join(self._string)
+            self._string = None
+            if self._string_is_key:
+                self._stack[-1][1] = value
+                self._stack[-1][2] = "colon"
+            else:
+                self._place_partial(value)
+                self._complete_value(value)
+        else:
+            self._string.append(char)
+
+    def _start_value(self, char: str) -> None:
+        if char == '"':
+            self._string, self._string_is_key = [], False
+            self._add_value("")
+        elif char == "{":
+            self._add_value({})
+        elif char == "[":
+            self._add_value([])
+        elif char in _SCALAR_CHARS or char in "tfn":
+            self._scalar = char
+        else:
+            self._fail(f"Unexpected {char!r} where a value was expected")
+
+    def _end_scalar(self) -> None:
+        token, self._scalar = self._scalar, None
+        try:
+            value = json.loads(token)
+        except ValueError:
+            self._fail(f"Invalid literal {token!r}")
+        self._add_value(value)
+        self._complete_value(value)
+
+    def _add_value(self, value: Any) -> None:
+        """Insert a new value into the innermost container."""
+        frame = self._stack[-1]
+        container = frame[0]
+        if isinstance(container, dict):
+            container[frame[1]] = value
+        else:
+            container.append(value)
+        frame[2] = "comma_or_end"
+        if isinstance(value, dict):
+            self._stack.append([value, None, "key_or_end"])
+        elif isinstance(value, list):
+            self._stack.append([value, None, "value_or_end"])
+
+    def _place_partial(self, value: Any) -> None:
+        """Overwrite the most recently added value of the innermost container."""
+        frame = self._stack[-1]
+        container = frame[0]
+        if isinstance(container, dict):
+            container[frame[1]] = value
+        else:
+            container[-1] = value
+
+    def _close(self) -> None:
+        value = self._stack.pop()[0]
+        if not self._stack:
+            self.done = True
+            return
+        self._complete_value(value)
+
+    def _complete_value(self, value: Any) -> None:
+        """Validate a finished top-level field against the schema."""
+        if len(self._stack) != 1:
+            return
+        key = self._stack[0][1]
+        adapter = self._adapters.get(key)
+        if adapter is None:
+            return
+        try:
+            adapter.validate_python(value)
+        except ValidationError as e:
+            self._fail(f"Invalid value for '{key}': {e.errors()[0]['msg']}")
+
+
+def schema_instructions(schema: Type[BaseModel]) -> str:
+    """
+    Describe the expected JSON output for a prompt.
+
+    Args:
+        schema: Output model
+
+    Returns:
+        Instruction text listing the schema's fields
+    """
+    fields = ", ".join(
+        f'"{name}"' + ("" if field.is_required() else " (optional)")
+        for name, field in schema.model_fields.items()
+    )
+    return f"Respond with only a JSON object with these fields: {fields}."
+
+
+def parse_structured(text: str, schema: Type[ModelT]) -> ModelT:
+    """
+    Parse a complete LLM response into a schema.
+
+    Args:
+        text: Response text
+        schema: Output model
+
+    Returns:
+        Schema instance
+
+    Raises:
+        StructuredOutputError: If the response is not valid for the schema
+    """
+    parser = IncrementalJSONParser(schema)
+    parser.feed(text)
+    return parser.result()
+
+
+async def stream_structured(
+    llm: LLMGateway,
+    messages: List[BaseMessage],
+    schema: Type[ModelT],
+    on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
+    max_attempts: int = 2,
+    **kwargs
+) -> ModelT:
+    """
+    Stream an LLM response straight into a schema.
+
+    ``on_partial`` receives the partial object after each chunk that
+    changes it. Malformed output closes the stream at once, cancelling the
+    provider request, and the call is retried with a fresh stream that
+    bypasses the response cache, up to ``max_attempts`` in total. Text
+    after the object (such as a closing code fence) is ignored. Only a
+    response that validates is stored in the gateway's cache.
+
+    Args:
+        llm: Shared LLM gateway
+        messages: Chat messages
+        schema: Output model
+        on_partial: Callback for partial objects
+        max_attempts: Total attempts before giving up
+        **kwargs: Extra arguments for the gateway
+
+    Returns:
+        Schema instance
+
+    Raises:
+        StructuredOutputError: If every attempt produced malformed output
+    """
+    for attempt in range(1, max_attempts + 1):
+        parser = IncrementalJSONParser(schema)
+        parts: List[str] = []
+        last = None
+        try:
+            stream_kwargs = kwargs if attempt == 1 else {**kwargs, "use_cache": False}
+            async with aclosing(llm.astream(messages, **stream_kwargs)) as stream:
+                async for chunk in stream:
+                    if parser.done:
+                        continue
+                    text = str(chunk.content)
+                    parts.append(text)
+                    parser.feed(text)
+                    if on_partial is not None:
+                        partial = parser.snapshot()
+                        if partial != last:
+                            on_partial(partial)
+                            last = partial
+            result = parser.result()
+            llm.cache_response(messages, "".join(parts))
+            return result
+        except StructuredOutputError as e:
+            if attempt == max_attempts:
+                raise
+            logger.warning(
+                f"Malformed {schema.__name__} output, retrying ({attempt}/{max_attempts}): {str(e)}"
+            )
+
+    raise StructuredOutputError(f"No {schema.__name__} output produced")
+
+
+def partial_output_writer(node: str) -> Optional[Callable[[Dict[str, Any]], None]]:
+    """
+    Get a callback that streams a node's partial output to graph consumers.
+
+    Partial objects are written to the graph's ``custom`` stream as
+    ``{"node": ..., "partial": ...}``.
+
+    Args:
+        node: Graph node name
+
+    Returns:
+        Callback, or None when not running inside a graph
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return None
+    return lambda partial: writer({"node": node, "partial": partial})
+
+
+async def generate_structured(
+    llm: LLMGateway,
+    messages: List[BaseMessage],
+    schema: Type[ModelT],
+    node: str,
+    **kwargs
+) -> Optional[ModelT]:
+    """
+    Generate an agent's structured output, streaming partials downstream.
+
+    Args:
+        llm: Shared LLM gateway
+        messages: Chat messages
+        schema: Output model
+        node: Graph node name for partial output events
+        **kwargs: Extra arguments for the gateway
+
+    Returns:
+        Schema instance, or None if the LLM is unavailable or its output
+        stayed malformed
+    """
+    try:
+        return await stream_structured(
+            llm, messages, schema, on_partial=partial_output_writer(node), **kwargs
+        )
+    except Exception as e:
+        logger.warning(f"{node} LLM output unavailable, using fallback: {str(e)}")
+        return None
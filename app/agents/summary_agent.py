@@ -1,27 +1,39 @@
 """
 Summary Agent - Compiles outputs from all agents into a cohesive briefing.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.language_models import BaseChatModel
 
+from app.agents.prompt_budget import format_output
+from app.agents.structured_output import generate_structured, schema_instructions
+from app.core.config import settings
 from app.core.logger import logger
+from app.schemas.dashboard import SummaryOutput
+from app.services.llm_gateway import LLMGateway
+from app.services.model_router import AgentLLM, route_llm
 
 
 class SummaryAgent:
     """
     Agent responsible for synthesizing outputs from all other agents
     into a coherent, actionable daily briefing.
+
+    In speculative mode the graph runs ``draft`` alongside the motivator
+    and wellness agents, as soon as the plan exists, and ``merge`` then
+    slots their outputs into the draft without another LLM call.
     """
 
-    def __init__(self, llm: BaseChatModel):
+    def __init__(self, llm: Union[LLMGateway, AgentLLM], max_prompt_tokens: Optional[int] = None):
         """
         Initialize the Summary Agent.
 
         Args:
-            llm: Language model instance for generating summary
+            llm: LLM gateway, or a routed agent LLM, for generating summary
+            max_prompt_tokens: Token budget for prompt context
+                (defaults to ``memory_max_tokens``)
         """
         self.llm = llm
+        self.max_prompt_tokens = max_prompt_tokens or settings.memory_max_tokens
         self.system_prompt = """You are a skilled executive assistant.
 Your role is to compile information from multiple sources into a clear,
 concise daily briefing. The briefing should:
@@ -41,74 +53,176 @@ Keep the tone professional yet friendly."""
             state: Current state with all agent outputs
 
         Returns:
-            Updated state with final summary
+            State update with final summary
         """
         try:
             logger.info("Summary agent processing...")
 
-            # TODO: Extract all agent outputs
-            # planner_output = state.get("planner_output", {})
-            # motivator_output = state.get("motivator_output", {})
-            # wellness_output = state.get("wellness_output", {})
-
-            # TODO: Build summary prompt
-            # prompt = self._build_prompt(
-            #     planner_output,
-            #     motivator_output,
-            #     wellness_output
-            # )
-
-            # TODO: Call LLM to generate cohesive summary
-            # messages = [
-            #     SystemMessage(content=self.system_prompt),
-            #     HumanMessage(content=prompt)
-            # ]
-            # response = await self.llm.ainvoke(messages)
-
-            # Placeholder response
-            summary = {
-                "briefing": "Good morning! Here's your daily briefing...",
-                "top_3_priorities": [
-                    "Complete project proposal",
-                    "Team meeting at 2 PM",
-                    "Review client feedback"
-                ],
-                "wellness_highlights": "Remember to take breaks and stay hydrated",
-                "motivation": "You're making great progress on your goals!"
-            }
-
-            state["summary_output"] = summary
+            prompt = self._build_prompt(
+                state.get("planner_output", {}),
+                state.get("motivator_output", {}),
+                state.get("wellness_output", {}),
+                state.get("keywords", [])
+            )
+            messages = [
+                SystemMessage(content=self.system_prompt),
+                HumanMessage(content=prompt)
+            ]
+
+            output = await generate_structured(route_llm(self.llm, state), messages, SummaryOutput, node="summary")
+
+            if output is not None:
+                summary = output.model_dump(exclude_none=True)
+            else:
+                summary = {
+                    "briefing": "Good morning! Here's your daily briefing...",
+                    "top_3_priorities": [
+                        "Complete project proposal",
+                        "Team meeting at 2 PM",
+                        "Review client feedback"
+                    ],
+                    "wellness_highlights": "Remember to take breaks and stay hydrated",
+                    "motivation": "You're making great progress on your goals!"
+                }
+
             logger.info("Summary agent completed")
 
-            return state
+            return {"summary_output": summary}
 
         except Exception as e:
             logger.error(f"Error in summary agent: {str(e)}")
             raise
 
+    async def draft(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Draft the briefing from the plan alone, before the other agents finish.
+
+        Args:
+            state: Current state with planner output
+
+        Returns:
+            State update with the draft (empty if the LLM is unavailable)
+        """
+        logger.info("Summary agent drafting from plan...")
+
+        messages = [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=self._build_draft_prompt(
+                state.get("planner_output", {}),
+                state.get("keywords", [])
+            ))
+        ]
+        output = await generate_structured(route_llm(self.llm, state), messages, SummaryOutput, node="summary_draft")
+
+        return {"summary_draft": output.model_dump(exclude_none=True) if output is not None else {}}
+
+    async def merge(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Complete a drafted briefing with the motivator and wellness outputs.
+
+        Falls back to a full summary call when no draft was produced.
+
+        Args:
+            state: Current state with the draft and all agent outputs
+
+        Returns:
+            State update with final summary
+        """
+        draft = state.get("summary_draft")
+        if not draft:
+            return await self.invoke(state)
+
+        summary = self._merge_sections(
+            draft,
+            state.get("motivator_output", {}),
+            state.get("wellness_output", {})
+        )
+        logger.info("Summary agent completed from draft")
+
+        return {"summary_output": summary}
+
+    @staticmethod
+    def _merge_sections(
+        draft: Dict[str, Any],
+        motivator_output: Dict[str, Any],
+        wellness_output: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Fill the wellness and motivation slots of a drafted summary.
+
+        Args:
+            draft: Summary drafted from the plan
+            motivator_output: Motivational content
+            wellness_output: Wellness recommendations
+
+        Returns:
+            Final summary
+        """
+        summary = dict(draft)
+
+        highlights = [
+            tip for tip in (wellness_output.get("hydration_reminder"), wellness_output.get("mindfulness_tip"))
+            if tip
+        ]
+        if highlights:
+            summary["wellness_highlights"] = " ".join(highlights)
+        if motivator_output.get("message"):
+            summary["motivation"] = motivator_output["message"]
+
+        sections = [summary.get("briefing", "")]
+        sections += [summary[slot] for slot in ("wellness_highlights", "motivation") if summary.get(slot)]
+        summary["briefing"] = "\n\n".join(section for section in sections if section)
+        return summary
+
     def _build_prompt(
         self,
         planner_output: Dict[str, Any],
         motivator_output: Dict[str, Any],
-        wellness_output: Dict[str, Any]
+        wellness_output: Dict[str, Any],
+        keywords: Optional[List[str]] = None
     ) -> str:
         """
-        Build the prompt for the summary LLM.
+        Build the prompt for the summary LLM within the prompt token budget.
+
+        The plan gets half the budget and the other outputs a quarter each.
 
         Args:
             planner_output: Daily plan from planner agent
             motivator_output: Motivational content
             wellness_output: Wellness recommendations
+            keywords: Recurring themes from the user's history
 
         Returns:
             Formatted prompt string
         """
-        # TODO: Implement prompt building logic
-        prompt = f"""
-        Daily Plan: {planner_output}
-        Motivation: {motivator_output}
-        Wellness: {wellness_output}
+        budget = self.max_prompt_tokens
+        prompt = f"""Daily Plan: {format_output(planner_output, budget // 2)}
+Motivation: {format_output(motivator_output, budget // 4)}
+Wellness: {format_output(wellness_output, budget // 4)}
+Recurring Themes: {", ".join(keywords or []) or "None"}
+
+Please create a comprehensive daily briefing.
+{schema_instructions(SummaryOutput)}"""
+        return prompt
+
+    def _build_draft_prompt(
+        self,
+        planner_output: Dict[str, Any],
+        keywords: Optional[List[str]] = None
+    ) -> str:
+        """
+        Build the prompt for a plan-only draft within the prompt token budget.
 
-        Please create a comprehensive daily briefing.
+        Args:
+            planner_output: Daily plan from planner agent
+            keywords: Recurring themes from the user's history
+
+        Returns:
+            Formatted prompt string
         """
-        return prompt
+        return f"""Daily Plan: {format_output(planner_output, self.max_prompt_tokens)}
+Recurring Themes: {", ".join(keywords or []) or "None"}
+
+Please create the planning part of today's briefing. Wellness and
+motivation sections are added separately, so leave them out.
+{schema_instructions(SummaryOutput)}"""
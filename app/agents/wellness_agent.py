@@ -1,11 +1,29 @@
 """
 Wellness Agent - Provides health and wellness recommendations.
 """
-from typing import Dict, Any
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Union
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.language_models import BaseChatModel
 
+from app.agents.prompt_budget import format_output
+from app.agents.structured_output import generate_structured, schema_instructions
+from app.core.config import settings
 from app.core.logger import logger
+from app.schemas.dashboard import WellnessOutput
+from app.services.llm_gateway import LLMGateway
+from app.services.model_router import AgentLLM, route_llm
+from app.services.wellness_schedule import (
+    BREAK_MINUTES,
+    WellnessInputs,
+    WellnessSchedule,
+    compute_wellness_schedules
+)
+from app.utils.time_helpers import format_time
+
+
+def _format_minutes(minute: int) -> str:
+    """Format minutes since midnight as a display time."""
+    return format_time(datetime.min + timedelta(minutes=minute))
 
 
 class WellnessAgent:
@@ -14,14 +32,17 @@ class WellnessAgent:
     including breaks, exercise, hydration, and mental health tips.
     """
 
-    def __init__(self, llm: BaseChatModel):
+    def __init__(self, llm: Union[LLMGateway, AgentLLM], max_prompt_tokens: Optional[int] = None):
         """
         Initialize the Wellness Agent.
 
         Args:
-            llm: Language model instance for generating wellness recommendations
+            llm: LLM gateway, or a routed agent LLM, for generating wellness recommendations
+            max_prompt_tokens: Token budget for prompt context
+                (defaults to ``memory_max_tokens``)
         """
         self.llm = llm
+        self.max_prompt_tokens = max_prompt_tokens or settings.memory_max_tokens
         self.system_prompt = """You are a wellness and health advisor.
 Your role is to provide personalized wellness recommendations for the user's day. Consider:
 - Scheduled breaks and rest periods
@@ -40,46 +61,78 @@ Recommendations should be practical, evidence-based, and fit into their schedule
             state: Current state with planner output and user preferences
 
         Returns:
-            Updated state with wellness output
+            State update with wellness output
         """
         try:
             logger.info("Wellness agent processing...")
 
-            # TODO: Extract relevant context
-            # planner_output = state.get("planner_output", {})
-            # user_preferences = state.get("user_preferences", {})
-            # health_data = state.get("health_data", {})
-
-            # TODO: Build wellness prompt
-            # prompt = self._build_prompt(planner_output, user_preferences, health_data)
-
-            # TODO: Call LLM for recommendations
-            # messages = [
-            #     SystemMessage(content=self.system_prompt),
-            #     HumanMessage(content=prompt)
-            # ]
-            # response = await self.llm.ainvoke(messages)
+            schedule = self._wellness_schedule(state)
+            break_reminders = [
+                {
+                    "time": _format_minutes(minute),
+                    "activity": "Short walk" if i % 2 else f"{BREAK_MINUTES}-minute stretch"
+                }
+                for i, minute in enumerate(schedule.breaks)
+            ]
+
+            prompt = self._build_prompt(
+                state.get("planner_output", {}),
+                state.get("preferences", {}),
+                state.get("context", {}).get("health_data", {})
+            )
+            messages = [
+                SystemMessage(content=self.system_prompt),
+                HumanMessage(content=prompt)
+            ]
+
+            # Similar schedules get similar advice, so near-duplicate
+            # prompts may share a cached response
+            output = await generate_structured(
+                route_llm(self.llm, state), messages, WellnessOutput, node="wellness", near_duplicates=True
+            )
 
-            # Placeholder response
             wellness = {
-                "break_reminders": [
-                    {"time": "10:00 AM", "activity": "5-minute stretch"},
-                    {"time": "2:00 PM", "activity": "Short walk"}
-                ],
+                "break_reminders": break_reminders,
                 "hydration_reminder": "Drink water every 2 hours",
+                "hydration_times": [_format_minutes(minute) for minute in schedule.hydration],
                 "exercise_suggestion": "15-minute evening yoga",
                 "mindfulness_tip": "Take 3 deep breaths before each meeting"
             }
+            if output is not None:
+                # Break times come from the schedule, not the LLM
+                wellness.update(output.model_dump(exclude_none=True, exclude={"break_reminders"}))
 
-            state["wellness_output"] = wellness
             logger.info("Wellness agent completed")
 
-            return state
+            return {"wellness_output": wellness}
 
         except Exception as e:
             logger.error(f"Error in wellness agent: {str(e)}")
             raise
 
+    def _wellness_schedule(self, state: Dict[str, Any]) -> WellnessSchedule:
+        """
+        Get the day's break and hydration times.
+
+        Batch runs precompute schedules for all users at once and pass them
+        in the state; otherwise the schedule is computed here.
+
+        Args:
+            state: Current state with calendar events and preferences
+
+        Returns:
+            Wellness schedule
+        """
+        schedule = state.get("wellness_schedule")
+        if schedule is not None:
+            return schedule
+
+        inputs = WellnessInputs.from_context(
+            state.get("calendar_events") or [],
+            state.get("preferences") or {}
+        )
+        return compute_wellness_schedules([inputs])[0]
+
     def _build_prompt(
         self,
         planner_output: Dict[str, Any],
@@ -97,12 +150,11 @@ Recommendations should be practical, evidence-based, and fit into their schedule
         Returns:
             Formatted prompt string
         """
-        # TODO: Implement prompt building logic
-        prompt = f"""
-        Daily Schedule: {planner_output}
-        Preferences: {preferences}
-        Health Data: {health_data}
+        budget = self.max_prompt_tokens
+        prompt = f"""Daily Schedule: {format_output(planner_output, budget // 2)}
+Preferences: {format_output(preferences, budget // 4)}
+Health Data: {format_output(health_data, budget // 4)}
 
-        Please provide wellness recommendations for today.
-        """
+Please provide wellness recommendations for today.
+{schema_instructions(WellnessOutput)}"""
         return prompt
@@ -2,15 +2,23 @@
 Dashboard API routes.
 Handles briefing generation and dashboard data retrieval.
 """
-from fastapi import APIRouter, HTTPException, Depends
+import json
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any
 
 from app.schemas.dashboard import (
     BriefingRequest,
     BriefingResponse,
+    BatchBriefingRequest,
+    BriefingJob,
     DashboardData
 )
-from app.agents.graph import create_briefing_graph
+from app.schemas.user import CalendarEvent
+from app.services.briefing_jobs import JobQueueFull, briefing_jobs
+from app.services.briefing_service import run_briefing, run_briefing_batch, stream_briefing
+from app.services.calendar_service import calendar_service
+from app.core.config import settings
 from app.core.logger import logger
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
@@ -21,6 +29,9 @@ async def generate_briefing(request: BriefingRequest) -> BriefingResponse:
     """
     Generate a personalized daily briefing.
 
+    The connection is held for the whole generation; clients that can poll
+    should prefer ``POST /dashboard/briefing/jobs``.
+
     Args:
         request: Briefing request with user preferences and context
 
@@ -30,32 +41,138 @@ async def generate_briefing(request: BriefingRequest) -> BriefingResponse:
     try:
         logger.info(f"Generating briefing for user: {request.user_id}")
 
-        # TODO: Initialize the LangGraph workflow
-        # graph = create_briefing_graph()
-
-        # TODO: Run the graph with user input
-        # result = await graph.ainvoke({
-        #     "user_id": request.user_id,
-        #     "preferences": request.preferences,
-        #     "context": request.context
-        # })
-
-        # TODO: Parse and return the result
-        # For now, return a placeholder
-        return BriefingResponse(
-            user_id=request.user_id,
-            summary="Placeholder briefing",
-            planner_output={},
-            motivator_output={},
-            wellness_output={},
-            timestamp="2024-01-01T00:00:00Z"
-        )
+        return await run_briefing(request)
 
     except Exception as e:
         logger.error(f"Error generating briefing: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format a Server-Sent Event frame.
+
+    Args:
+        event: Event name
+        data: JSON-serializable event payload
+
+    Returns:
+        SSE-formatted string
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/briefing/stream")
+async def stream_briefing_events(request: BriefingRequest) -> StreamingResponse:
+    """
+    Generate a daily briefing, streaming each agent's output as Server-Sent Events.
+
+    Emits ``planner``, then ``motivator`` and ``wellness`` as they finish,
+    ``partial`` events with each agent's output parsed so far while its LLM
+    response streams, ``token`` events while the summary is generated,
+    ``summary`` and finally ``done`` with the complete briefing.
+
+    Args:
+        request: Briefing request with user preferences and context
+
+    Returns:
+        Event stream response
+    """
+    logger.info(f"Streaming briefing for user: {request.user_id}")
+
+    async def event_stream():
+        try:
+            async for event, data in stream_briefing(request):
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Error streaming briefing: {str(e)}")
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/briefing/batch")
+async def generate_briefing_batch(batch: BatchBriefingRequest) -> StreamingResponse:
+    """
+    Generate briefings for many users, streaming results as NDJSON.
+
+    Each line is a ``BatchBriefingResult``; one user's failure is reported
+    on its own line and does not abort the batch.
+
+    Args:
+        batch: Briefing requests and optional concurrency limit
+
+    Returns:
+        Newline-delimited JSON stream of results
+    """
+    logger.info(f"Generating batch of {len(batch.requests)} briefings")
+
+    async def result_stream():
+        async for result in run_briefing_batch(batch.requests, batch.concurrency):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+@router.post("/briefing/jobs", response_model=BriefingJob, status_code=202)
+async def submit_briefing_job(request: BriefingRequest, response: Response) -> BriefingJob:
+    """
+    Queue a daily briefing for background generation.
+
+    Returns at once with a job to poll at ``/dashboard/briefing/jobs/{job_id}``.
+    When the queue is full the request is refused with 503 and a
+    ``Retry-After`` header.
+
+    Args:
+        request: Briefing request with user preferences and context
+        response: Outgoing response, for the job's Location header
+
+    Returns:
+        Queued job
+    """
+    try:
+        job = await briefing_jobs.submit(request)
+    except JobQueueFull as e:
+        logger.warning(f"Refusing briefing job for user {request.user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Briefing queue is full, retry later",
+            headers={"Retry-After": str(settings.job_retry_after_seconds)}
+        )
+
+    logger.info(f"Queued briefing job {job.job_id} for user: {request.user_id}")
+    response.headers["Location"] = f"{router.prefix}/briefing/jobs/{job.job_id}"
+    return job
+
+
+@router.get("/briefing/jobs/{job_id}", response_model=BriefingJob)
+async def get_briefing_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to wait for the job to finish (long poll)")
+) -> BriefingJob:
+    """
+    Get a briefing job's status, and its briefing once finished.
+
+    With ``wait`` the request is held until the job finishes or the wait
+    (capped at ``job_max_wait_seconds``) runs out, whichever comes first.
+
+    Args:
+        job_id: Job identifier
+        wait: Seconds to wait for the job to finish
+
+    Returns:
+        Job status
+    """
+    job = await briefing_jobs.wait(job_id, min(wait, settings.job_max_wait_seconds))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Briefing job not found")
+    return job
+
+
 @router.get("/data/{user_id}", response_model=DashboardData)
 async def get_dashboard_data(user_id: str) -> DashboardData:
     """
@@ -72,13 +189,13 @@ async def get_dashboard_data(user_id: str) -> DashboardData:
 
         # TODO: Retrieve user's recent briefings from storage
         # TODO: Fetch user statistics and preferences
-        # TODO: Get calendar events for the day
 
-        # Placeholder response
+        upcoming_events = await calendar_service.get_upcoming_events(user_id)
+
         return DashboardData(
             user_id=user_id,
             recent_briefings=[],
-            upcoming_events=[],
+            upcoming_events=[CalendarEvent(**event) for event in upcoming_events],
             user_stats={}
         )
 
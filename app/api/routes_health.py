@@ -2,11 +2,16 @@
 Health check and status API routes.
 """
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any
 from datetime import datetime
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.services.briefing_jobs import briefing_jobs
+from app.services.metrics import metrics_registry
+from app.services.scheduler import briefing_scheduler
+from app.services.user_memory import user_memory
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -37,17 +42,28 @@ async def readiness_check() -> Dict[str, Any]:
     """
     # TODO: Check if all required services are ready
     # TODO: Verify LLM API connectivity
-    # TODO: Check database connection if applicable
 
     dependencies = {
         "llm_provider": "unknown",  # TODO: Check actual provider status
-        "database": "not_configured",  # TODO: Check DB if needed
+        "database": user_memory.db.name,
         "calendar_api": "not_configured"  # TODO: Check calendar API
     }
 
+    scheduler = {
+        "queue_depth": briefing_scheduler.queue_depth,
+        "in_flight": briefing_scheduler.in_flight
+    }
+
+    jobs = {
+        "queue_depth": briefing_jobs.queue_depth,
+        "in_flight": briefing_jobs.in_flight
+    }
+
     return {
         "status": "ready",
         "dependencies": dependencies,
+        "scheduler": scheduler,
+        "jobs": jobs,
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -64,3 +80,20 @@ async def liveness_check() -> Dict[str, str]:
         "status": "alive",
         "timestamp": datetime.utcnow().isoformat()
     }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Per-node briefing graph metrics in the Prometheus text format.
+
+    Covers wall time, LLM queue wait, tokens, estimated cost, response
+    cache hits and retries for each graph node.
+
+    Returns:
+        Metrics text for scraping
+    """
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -3,7 +3,7 @@ Application configuration management.
 Loads environment variables and provides settings throughout the app.
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -31,6 +31,44 @@ class Settings(BaseSettings):
     llm_provider: str = "openai"  # Options: openai, anthropic, etc.
     llm_model: str = "gpt-4"
     llm_temperature: float = 0.7
+    llm_timeout_seconds: float = 30.0
+    llm_requests_per_minute: int = 500  # shared across all agents
+    llm_tokens_per_minute: int = 90000  # prompt plus completion tokens
+    llm_max_concurrency: int = 16  # LLM calls in flight at once
+    llm_max_retries: int = 3  # retries for 429s, timeouts and 5xx
+    llm_retry_base_delay: float = 0.5  # seconds, doubled per retry with jitter
+    llm_prompt_cost_per_1k: float = 0.03  # US dollars, for spend metrics
+    llm_completion_cost_per_1k: float = 0.06
+
+    # Model Routing
+    # Cheap, fast tier for the provider in llm_provider, e.g. "gpt-4o-mini"
+    # (None sends every agent to llm_model); set its prices alongside it
+    llm_small_model: Optional[str] = None
+    llm_small_prompt_cost_per_1k: float = 0.00015
+    llm_small_completion_cost_per_1k: float = 0.0006
+    agent_model_tiers: Dict[str, str] = {
+        "planner": "large", "motivator": "small", "wellness": "small", "summary": "large"
+    }
+    agent_temperatures: Dict[str, float] = {
+        "planner": 0.3, "motivator": 0.9, "wellness": 0.7, "summary": 0.5
+    }
+    routing_heavy_day_events: int = 8  # small-tier agents use the large model above this
+    routing_heavy_day_tasks: int = 15  # open tasks
+
+    # Planner
+    planner_fast_path_max_events: int = 4  # plan days with more events via the LLM
+
+    # Summary
+    summary_speculative: bool = False  # draft the summary while motivator and wellness run
+
+    # LLM Response Cache
+    llm_cache_size: int = 4096  # exact-prompt entries (0 disables the cache)
+    llm_cache_ttl_seconds: int = 3600
+    # Near-duplicate entries (0 disables the tier). Off by default: prompts
+    # hold personal goals and schedules, so a match can serve one user's
+    # motivator or wellness output to another
+    llm_cache_similar_size: int = 0
+    llm_cache_similar_max_distance: int = 6  # SimHash bits two prompts may differ by
 
     # API Keys
     # TODO: Add API keys for your LLM provider
@@ -40,14 +78,46 @@ class Settings(BaseSettings):
     # Calendar Integration
     # TODO: Add calendar service credentials (Google Calendar, Outlook, etc.)
     calendar_api_key: Optional[str] = None
+    calendar_cache_ttl_seconds: int = 300  # serve cached events this long before syncing
+    calendar_cache_size: int = 10000  # cached (user, date range) entries
+
+    # Context Loading
+    context_source_timeout: float = 2.0  # seconds, per calendar/task/profile source
+
+    # Briefing Cache
+    briefing_cache_size: int = 1024  # entries in the in-process LRU tier
+    briefing_cache_ttl_seconds: int = 900
+    briefing_cache_url: Optional[str] = None  # "memory" or redis:// URL for the shared tier
+
+    # Batch Generation
+    batch_concurrency: int = 16  # briefings generated at once per batch
+    batch_chunk_size: int = 1000  # requests whose context is loaded and precomputed together
+
+    # Briefing Jobs
+    job_workers: int = 8  # briefings generated at once by the background worker pool
+    job_queue_size: int = 256  # queued jobs before submissions are refused
+    job_result_ttl_seconds: int = 900  # finished jobs stay pollable this long
+    job_max_wait_seconds: float = 30.0  # longest a long-poll request is held open
+    job_retry_after_seconds: int = 5  # Retry-After sent while the queue is full
+
+    # Briefing Pre-generation
+    pregeneration_enabled: bool = True
+    pregeneration_lead_minutes: int = 30  # start generating this long before wake time
+    pregeneration_spread_minutes: int = 20  # spread each wake-time bucket over this window
 
-    # Database / Storage (if needed)
-    # TODO: Configure database connection if persisting user data
+    # Database / Storage
+    # Unset uses in-process storage; sqlite:///path/to.db persists to SQLite
     database_url: Optional[str] = None
+    database_pool_size: int = 5
 
     # User Memory Settings
-    memory_max_tokens: int = 2000
-    memory_ttl_hours: int = 24
+    memory_max_tokens: int = 2000  # token budget for each agent prompt's context
+    memory_ttl_hours: int = 24  # briefing history older than this is swept
+    history_max_entries: int = 50  # briefings retained per user
+    history_sweep_interval_seconds: int = 300
+    keyword_top_terms: int = 8  # recurring themes from history named in agent prompts
+    keyword_max_terms_per_user: int = 500  # vocabulary kept per user by the keyword index
+    keyword_max_users: int = 10000  # users kept in the keyword index, least recently used evicted
 
 
 # Global settings instance
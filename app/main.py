@@ -6,6 +6,12 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.agents.graph import get_briefing_graph
+from app.services.briefing_jobs import briefing_jobs
+from app.services.llm_gateway import close_llm_gateways
+from app.services.scheduler import briefing_scheduler
+from app.services.user_memory import user_memory
+from app.services.wellness_schedule import VECTORIZED
 from app.api.routes_dashboard import router as dashboard_router
 from app.api.routes_health import router as health_router
 
@@ -43,7 +49,23 @@ async def startup_event():
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
     logger.info(f"Debug mode: {settings.debug}")
 
-    # TODO: Initialize connections (database, external APIs, etc.)
+    await user_memory.connect()
+
+    # Compile the briefing graph once so requests never pay for it
+    get_briefing_graph()
+
+    if not VECTORIZED:
+        logger.warning(
+            "NumPy is not installed; batch wellness schedules are computed per user "
+            "(install with: poetry install --extras batch)"
+        )
+
+    briefing_jobs.start()
+
+    if settings.pregeneration_enabled:
+        briefing_scheduler.start()
+
+    # TODO: Initialize connections (external APIs, etc.)
     # TODO: Warm up LLM connections if needed
     # TODO: Load any required data into memory
 
@@ -57,7 +79,11 @@ async def shutdown_event():
     """
     logger.info("Shutting down application...")
 
-    # TODO: Close database connections
+    await briefing_scheduler.stop()
+    await briefing_jobs.stop()
+    await user_memory.close()
+    await close_llm_gateways()
+
     # TODO: Clean up resources
     # TODO: Save any pending data
 
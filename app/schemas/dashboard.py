@@ -106,6 +106,36 @@ class BriefingResponse(BaseModel):
         }
 
 
+class BatchBriefingRequest(BaseModel):
+    """Request model for generating briefings for many users at once."""
+    requests: List[BriefingRequest] = Field(..., description="Briefing requests to run")
+    concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Maximum briefings generated at once (defaults to, and is capped at, the server limit)"
+    )
+
+
+class BatchBriefingResult(BaseModel):
+    """Outcome of a single briefing within a batch."""
+    user_id: str = Field(..., description="User identifier")
+    status: str = Field(..., description="success or error")
+    briefing: Optional[BriefingResponse] = None
+    error: Optional[str] = None
+
+
+class BriefingJob(BaseModel):
+    """Status of a briefing generated in the background."""
+    job_id: str = Field(..., description="Job identifier")
+    user_id: str = Field(..., description="User identifier")
+    status: str = Field(..., description="queued, running, success or error")
+    submitted_at: datetime = Field(..., description="When the job was accepted (UTC)")
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    briefing: Optional[BriefingResponse] = None
+    error: Optional[str] = None
+
+
 class DashboardData(BaseModel):
     """Dashboard data model."""
     user_id: str = Field(..., description="User identifier")
@@ -0,0 +1,181 @@
+"""
+Compact internal records for calendar events and tasks.
+
+Services return events and tasks as dicts with ISO-string timestamps. These
+slotted dataclasses are built once when context is loaded, with timestamps
+pre-parsed to epoch seconds, and carried through the briefing graph. They
+are converted to the Pydantic schemas only at the API boundary.
+"""
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.schemas.user import CalendarEvent, Task
+from app.utils.timestamps import to_epoch
+
+
+# Sort rank for task priorities (lower sorts first)
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+@dataclass(slots=True)
+class EventRecord:
+    """Calendar event with pre-parsed start and end times."""
+    id: str
+    title: str
+    start: str
+    end: str
+    start_ts: int
+    end_ts: int
+    location: Optional[str] = None
+    attendees: Tuple[str, ...] = ()
+    description: Optional[str] = None
+
+    @property
+    def duration_minutes(self) -> int:
+        """Event length in minutes."""
+        return (self.end_ts - self.start_ts) // 60
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EventRecord":
+        """
+        Build a record from a calendar service event dict.
+
+        Args:
+            data: Event dict with ISO ``start`` and ``end``
+
+        Returns:
+            Event record
+        """
+        start = data["start"]
+        end = data["end"]
+        start_ts = to_epoch(start) or 0
+        return cls(
+            id=data["id"],
+            title=data["title"],
+            start=start,
+            end=end,
+            start_ts=start_ts,
+            end_ts=to_epoch(end) or start_ts,
+            location=data.get("location"),
+            attendees=tuple(data.get("attendees") or ()),
+            description=data.get("description")
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert back to the calendar service dict shape.
+
+        Returns:
+            Event dict
+        """
+        return {
+            "id": self.id,
+            "title": self.title,
+            "start": self.start,
+            "end": self.end,
+            "location": self.location,
+            "attendees": list(self.attendees),
+            "description": self.description
+        }
+
+    def to_schema(self) -> CalendarEvent:
+        """
+        Convert to the API schema.
+
+        Returns:
+            CalendarEvent model
+        """
+        return CalendarEvent(**self.to_dict())
+
+
+@dataclass(slots=True)
+class TaskRecord:
+    """Task with pre-parsed due time and priority rank."""
+    id: str
+    title: str
+    priority: str = "medium"
+    priority_rank: int = 1
+    due_date: Optional[str] = None
+    due_ts: Optional[int] = None
+    estimated_duration: Optional[int] = None
+    completed: bool = False
+    tags: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TaskRecord":
+        """
+        Build a record from a user memory task dict.
+
+        Args:
+            data: Task dict with optional ISO ``due_date``
+
+        Returns:
+            Task record
+        """
+        priority = data.get("priority", "medium")
+        due_date = data.get("due_date")
+        return cls(
+            id=data["id"],
+            title=data["title"],
+            priority=priority,
+            priority_rank=PRIORITY_RANK.get(priority, 1),
+            due_date=due_date,
+            due_ts=to_epoch(due_date),
+            estimated_duration=data.get("estimated_duration"),
+            completed=data.get("completed", False),
+            tags=tuple(data.get("tags") or ())
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert back to the user memory dict shape.
+
+        Returns:
+            Task dict
+        """
+        return {
+            "id": self.id,
+            "title": self.title,
+            "priority": self.priority,
+            "due_date": self.due_date,
+            "estimated_duration": self.estimated_duration,
+            "completed": self.completed,
+            "tags": list(self.tags)
+        }
+
+    def to_schema(self) -> Task:
+        """
+        Convert to the API schema.
+
+        Returns:
+            Task model
+        """
+        return Task(**self.to_dict())
+
+
+def build_event_records(events: List[Dict[str, Any]]) -> List[EventRecord]:
+    """
+    Build event records sorted by start time.
+
+    Args:
+        events: Calendar service event dicts
+
+    Returns:
+        Event records ordered by start
+    """
+    records = [EventRecord.from_dict(event) for event in events]
+    records.sort(key=lambda record: record.start_ts)
+    return records
+
+
+def build_task_records(tasks: List[Dict[str, Any]]) -> List[TaskRecord]:
+    """
+    Build task records.
+
+    Args:
+        tasks: User memory task dicts
+
+    Returns:
+        Task records in their original order
+    """
+    return [TaskRecord.from_dict(task) for task in tasks]
@@ -0,0 +1,311 @@
+"""
+Briefing result cache.
+Caches generated briefings keyed on a fingerprint of their inputs, with an
+in-process LRU tier and an optional shared tier across workers.
+"""
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from app.core.logger import logger
+from app.core.config import settings
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize records via ``to_dict`` and anything else via ``str``."""
+    to_dict = getattr(value, "to_dict", None)
+    return to_dict() if to_dict is not None else str(value)
+
+
+def fingerprint_briefing_inputs(
+    user_id: str,
+    profile: Dict[str, Any],
+    calendar_events: List[Any],
+    tasks: List[Any],
+    context: Dict[str, Any]
+) -> str:
+    """
+    Compute a stable hash of everything a briefing depends on.
+
+    Args:
+        user_id: User identifier
+        profile: User preferences and goals
+        calendar_events: Calendar events for the day (dicts or records)
+        tasks: User tasks (dicts or records)
+        context: Additional request context
+
+    Returns:
+        Hex digest usable as a cache key
+    """
+    payload = json.dumps(
+        {
+            "user_id": user_id,
+            "profile": profile,
+            "calendar_events": calendar_events,
+            "tasks": tasks,
+            "context": context
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_json_default
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Bounded in-process cache with least-recently-used eviction and a TTL.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries kept
+            ttl_seconds: Entry lifetime in seconds
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value, refreshing its recency.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl_seconds: Entry lifetime override (defaults to the cache TTL)
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedCacheBackend(ABC):
+    """
+    Interface for a cache tier shared between workers (e.g. Redis).
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a value from the shared tier.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        """
+        Store a value in the shared tier.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl_seconds: Entry lifetime in seconds
+        """
+
+
+class InMemorySharedCache(SharedCacheBackend):
+    """
+    Local stand-in for a shared cache, used in development and tests.
+    """
+
+    def __init__(self):
+        self._store: Dict[str, tuple] = {}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.monotonic():
+            del self._store[key]
+            return None
+
+        return json.loads(payload)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        # Round-trip through JSON so behaviour matches a networked backend
+        self._store[key] = (time.monotonic() + ttl_seconds, json.dumps(value, default=str))
+
+
+class RedisSharedCache(SharedCacheBackend):
+    """
+    Shared cache tier backed by Redis.
+    """
+
+    def __init__(self, url: str, prefix: str = "briefing:"):
+        """
+        Initialize the Redis client.
+
+        Args:
+            url: Redis connection URL
+            prefix: Key prefix for briefing entries
+        """
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        payload = await self._client.get(self._prefix + key)
+        return json.loads(payload) if payload else None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        await self._client.set(
+            self._prefix + key,
+            json.dumps(value, default=str),
+            ex=int(ttl_seconds)
+        )
+
+
+class BriefingCache:
+    """
+    Two-tier briefing cache: a per-process LRU in front of an optional
+    shared tier. Shared-tier failures are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 900,
+        shared: Optional[SharedCacheBackend] = None
+    ):
+        """
+        Initialize the briefing cache.
+
+        Args:
+            max_size: Maximum entries in the local tier
+            ttl_seconds: Entry lifetime in seconds for both tiers
+            shared: Optional shared cache tier
+        """
+        self.local = LRUCache(max_size, ttl_seconds)
+        self.shared = shared
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached briefing, promoting shared hits to the local tier.
+
+        Args:
+            key: Input fingerprint
+
+        Returns:
+            Cached briefing, or None on a miss
+        """
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        if self.shared is None:
+            return None
+
+        try:
+            value = await self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"Shared briefing cache read failed: {str(e)}")
+            return None
+
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def set(
+        self,
+        key: str,
+        value: Dict[str, Any],
+        ttl_seconds: Optional[float] = None
+    ) -> None:
+        """
+        Store a briefing in both tiers.
+
+        Args:
+            key: Input fingerprint
+            value: Briefing data
+            ttl_seconds: Entry lifetime override (defaults to the cache TTL)
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.local.set(key, value, ttl)
+
+        if self.shared is None:
+            return
+
+        try:
+            await self.shared.set(key, value, ttl)
+        except Exception as e:
+            logger.warning(f"Shared briefing cache write failed: {str(e)}")
+
+
+def _init_shared_cache(url: Optional[str]) -> Optional[SharedCacheBackend]:
+    """
+    Build the shared cache tier from a URL setting.
+
+    Args:
+        url: "memory" for the local stand-in, a redis:// URL, or None
+
+    Returns:
+        Shared cache backend, or None if disabled
+    """
+    if not url:
+        return None
+    if url == "memory":
+        return InMemorySharedCache()
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            return RedisSharedCache(url)
+        except ImportError:
+            logger.warning("redis package not installed - shared briefing cache disabled")
+            return None
+
+    logger.warning(f"Unsupported briefing cache URL: {url}")
+    return None
+
+
+# Global briefing cache instance
+briefing_cache = BriefingCache(
+    max_size=settings.briefing_cache_size,
+    ttl_seconds=settings.briefing_cache_ttl_seconds,
+    shared=_init_shared_cache(settings.briefing_cache_url)
+)
@@ -0,0 +1,281 @@
+"""
+Background briefing jobs.
+Accepts briefing requests onto a bounded queue and generates them on a
+worker pool, so clients poll for the result instead of holding a
+connection open for the whole graph run.
+"""
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.schemas.dashboard import BriefingJob, BriefingRequest
+from app.services.briefing_service import run_briefing
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobBroker(ABC):
+    """
+    Interface for the queue jobs travel through to the workers (e.g. a
+    message broker).
+    """
+
+    @abstractmethod
+    async def put(self, job_id: str, payload: str) -> None:
+        """
+        Enqueue a job without waiting.
+
+        Args:
+            job_id: Job identifier
+            payload: Serialized briefing request
+
+        Raises:
+            JobQueueFull: If the queue is at capacity
+        """
+
+    @abstractmethod
+    async def get(self) -> Tuple[str, str]:
+        """
+        Wait for the next job.
+
+        Returns:
+            Tuple of (job_id, payload)
+        """
+
+    @property
+    @abstractmethod
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+
+
+class InMemoryJobBroker(JobBroker):
+    """
+    Local stand-in for a message broker, used in development and tests.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Initialize the queue.
+
+        Args:
+            max_size: Jobs held before submissions are refused
+        """
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+
+    async def put(self, job_id: str, payload: str) -> None:
+        try:
+            self._queue.put_nowait((job_id, payload))
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"Job queue is full ({self._queue.maxsize} jobs)") from None
+
+    async def get(self) -> Tuple[str, str]:
+        return await self._queue.get()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+
+class BriefingJobQueue:
+    """
+    Runs briefing requests in the background on a fixed pool of workers.
+
+    Submissions beyond the broker's capacity are refused rather than
+    queued without bound, so callers can back off. Requests cross the
+    broker serialized, as they would through a networked one; job status
+    is kept in process, and finished jobs stay pollable for
+    ``result_ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        broker: Optional[JobBroker] = None,
+        workers: int = 8,
+        queue_size: int = 256,
+        result_ttl_seconds: float = 900
+    ):
+        """
+        Initialize the job queue.
+
+        Args:
+            broker: Job broker (an in-memory queue of ``queue_size`` if not provided)
+            workers: Briefings generated at once
+            queue_size: Capacity of the default broker
+            result_ttl_seconds: How long finished jobs are kept
+        """
+        self.broker = broker or InMemoryJobBroker(queue_size)
+        self.workers = workers
+        self.result_ttl_seconds = result_ttl_seconds
+
+        self._jobs: Dict[str, BriefingJob] = {}
+        self._done: Dict[str, asyncio.Event] = {}
+        # Finished jobs as (expiry, job_id), in expiry order
+        self._expiry: Deque[Tuple[float, str]] = deque()
+        self._tasks: Set[asyncio.Task] = set()
+        self._running = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self.broker.depth
+
+    @property
+    def in_flight(self) -> int:
+        """Number of briefings currently being generated."""
+        return self._running
+
+    async def submit(self, request: BriefingRequest) -> BriefingJob:
+        """
+        Accept a briefing request for background generation.
+
+        Starts the workers if they are not running yet.
+
+        Args:
+            request: Briefing request
+
+        Returns:
+            Queued job
+
+        Raises:
+            JobQueueFull: If the queue is at capacity
+        """
+        self.start()
+        self._expire()
+
+        job = BriefingJob(
+            job_id=uuid.uuid4().hex,
+            user_id=request.user_id,
+            status="queued",
+            submitted_at=datetime.utcnow()
+        )
+        self._jobs[job.job_id] = job
+        self._done[job.job_id] = asyncio.Event()
+
+        try:
+            await self.broker.put(job.job_id, request.model_dump_json())
+        except JobQueueFull:
+            del self._jobs[job.job_id]
+            del self._done[job.job_id]
+            raise
+
+        return job
+
+    def get(self, job_id: str) -> Optional[BriefingJob]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job, or None if unknown or expired
+        """
+        self._expire()
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[BriefingJob]:
+        """
+        Look up a job, waiting up to ``timeout`` seconds for it to finish.
+
+        Args:
+            job_id: Job identifier
+            timeout: Longest wait in seconds (0 returns at once)
+
+        Returns:
+            Job in its latest state, or None if unknown or expired
+        """
+        done = self._done.get(job_id)
+        if done is not None and timeout > 0:
+            try:
+                await asyncio.wait_for(done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(job_id)
+
+    def _expire(self) -> None:
+        """Forget finished jobs past their retention."""
+        now = time.monotonic()
+        while self._expiry and self._expiry[0][0] <= now:
+            _, job_id = self._expiry.popleft()
+            self._jobs.pop(job_id, None)
+            self._done.pop(job_id, None)
+
+    def _finish(self, job: BriefingJob) -> None:
+        """Stamp a job finished, start its retention and wake its waiters."""
+        job.finished_at = datetime.utcnow()
+        self._expiry.append((time.monotonic() + self.result_ttl_seconds, job.job_id))
+        self._done[job.job_id].set()
+
+    async def _run_job(self, job_id: str, payload: str) -> None:
+        """Generate one job's briefing and record the outcome."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status != "queued":
+            # Expired, or abandoned by an earlier shutdown
+            return
+
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        self._running += 1
+        try:
+            job.briefing = await run_briefing(BriefingRequest.model_validate_json(payload))
+            job.status = "success"
+        except Exception as e:
+            logger.error(f"Briefing job {job_id} failed: {str(e)}")
+            job.status = "error"
+            job.error = str(e)
+        finally:
+            self._running -= 1
+            if job.status == "running":
+                # Cancelled by shutdown
+                job.status = "error"
+                job.error = "Briefing job was interrupted"
+            self._finish(job)
+
+    async def _worker(self) -> None:
+        """Drain the broker one job at a time."""
+        while True:
+            job_id, payload = await self.broker.get()
+            await self._run_job(job_id, payload)
+
+    def start(self) -> None:
+        """Start the worker pool in the background."""
+        if not self._tasks:
+            self._tasks = {asyncio.create_task(self._worker()) for _ in range(self.workers)}
+            logger.info(f"Briefing job workers started ({self.workers})")
+
+    async def stop(self) -> None:
+        """
+        Stop the worker pool, abandoning jobs in progress.
+
+        Jobs still waiting for a worker are failed, so pollers and waiters
+        see them finish instead of staying queued.
+        """
+        if self._tasks:
+            tasks: List[asyncio.Task] = list(self._tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._tasks = set()
+            logger.info("Briefing job workers stopped")
+
+        for job in self._jobs.values():
+            if job.status == "queued":
+                job.status = "error"
+                job.error = "Briefing job was not started before shutdown"
+                self._finish(job)
+
+
+# Global job queue instance
+briefing_jobs = BriefingJobQueue(
+    workers=settings.job_workers,
+    queue_size=settings.job_queue_size,
+    result_ttl_seconds=settings.job_result_ttl_seconds
+)
@@ -0,0 +1,317 @@
+"""
+Briefing generation service.
+Runs the briefing graph for a request, fronted by the briefing result cache.
+"""
+import asyncio
+from itertools import islice
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional, Tuple
+from datetime import datetime
+
+from app.agents.graph import get_briefing_graph, load_user_context
+from app.schemas.dashboard import BriefingRequest, BriefingResponse, BatchBriefingResult
+from app.services.briefing_cache import briefing_cache, fingerprint_briefing_inputs
+from app.services.wellness_schedule import WellnessInputs, compute_wellness_schedules
+from app.core.config import settings
+from app.core.logger import logger
+
+
+# Graph nodes reported by the streaming API and the state key each one writes
+_STREAMED_NODES = {
+    "planner": "planner_output",
+    "motivator": "motivator_output",
+    "wellness": "wellness_output",
+    "summary": "summary_output"
+}
+
+# Nodes whose partial ``briefing`` text is streamed as token events
+_TOKEN_NODES = ("summary", "summary_draft")
+
+
+def build_initial_state(request: BriefingRequest) -> Dict[str, Any]:
+    """
+    Build the initial graph state for a briefing request.
+
+    Args:
+        request: Briefing request
+
+    Returns:
+        Initial briefing state
+    """
+    return {
+        "user_id": request.user_id,
+        "preferences": request.preferences.model_dump(exclude_unset=True) if request.preferences else {},
+        "context": request.context,
+        "errors": []
+    }
+
+
+def build_response(
+    request: BriefingRequest,
+    state: Dict[str, Any],
+    result: Dict[str, Any]
+) -> BriefingResponse:
+    """
+    Assemble the API response from loaded context and agent outputs.
+
+    Args:
+        request: Original briefing request
+        state: State holding the loaded event and task records
+        result: Agent outputs and generation timestamp
+
+    Returns:
+        Briefing response
+    """
+    summary_output = result.get("summary_output", {})
+    return BriefingResponse(
+        user_id=request.user_id,
+        summary=summary_output.get("briefing", ""),
+        planner_output=result.get("planner_output", {}),
+        motivator_output=result.get("motivator_output", {}),
+        wellness_output=result.get("wellness_output", {}),
+        calendar_events=[
+            event.to_schema() for event in state.get("calendar_events", [])
+        ] if request.include_calendar else [],
+        tasks=[
+            task.to_schema() for task in state.get("tasks", [])
+        ] if request.include_tasks else [],
+        timestamp=result["timestamp"]
+    )
+
+
+async def _prepare_briefing(request: BriefingRequest) -> Tuple[Dict[str, Any], str]:
+    """
+    Load context for a request and compute its cache key.
+
+    Args:
+        request: Briefing request
+
+    Returns:
+        Tuple of (state with context loaded, cache key)
+    """
+    state = build_initial_state(request)
+    state.update(await load_user_context(state))
+
+    cache_key = fingerprint_briefing_inputs(
+        request.user_id,
+        {"preferences": state["preferences"], "goals": state["goals"]},
+        state["calendar_events"],
+        state["tasks"],
+        request.context
+    )
+    return state, cache_key
+
+
+def _collect_outputs(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the cacheable agent outputs from a graph result.
+
+    Args:
+        result: Final graph state
+
+    Returns:
+        Agent outputs with a generation timestamp
+    """
+    return {
+        "planner_output": result.get("planner_output", {}),
+        "motivator_output": result.get("motivator_output", {}),
+        "wellness_output": result.get("wellness_output", {}),
+        "summary_output": result.get("summary_output", {}),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+async def run_briefing(
+    request: BriefingRequest,
+    cache_ttl_seconds: Optional[float] = None,
+    prepared: Optional[Tuple[Dict[str, Any], str]] = None
+) -> BriefingResponse:
+    """
+    Generate a briefing, serving it from cache when inputs are unchanged.
+
+    Context is loaded first so the cache key reflects the user's current
+    profile, calendar and tasks. On a miss the graph runs with that context
+    pre-loaded, and the result is cached only if every source loaded cleanly.
+
+    Args:
+        request: Briefing request
+        cache_ttl_seconds: Cache lifetime for a newly generated briefing
+            (defaults to the cache TTL)
+        prepared: State and cache key already loaded by the caller
+
+    Returns:
+        Briefing response
+    """
+    state, cache_key = prepared or await _prepare_briefing(request)
+
+    cached = await briefing_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Briefing cache hit for user: {request.user_id}")
+        return build_response(request, state, cached)
+
+    graph = get_briefing_graph()
+    result = await graph.ainvoke(state)
+    outputs = _collect_outputs(result)
+
+    if not result.get("errors"):
+        await briefing_cache.set(cache_key, outputs, cache_ttl_seconds)
+
+    return build_response(request, state, outputs)
+
+
+async def stream_briefing(request: BriefingRequest) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Generate a briefing, yielding events as each graph node finishes.
+
+    Yields ``(node_name, output)`` for planner, motivator, wellness and
+    summary as they complete, ``("token", {"content": ...})`` with each
+    piece of summary briefing text as the LLM writes it,
+    ``("partial", {"node": ..., "output": ...})``
+    with each agent's output parsed so far as its LLM response streams in,
+    and finally ``("done", response)``.
+    Cache hits replay the stored outputs immediately.
+
+    Args:
+        request: Briefing request
+
+    Yields:
+        Tuples of (event name, event data)
+    """
+    state, cache_key = await _prepare_briefing(request)
+
+    cached = await briefing_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Briefing cache hit for user: {request.user_id}")
+        for node, key in _STREAMED_NODES.items():
+            yield node, cached.get(key, {})
+        yield "done", build_response(request, state, cached).model_dump()
+        return
+
+    graph = get_briefing_graph()
+    result = dict(state)
+    # Briefing text already sent as tokens, per summary node
+    streamed_text: Dict[str, str] = {}
+
+    async for mode, chunk in graph.astream(state, stream_mode=["updates", "custom"]):
+        if mode == "custom":
+            node, partial = chunk["node"], chunk["partial"]
+            yield "partial", {"node": node, "output": partial}
+
+            text = partial.get("briefing")
+            if node in _TOKEN_NODES and isinstance(text, str):
+                sent = streamed_text.get(node, "")
+                if len(text) > len(sent) and text.startswith(sent):
+                    yield "token", {"content": text[len(sent):]}
+                    streamed_text[node] = text
+            continue
+
+        for node, update in chunk.items():
+            if not update:
+                continue
+            if "errors" in update:
+                result["errors"] = result.get("errors", []) + update["errors"]
+            result.update({k: v for k, v in update.items() if k != "errors"})
+            if node in _STREAMED_NODES:
+                yield node, update.get(_STREAMED_NODES[node], {})
+
+    outputs = _collect_outputs(result)
+    if not result.get("errors"):
+        await briefing_cache.set(cache_key, outputs)
+
+    yield "done", build_response(request, state, outputs).model_dump()
+
+
+def _attach_wellness_schedules(states: List[Dict[str, Any]]) -> None:
+    """
+    Compute break and hydration schedules for many loaded states at once.
+
+    Args:
+        states: Briefing states with context loaded (updated in place)
+    """
+    schedules = compute_wellness_schedules([
+        WellnessInputs.from_context(state["calendar_events"], state["preferences"])
+        for state in states
+    ])
+    for state, schedule in zip(states, schedules):
+        state["wellness_schedule"] = schedule
+
+
+async def run_briefing_batch(
+    requests: Iterable[BriefingRequest],
+    concurrency: Optional[int] = None,
+    cache_ttl_seconds: Optional[float] = None
+) -> AsyncIterator[BatchBriefingResult]:
+    """
+    Generate briefings for many users with bounded concurrency.
+
+    Requests are taken in chunks of ``batch_chunk_size``, so memory stays
+    flat regardless of batch size. Each chunk's context is loaded first and
+    its break and hydration schedules are computed in one vectorized pass;
+    then a fixed pool of workers runs the graphs. Each user's failure is
+    captured in their own result and never affects the rest of the batch.
+    Results are yielded in completion order; the bounded result queue
+    applies backpressure to workers when the consumer falls behind.
+
+    Args:
+        requests: Briefing requests to run
+        concurrency: Maximum briefings in flight (defaults to, and is capped
+            at, ``batch_concurrency``)
+        cache_ttl_seconds: Cache lifetime for generated briefings
+
+    Yields:
+        One result per request
+    """
+    concurrency = min(concurrency or settings.batch_concurrency, settings.batch_concurrency)
+    chunk_size = max(settings.batch_chunk_size, concurrency)
+    pending = iter(requests)
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    loading = asyncio.Semaphore(concurrency)
+
+    async def failed(request: BriefingRequest, error: Exception) -> None:
+        logger.error(f"Error generating briefing for user {request.user_id}: {str(error)}")
+        await results.put(BatchBriefingResult(
+            user_id=request.user_id,
+            status="error",
+            error=str(error)
+        ))
+
+    async def prepare(request: BriefingRequest) -> Optional[Tuple[Dict[str, Any], str]]:
+        async with loading:
+            try:
+                return await _prepare_briefing(request)
+            except Exception as e:
+                await failed(request, e)
+                return None
+
+    async def worker(jobs) -> None:
+        for request, prepared in jobs:
+            try:
+                briefing = await run_briefing(request, cache_ttl_seconds, prepared=prepared)
+            except Exception as e:
+                await failed(request, e)
+                continue
+            await results.put(BatchBriefingResult(
+                user_id=request.user_id,
+                status="success",
+                briefing=briefing
+            ))
+
+    async def produce() -> None:
+        try:
+            while chunk := list(islice(pending, chunk_size)):
+                loaded = await asyncio.gather(*[prepare(request) for request in chunk])
+                jobs = [(request, prepared) for request, prepared in zip(chunk, loaded) if prepared]
+                _attach_wellness_schedules([state for _, (state, _) in jobs])
+
+                queue = iter(jobs)
+                await asyncio.gather(*[worker(queue) for _ in range(concurrency)])
+        except Exception as e:
+            logger.error(f"Batch generation stopped early: {str(e)}")
+        await results.put(None)
+
+    producer = asyncio.create_task(produce())
+
+    try:
+        while (result := await results.get()) is not None:
+            yield result
+    finally:
+        producer.cancel()
@@ -2,31 +2,170 @@
 Calendar integration service.
 Handles fetching and parsing calendar events from various providers.
 """
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
 from app.core.logger import logger
 from app.core.config import settings
+from app.schemas.records import EventRecord, build_event_records
+from app.utils.timestamps import datetime_to_epoch, to_epoch
+from app.services.free_busy import FreeBusyIndex
+
+
+class SyncTokenExpired(Exception):
+    """Raised by a provider client when an incremental sync token is no longer valid."""
+
+
+@dataclass
+class CalendarSyncResult:
+    """Result of a full or incremental fetch from a calendar provider."""
+    events: List[Dict[str, Any]]
+    sync_token: Optional[str] = None
+    deleted_ids: List[str] = field(default_factory=list)
+
+
+class CalendarClient(ABC):
+    """
+    Interface for calendar provider clients.
+
+    Providers that support incremental sync (Google ``syncToken``, Outlook
+    delta links, CalDAV ``sync-token`` / ETags) return a token with each
+    fetch. Passing it back returns only events changed since that fetch.
+    """
+
+    @abstractmethod
+    async def list_events(
+        self,
+        user_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        sync_token: Optional[str] = None
+    ) -> CalendarSyncResult:
+        """
+        Fetch events in a date range.
+
+        Args:
+            user_id: User identifier
+            start_date: Start of date range
+            end_date: End of date range
+            sync_token: Token from a previous fetch for an incremental sync
+
+        Returns:
+            All events (full fetch) or changed and deleted events (incremental)
+
+        Raises:
+            SyncTokenExpired: If the provider rejects the sync token
+        """
+
+
+class PlaceholderCalendarClient(CalendarClient):
+    """
+    Stand-in client returning fixed sample events until a real provider is wired up.
+    """
+
+    async def list_events(
+        self,
+        user_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        sync_token: Optional[str] = None
+    ) -> CalendarSyncResult:
+        if sync_token is not None:
+            # Sample data never changes
+            return CalendarSyncResult(events=[], sync_token=sync_token)
+
+        events = [
+            {
+                "id": "event1",
+                "title": "Team Standup",
+                "start": start_date.replace(hour=9, minute=0).isoformat(),
+                "end": start_date.replace(hour=9, minute=30).isoformat(),
+                "location": "Zoom",
+                "attendees": ["team@example.com"]
+            },
+            {
+                "id": "event2",
+                "title": "Project Review",
+                "start": start_date.replace(hour=14, minute=0).isoformat(),
+                "end": start_date.replace(hour=15, minute=0).isoformat(),
+                "location": "Conference Room A",
+                "attendees": ["manager@example.com"]
+            }
+        ]
+        return CalendarSyncResult(events=events, sync_token=f"placeholder:{user_id}")
+
+
+@dataclass
+class _CacheEntry:
+    """Cached events for one user and date range."""
+    events: Dict[str, Dict[str, Any]]
+    sync_token: Optional[str]
+    fetched_at: float
+    stale: bool = False
+    index: Optional[FreeBusyIndex] = None  # built on first free/busy query
+
+
+@dataclass(slots=True)
+class _RangeLock:
+    """Lock serializing fetches for one range, with its current holders and waiters."""
+    lock: asyncio.Lock
+    users: int = 0
 
 
 class CalendarService:
     """
     Service for integrating with calendar APIs (Google Calendar, Outlook, etc.).
+
+    Events are cached per user and date range. A fresh entry is served
+    without calling the provider. Once an entry is past its TTL, or after a
+    push notification marks it stale, the next read asks the provider only
+    for changes since the stored sync token and merges them in. Without a
+    token, or if the provider rejects it, the full range is refetched.
     """
 
-    def __init__(self, provider: str = "google"):
+    def __init__(
+        self,
+        provider: str = "google",
+        client: Optional[CalendarClient] = None,
+        cache_ttl_seconds: float = 300,
+        cache_max_entries: int = 10000
+    ):
         """
         Initialize calendar service.
 
         Args:
             provider: Calendar provider (google, outlook, etc.)
+            client: Provider client (selected from provider if not provided)
+            cache_ttl_seconds: How long cached events are served without a sync
+            cache_max_entries: Maximum cached (user, range) entries
         """
         self.provider = provider
-        # TODO: Initialize calendar API client based on provider
-        # if provider == "google":
-        #     self.client = self._init_google_calendar()
-        # elif provider == "outlook":
-        #     self.client = self._init_outlook_calendar()
+        self.client = client or self._init_client()
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_max_entries = cache_max_entries
+        self._cache: "OrderedDict[Tuple[str, datetime, datetime], _CacheEntry]" = OrderedDict()
+        # Only ranges with a read in progress have a lock
+        self._locks: Dict[Tuple[str, datetime, datetime], _RangeLock] = {}
+
+    def _init_client(self) -> CalendarClient:
+        """
+        Initialize the provider client.
+
+        Returns:
+            Calendar client for the configured provider
+        """
+        client = None
+        if self.provider == "google":
+            client = self._init_google_calendar()
+        elif self.provider == "outlook":
+            client = self._init_outlook_calendar()
+
+        return client or PlaceholderCalendarClient()
 
     async def get_events(
         self,
@@ -45,42 +184,185 @@ class CalendarService:
         Returns:
             List of calendar events
         """
+        entry = await self._load(user_id, start_date, end_date)
+        return list(entry.events.values()) if entry is not None else []
+
+    async def get_free_busy_index(
+        self,
+        user_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> FreeBusyIndex[EventRecord]:
+        """
+        Get a free/busy index over a user's events within a date range.
+
+        The index is built once per cached range and reused until the range
+        is next refreshed.
+
+        Args:
+            user_id: User identifier
+            start_date: Start of date range (defaults to today)
+            end_date: End of date range (defaults to end of today)
+
+        Returns:
+            Free/busy index over the range's events
+        """
+        entry = await self._load(user_id, start_date, end_date)
+        if entry is None:
+            return FreeBusyIndex([])
+        return self._index(entry)
+
+    @staticmethod
+    def _index(entry: _CacheEntry) -> FreeBusyIndex[EventRecord]:
+        """Get a cache entry's free/busy index, building it on first use."""
+        if entry.index is None:
+            entry.index = FreeBusyIndex.from_events(build_event_records(list(entry.events.values())))
+        return entry.index
+
+    async def _load(
+        self,
+        user_id: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Optional[_CacheEntry]:
+        """
+        Get the cache entry for a range, refreshing it if needed.
+
+        Args:
+            user_id: User identifier
+            start_date: Start of date range (defaults to today)
+            end_date: End of date range (defaults to end of today)
+
+        Returns:
+            Cache entry, or None if nothing could be fetched
+        """
+        if start_date is None:
+            start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        if end_date is None:
+            end_date = start_date.replace(hour=23, minute=59, second=59)
+
+        key = (user_id, start_date, end_date)
+        range_lock = self._locks.get(key)
+        if range_lock is None:
+            range_lock = self._locks[key] = _RangeLock(asyncio.Lock())
+        range_lock.users += 1
+
+        # Concurrent callers for the same range share a single provider fetch
         try:
-            if start_date is None:
-                start_date = datetime.now().replace(hour=0, minute=0, second=0)
-            if end_date is None:
-                end_date = start_date.replace(hour=23, minute=59, second=59)
-
-            logger.info(f"Fetching calendar events for {user_id} from {start_date} to {end_date}")
-
-            # TODO: Fetch events from calendar API
-            # events = await self._fetch_from_api(user_id, start_date, end_date)
-
-            # Placeholder data
-            events = [
-                {
-                    "id": "event1",
-                    "title": "Team Standup",
-                    "start": start_date.replace(hour=9, minute=0).isoformat(),
-                    "end": start_date.replace(hour=9, minute=30).isoformat(),
-                    "location": "Zoom",
-                    "attendees": ["team@example.com"]
-                },
-                {
-                    "id": "event2",
-                    "title": "Project Review",
-                    "start": start_date.replace(hour=14, minute=0).isoformat(),
-                    "end": start_date.replace(hour=15, minute=0).isoformat(),
-                    "location": "Conference Room A",
-                    "attendees": ["manager@example.com"]
-                }
-            ]
-
-            return events
-
-        except Exception as e:
-            logger.error(f"Error fetching calendar events: {str(e)}")
-            return []
+            async with range_lock.lock:
+                entry = self._cache.get(key)
+                if entry is not None and not entry.stale and \
+                        time.monotonic() - entry.fetched_at < self.cache_ttl_seconds:
+                    return entry
+
+                try:
+                    entry = await self._refresh(user_id, start_date, end_date, entry)
+                    self._store(key, entry)
+                    return entry
+
+                except Exception as e:
+                    logger.error(f"Error fetching calendar events: {str(e)}")
+                    # Serve the last known events rather than nothing
+                    return entry
+        finally:
+            range_lock.users -= 1
+            if range_lock.users == 0:
+                del self._locks[key]
+
+    async def _refresh(
+        self,
+        user_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        entry: Optional[_CacheEntry]
+    ) -> _CacheEntry:
+        """
+        Bring a cache entry up to date, incrementally when possible.
+
+        Args:
+            user_id: User identifier
+            start_date: Start of date range
+            end_date: End of date range
+            entry: Existing cache entry, if any
+
+        Returns:
+            Refreshed cache entry
+        """
+        if entry is not None and entry.sync_token:
+            try:
+                result = await self.client.list_events(
+                    user_id, start_date, end_date, sync_token=entry.sync_token
+                )
+                events = dict(entry.events)
+                for event_id in result.deleted_ids:
+                    events.pop(event_id, None)
+                for event in result.events:
+                    events[event["id"]] = event
+
+                logger.debug(
+                    f"Incremental calendar sync for {user_id}: "
+                    f"{len(result.events)} changed, {len(result.deleted_ids)} deleted"
+                )
+                return _CacheEntry(
+                    events=self._sorted(events),
+                    sync_token=result.sync_token or entry.sync_token,
+                    fetched_at=time.monotonic()
+                )
+            except SyncTokenExpired:
+                logger.info(f"Calendar sync token expired for {user_id}, doing full fetch")
+
+        logger.info(f"Fetching calendar events for {user_id} from {start_date} to {end_date}")
+        result = await self.client.list_events(user_id, start_date, end_date)
+        return _CacheEntry(
+            events=self._sorted({event["id"]: event for event in result.events}),
+            sync_token=result.sync_token,
+            fetched_at=time.monotonic()
+        )
+
+    def _store(self, key: Tuple[str, datetime, datetime], entry: _CacheEntry) -> None:
+        """Cache an entry, evicting the least recently refreshed ones when full."""
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _sorted(events: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Order events by start time, keyed by event ID."""
+        return dict(sorted(events.items(), key=lambda item: to_epoch(item[1].get("start")) or 0))
+
+    def handle_push_notification(self, user_id: str) -> int:
+        """
+        Mark a user's cached ranges stale after a provider change notification.
+
+        The next read of each range performs an incremental sync.
+
+        Args:
+            user_id: User whose calendar changed
+
+        Returns:
+            Number of cached ranges marked stale
+        """
+        marked = 0
+        for (cached_user, _, _), entry in self._cache.items():
+            if cached_user == user_id:
+                entry.stale = True
+                marked += 1
+        return marked
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """
+        Drop cached events entirely, forcing a full fetch.
+
+        Args:
+            user_id: User to invalidate (all users if None)
+        """
+        if user_id is None:
+            self._cache.clear()
+            return
+
+        for key in [key for key in self._cache if key[0] == user_id]:
+            del self._cache[key]
 
     async def get_today_events(self, user_id: str) -> List[Dict[str, Any]]:
         """
@@ -102,6 +384,11 @@ class CalendarService:
         """
         Get upcoming events within the next N hours.
 
+        The fetched range is widened to whole hours so repeated calls reuse
+        the same cache entry; the window is then looked up in that range's
+        free/busy index. The window is taken in UTC, the timeline event
+        timestamps are indexed on.
+
         Args:
             user_id: User identifier
             hours: Number of hours to look ahead
@@ -109,11 +396,21 @@ class CalendarService:
         Returns:
             List of upcoming events
         """
-        start_date = datetime.now()
-        end_date = start_date + timedelta(hours=hours)
-        return await self.get_events(user_id, start_date, end_date)
+        now = datetime.now(timezone.utc)
+        end = now + timedelta(hours=hours)
+        start_date = now.replace(minute=0, second=0, microsecond=0)
+        end_date = end.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+        entry = await self._load(user_id, start_date, end_date)
+        if entry is None:
+            return []
+
+        return [
+            entry.events[record.id]
+            for record in self._index(entry).overlapping(datetime_to_epoch(now), datetime_to_epoch(end) + 1)
+        ]
 
-    def _init_google_calendar(self):
+    def _init_google_calendar(self) -> Optional[CalendarClient]:
         """
         Initialize Google Calendar API client.
 
@@ -127,9 +424,9 @@ class CalendarService:
         # credentials = Credentials(token=settings.calendar_api_key)
         # service = build('calendar', 'v3', credentials=credentials)
         # return service
-        pass
+        return None
 
-    def _init_outlook_calendar(self):
+    def _init_outlook_calendar(self) -> Optional[CalendarClient]:
         """
         Initialize Outlook Calendar API client.
 
@@ -145,11 +442,14 @@ class CalendarService:
         #     authority=settings.outlook_authority
         # )
         # return app
-        pass
+        return None
 
 
 # Global calendar service instance
-calendar_service = CalendarService()
+calendar_service = CalendarService(
+    cache_ttl_seconds=settings.calendar_cache_ttl_seconds,
+    cache_max_entries=settings.calendar_cache_size
+)
 
 
 async def get_calendar_events(user_id: str) -> List[Dict[str, Any]]:
@@ -0,0 +1,214 @@
+"""
+Free/busy index over calendar events.
+Answers overlap, conflict, free-slot and next-event queries over a sorted
+interval index instead of scanning event lists.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from app.schemas.records import EventRecord
+
+
+T = TypeVar("T")
+
+
+class FreeBusyIndex(Generic[T]):
+    """
+    Static interval index over half-open ``[start, end)`` intervals.
+
+    Intervals are kept sorted by start and treated as an implicit balanced
+    search tree where each node also stores the latest end in its subtree,
+    so overlap queries cost O(log n + k). Overlapping intervals are also
+    merged into disjoint busy blocks, so busy checks cost O(log n) and
+    free-slot queries O(log n + k).
+
+    Times are integers (epoch seconds for event records) and may span any
+    number of days. Build a new index when the events change.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, T]]):
+        """
+        Build the index.
+
+        Args:
+            intervals: (start, end, item) triples in any order
+        """
+        ordered = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self._starts = [start for start, _, _ in ordered]
+        self._ends = [max(start, end) for start, end, _ in ordered]
+        self._items = [item for _, _, item in ordered]
+
+        self._max_end = [0] * len(ordered)
+        self._build(0, len(ordered))
+
+        self._busy_starts: List[int] = []
+        self._busy_ends: List[int] = []
+        for start, end in zip(self._starts, self._ends):
+            if self._busy_ends and start <= self._busy_ends[-1]:
+                self._busy_ends[-1] = max(self._busy_ends[-1], end)
+            else:
+                self._busy_starts.append(start)
+                self._busy_ends.append(end)
+
+    @classmethod
+    def from_events(cls, *calendars: Iterable[EventRecord]) -> "FreeBusyIndex[EventRecord]":
+        """
+        Build an index over one or more calendars' events.
+
+        Events with the same ID in several calendars (e.g. a meeting on both
+        a personal and a shared team calendar) are indexed once.
+
+        Args:
+            *calendars: Event records from each calendar
+
+        Returns:
+            Merged free/busy index
+        """
+        seen = set()
+        intervals = []
+        for events in calendars:
+            for event in events:
+                if event.id in seen:
+                    continue
+                seen.add(event.id)
+                intervals.append((event.start_ts, event.end_ts, event))
+        return cls(intervals)
+
+    def _build(self, lo: int, hi: int) -> int:
+        """Fill in subtree max ends for the implicit tree over [lo, hi)."""
+        if lo >= hi:
+            return -1
+        mid = (lo + hi) // 2
+        self._max_end[mid] = max(self._ends[mid], self._build(lo, mid), self._build(mid + 1, hi))
+        return self._max_end[mid]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        """Iterate over items in start order."""
+        return iter(self._items)
+
+    def overlapping(self, start: int, end: int) -> List[T]:
+        """
+        Find intervals overlapping ``[start, end)``.
+
+        Args:
+            start: Range start
+            end: Range end
+
+        Returns:
+            Overlapping items in start order
+        """
+        found: List[T] = []
+        self._collect(0, len(self._items), start, end, found)
+        return found
+
+    def _collect(self, lo: int, hi: int, start: int, end: int, found: List[T]) -> None:
+        """Walk the implicit tree over [lo, hi) in order, pruning by max end."""
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self._max_end[mid] <= start:
+            return
+        self._collect(lo, mid, start, end, found)
+        if self._starts[mid] >= end:
+            return
+        if self._ends[mid] > start:
+            found.append(self._items[mid])
+        self._collect(mid + 1, hi, start, end, found)
+
+    def is_busy(self, start: int, end: int) -> bool:
+        """
+        Check whether any interval overlaps ``[start, end)``.
+
+        Args:
+            start: Range start
+            end: Range end
+
+        Returns:
+            True if the range is not entirely free
+        """
+        i = bisect_right(self._busy_starts, start) - 1
+        if i >= 0 and self._busy_ends[i] > start:
+            return True
+        return i + 1 < len(self._busy_starts) and self._busy_starts[i + 1] < end
+
+    def conflicts(self) -> List[Tuple[T, T]]:
+        """
+        Find every pair of overlapping intervals.
+
+        Sweeps once in start order with a heap of active ends, so the cost is
+        O(n log n + k) for k conflicts rather than pairwise O(n^2).
+
+        Returns:
+            (earlier, later) item pairs
+        """
+        pairs: List[Tuple[T, T]] = []
+        active: List[Tuple[int, int]] = []
+        for i, start in enumerate(self._starts):
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            pairs.extend((self._items[j], self._items[i]) for _, j in active)
+            heapq.heappush(active, (self._ends[i], i))
+        return pairs
+
+    def has_conflicts(self) -> bool:
+        """
+        Check whether any two intervals overlap.
+
+        Returns:
+            True if at least one conflict exists
+        """
+        latest_end = None
+        for start, end in zip(self._starts, self._ends):
+            if latest_end is not None and start < latest_end:
+                return True
+            latest_end = end if latest_end is None else max(latest_end, end)
+        return False
+
+    def free_slots(
+        self,
+        start: int,
+        end: int,
+        min_length: int = 0,
+        buffer: int = 0
+    ) -> List[Tuple[int, int]]:
+        """
+        Find free time within ``[start, end)``.
+
+        Args:
+            start: Range start
+            end: Range end
+            min_length: Shortest slot to return
+            buffer: Gap to leave after each busy block
+
+        Returns:
+            Free (start, end) pairs in order
+        """
+        slots = []
+        cursor = start
+        i = bisect_right(self._busy_ends, start - buffer)
+        while i < len(self._busy_starts) and self._busy_starts[i] < end:
+            if self._busy_starts[i] > cursor:
+                slots.append((cursor, self._busy_starts[i]))
+            cursor = max(cursor, self._busy_ends[i] + buffer)
+            i += 1
+        if cursor < end:
+            slots.append((cursor, end))
+
+        return [(s, e) for s, e in slots if e - s >= max(min_length, 1)]
+
+    def next_event(self, after: int) -> Optional[T]:
+        """
+        Find the first interval starting at or after a time.
+
+        Args:
+            after: Reference time
+
+        Returns:
+            Next item, or None if nothing starts later
+        """
+        i = bisect_left(self._starts, after)
+        return self._items[i] if i < len(self._items) else None
@@ -0,0 +1,239 @@
+"""
+Incremental TF-IDF keyword index over user history.
+Keeps each user's term counts from event titles, task titles and saved
+briefings, and maintains their top terms as documents arrive so prompts
+can name a user's recurring themes without re-reading their history.
+"""
+import heapq
+import math
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.text_cleaner import keyword_tokens
+
+
+@dataclass(slots=True)
+class _UserTerms:
+    """One user's term counts and ranked top terms."""
+    counts: Dict[str, int] = field(default_factory=dict)
+    seen: "OrderedDict[str, None]" = field(default_factory=OrderedDict)
+    top: List[str] = field(default_factory=list)
+    oldest: Optional[datetime] = None  # creation time of the oldest document
+
+
+def briefing_text(briefing: Any) -> str:
+    """
+    Collect the text of a saved briefing.
+
+    Args:
+        briefing: Briefing data (nested dicts and lists of strings)
+
+    Returns:
+        All string values joined by spaces
+    """
+    if isinstance(briefing, str):
+        return briefing
+    if isinstance(briefing, dict):
+        return " ".join(briefing_text(value) for value in briefing.values())
+    if isinstance(briefing, (list, tuple)):
+        return " ".join(briefing_text(value) for value in briefing)
+    return ""
+
+
+class KeywordIndex:
+    """
+    Per-user TF-IDF keyword index.
+
+    Each user's history is one document for IDF purposes, so terms most
+    users share ("meeting", "review") rank below the ones that set a user
+    apart. Term frequency is sublinear, so a title repeated daily does not
+    drown out everything else.
+
+    Documents are identified by the caller and indexed once, so the same
+    event or task can be offered on every request at no extra cost. A
+    user's top terms are re-ranked whenever one of their documents is
+    added, making queries a list lookup; rankings pick up IDF changes from
+    other users on the user's next update.
+
+    At most ``max_users`` users are kept, least recently used evicted
+    first. Counts cannot cheaply drop a single document, so a user whose
+    documents expire is forgotten whole, to be rebuilt by the caller.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 10,
+        max_terms_per_user: int = 500,
+        max_documents_per_user: int = 1000,
+        max_users: int = 10000
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            top_k: Terms kept ranked per user
+            max_terms_per_user: Vocabulary kept per user (rarest terms are
+                dropped first)
+            max_documents_per_user: Document ids remembered per user for
+                deduplication
+            max_users: Users kept before the least recently used is evicted
+        """
+        self.top_k = top_k
+        self.max_terms_per_user = max_terms_per_user
+        self.max_documents_per_user = max_documents_per_user
+        self.max_users = max_users
+        self._users: "OrderedDict[str, _UserTerms]" = OrderedDict()
+        # Number of users whose vocabulary holds each term
+        self._document_frequency: Dict[str, int] = {}
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._users
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def add(self, user_id: str, doc_id: str, text: str, created_at: Optional[datetime] = None) -> bool:
+        """
+        Index a document for a user.
+
+        Args:
+            user_id: User identifier
+            doc_id: Document identifier, unique per user
+            text: Document text
+            created_at: Document creation time (UTC), for expiry
+
+        Returns:
+            True if the document was new
+        """
+        return self.add_many(user_id, [(doc_id, text)], created_at) > 0
+
+    def add_many(
+        self,
+        user_id: str,
+        documents: Iterable[Tuple[str, str]],
+        created_at: Optional[datetime] = None
+    ) -> int:
+        """
+        Index several documents for a user, re-ranking once.
+
+        The user is registered even if no documents are given.
+
+        Args:
+            user_id: User identifier
+            documents: (doc_id, text) pairs
+            created_at: Creation time (UTC) of the oldest document, for expiry
+
+        Returns:
+            Number of new documents
+        """
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = _UserTerms()
+            while len(self._users) > self.max_users:
+                self.forget(next(iter(self._users)))
+        else:
+            self._users.move_to_end(user_id)
+
+        added = 0
+        for doc_id, text in documents:
+            if doc_id in user.seen:
+                user.seen.move_to_end(doc_id)
+                continue
+            user.seen[doc_id] = None
+            if len(user.seen) > self.max_documents_per_user:
+                user.seen.popitem(last=False)
+            added += 1
+
+            for term in keyword_tokens(text):
+                count = user.counts.get(term)
+                if count is None:
+                    self._document_frequency[term] = self._document_frequency.get(term, 0) + 1
+                    count = 0
+                user.counts[term] = count + 1
+
+        if added:
+            if created_at is not None and (user.oldest is None or created_at < user.oldest):
+                user.oldest = created_at
+            self._prune(user)
+            self._rank(user)
+        return added
+
+    def top_terms(self, user_id: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Get a user's highest-weighted terms.
+
+        Args:
+            user_id: User identifier
+            limit: Number of terms (at most ``top_k``, defaults to it)
+
+        Returns:
+            Terms, best first (empty for unknown users)
+        """
+        user = self._users.get(user_id)
+        if user is None:
+            return []
+        self._users.move_to_end(user_id)
+        return user.top[:self.top_k if limit is None else limit]
+
+    def forget(self, user_id: str) -> bool:
+        """
+        Drop a user's terms.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            True if the user was indexed
+        """
+        user = self._users.pop(user_id, None)
+        if user is None:
+            return False
+        for term in user.counts:
+            self._release(term)
+        return True
+
+    def users_older_than(self, cutoff: datetime) -> List[str]:
+        """
+        Find users holding a document created before a cutoff.
+
+        Args:
+            cutoff: Oldest creation time (UTC) to keep
+
+        Returns:
+            User IDs to forget
+        """
+        return [
+            user_id for user_id, user in self._users.items()
+            if user.oldest is not None and user.oldest < cutoff
+        ]
+
+    def _release(self, term: str) -> None:
+        """Remove one user's hold on a term's document frequency."""
+        remaining = self._document_frequency[term] - 1
+        if remaining:
+            self._document_frequency[term] = remaining
+        else:
+            del self._document_frequency[term]
+
+    def _prune(self, user: _UserTerms) -> None:
+        """Drop a user's rarest terms beyond the vocabulary cap."""
+        excess = len(user.counts) - self.max_terms_per_user
+        if excess <= 0:
+            return
+        for term in heapq.nsmallest(excess, user.counts, key=user.counts.__getitem__):
+            del user.counts[term]
+            self._release(term)
+
+    def _rank(self, user: _UserTerms) -> None:
+        """Recompute a user's top terms."""
+        total_users = len(self._users)
+        df = self._document_frequency
+
+        def weight(term: str) -> float:
+            tf = 1.0 + math.log(user.counts[term])
+            idf = math.log((1 + total_users) / (1 + df[term])) + 1.0
+            return tf * idf
+
+        user.top = heapq.nlargest(self.top_k, user.counts, key=weight)
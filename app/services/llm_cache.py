@@ -0,0 +1,302 @@
+"""
+LLM response cache.
+Caches agent LLM responses keyed on the normalized prompt, with an optional
+near-duplicate tier that matches similar prompts by SimHash.
+"""
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from langchain_core.messages import BaseMessage
+
+from app.core.config import settings
+from app.services.briefing_cache import LRUCache
+from app.utils.text_cleaner import clean_whitespace
+
+
+_WORD_RE = re.compile(r"\w+")
+
+# SimHash fingerprints are split into this many bands for candidate lookup.
+# Two fingerprints within (bands - 1) bits of each other share a band.
+_SIMHASH_BANDS = 8
+_SIMHASH_BAND_BITS = 64 // _SIMHASH_BANDS
+_SIMHASH_BAND_MASK = (1 << _SIMHASH_BAND_BITS) - 1
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Normalize a prompt so formatting-only differences share a cache entry.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Prompt with whitespace collapsed
+    """
+    return clean_whitespace(text)
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    Compute a 64-bit SimHash over word shingles.
+
+    Prompts that differ in a few words produce fingerprints that differ in
+    only a few bits.
+
+    Args:
+        text: Normalized prompt text
+        shingle_size: Words per shingle
+
+    Returns:
+        64-bit fingerprint
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [
+            " ".join(words[i:i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+
+    weights = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+class SimilarResponseIndex:
+    """
+    Bounded near-duplicate index from SimHash fingerprints to responses.
+
+    Entries are partitioned by namespace (system prompt, model and
+    temperature) so only prompts for the same agent and model can match.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, max_distance: int):
+        """
+        Initialize the index.
+
+        Args:
+            max_size: Maximum number of entries kept
+            ttl_seconds: Entry lifetime in seconds
+            max_distance: Maximum differing bits for a match
+                (at most ``_SIMHASH_BANDS - 1``)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = min(max_distance, _SIMHASH_BANDS - 1)
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, str]]" = OrderedDict()
+        self._bands: Dict[Tuple[str, int, int], Set[int]] = {}
+
+    def _band_keys(self, namespace: str, fingerprint: int) -> List[Tuple[str, int, int]]:
+        return [
+            (namespace, band, fingerprint >> (band * _SIMHASH_BAND_BITS) & _SIMHASH_BAND_MASK)
+            for band in range(_SIMHASH_BANDS)
+        ]
+
+    def get(self, namespace: str, fingerprint: int) -> Optional[str]:
+        """
+        Find the response of the closest stored prompt.
+
+        Args:
+            namespace: Agent/model namespace
+            fingerprint: SimHash of the prompt
+
+        Returns:
+            Cached response, or None if nothing is close enough
+        """
+        now = time.monotonic()
+        best = None
+        best_distance = self.max_distance + 1
+        for band_key in self._band_keys(namespace, fingerprint):
+            for candidate in self._bands.get(band_key, ()):
+                distance = (candidate ^ fingerprint).bit_count()
+                if distance < best_distance and self._entries[(namespace, candidate)][0] > now:
+                    best, best_distance = candidate, distance
+
+        if best is None:
+            return None
+
+        key = (namespace, best)
+        self._entries.move_to_end(key)
+        return self._entries[key][1]
+
+    def set(self, namespace: str, fingerprint: int, response: str) -> None:
+        """
+        Store a response, evicting the least recently used entry if full.
+
+        Args:
+            namespace: Agent/model namespace
+            fingerprint: SimHash of the prompt
+            response: Response text
+        """
+        key = (namespace, fingerprint)
+        if key not in self._entries:
+            for band_key in self._band_keys(namespace, fingerprint):
+                self._bands.setdefault(band_key, set()).add(fingerprint)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            (old_namespace, old_fingerprint), _ = self._entries.popitem(last=False)
+            for band_key in self._band_keys(old_namespace, old_fingerprint):
+                members = self._bands.get(band_key)
+                if members is not None:
+                    members.discard(old_fingerprint)
+                    if not members:
+                        del self._bands[band_key]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+        self._bands.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LLMResponseCache:
+    """
+    Agent LLM response cache with an exact tier and an optional
+    near-duplicate tier.
+
+    The exact tier is keyed on the normalized system and user prompts
+    together with the model and temperature. The near-duplicate tier is
+    consulted only for calls that opt in, since sharing a response is only
+    safe for agents whose output does not need to be user-specific.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        ttl_seconds: float = 3600,
+        similar_max_size: int = 0,
+        similar_max_distance: int = 6
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            max_size: Maximum entries in the exact tier
+            ttl_seconds: Entry lifetime in seconds for both tiers
+            similar_max_size: Maximum entries in the near-duplicate tier
+                (0, the default, disables it)
+            similar_max_distance: Maximum differing SimHash bits for a
+                near-duplicate match
+        """
+        self.exact = LRUCache(max_size, ttl_seconds)
+        self.similar = (
+            SimilarResponseIndex(similar_max_size, ttl_seconds, similar_max_distance)
+            if similar_max_size > 0 else None
+        )
+
+    @staticmethod
+    def _split(messages: List[BaseMessage]) -> Tuple[str, str]:
+        """Separate normalized system and conversation text."""
+        system = []
+        prompt = []
+        for message in messages:
+            target = system if message.type == "system" else prompt
+            target.append(normalize_prompt(str(message.content)))
+        return "\n".join(system), "\n".join(prompt)
+
+    def keys(
+        self,
+        messages: List[BaseMessage],
+        model: str,
+        temperature: float
+    ) -> Tuple[str, str, str]:
+        """
+        Compute the cache keys for a call.
+
+        Args:
+            messages: Chat messages
+            model: Model name
+            temperature: Sampling temperature
+
+        Returns:
+            Tuple of (exact key, namespace, normalized user prompt)
+        """
+        system, prompt = self._split(messages)
+        namespace = hashlib.sha256(
+            f"{model}\x00{temperature}\x00{system}".encode("utf-8")
+        ).hexdigest()
+        exact_key = hashlib.sha256(f"{namespace}\x00{prompt}".encode("utf-8")).hexdigest()
+        return exact_key, namespace, prompt
+
+    def get(
+        self,
+        messages: List[BaseMessage],
+        model: str,
+        temperature: float,
+        near_duplicates: bool = False
+    ) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            messages: Chat messages
+            model: Model name
+            temperature: Sampling temperature
+            near_duplicates: Whether a similar prompt's response may be used
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        exact_key, namespace, prompt = self.keys(messages, model, temperature)
+        response = self.exact.get(exact_key)
+        if response is not None or not near_duplicates or self.similar is None:
+            return response
+
+        return self.similar.get(namespace, simhash(prompt))
+
+    def set(
+        self,
+        messages: List[BaseMessage],
+        model: str,
+        temperature: float,
+        response: str
+    ) -> None:
+        """
+        Store a response in both tiers.
+
+        Args:
+            messages: Chat messages
+            model: Model name
+            temperature: Sampling temperature
+            response: Response text
+        """
+        exact_key, namespace, prompt = self.keys(messages, model, temperature)
+        self.exact.set(exact_key, response)
+        if self.similar is not None:
+            self.similar.set(namespace, simhash(prompt), response)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self.exact.clear()
+        if self.similar is not None:
+            self.similar.clear()
+
+
+def create_llm_response_cache() -> Optional[LLMResponseCache]:
+    """
+    Create the response cache from settings.
+
+    Returns:
+        Response cache, or None if disabled
+    """
+    if settings.llm_cache_size <= 0:
+        return None
+
+    return LLMResponseCache(
+        max_size=settings.llm_cache_size,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        similar_max_size=settings.llm_cache_similar_size,
+        similar_max_distance=settings.llm_cache_similar_max_distance
+    )
@@ -0,0 +1,538 @@
+"""
+Shared LLM gateway used by all agents.
+Wraps a chat model with response caching, rate limiting, bounded
+concurrency and retries.
+"""
+import asyncio
+import copy
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+
+from app.core.logger import logger
+from app.core.config import settings
+from app.services.llm_cache import LLMResponseCache, create_llm_response_cache
+from app.services.metrics import NodeTrace, current_trace
+
+
+# HTTP status codes worth retrying
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# Exception class names used by provider SDKs for transient failures
+_RETRYABLE_ERRORS = ("RateLimit", "Timeout", "APIConnection", "ServiceUnavailable", "Overloaded")
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """
+    Cheaply estimate the prompt size of a list of messages.
+
+    Uses the common ~4 characters per token heuristic; it only needs to be
+    close enough to pace requests against a tokens-per-minute limit.
+
+    Args:
+        messages: Chat messages
+
+    Returns:
+        Estimated token count
+    """
+    return sum(len(str(message.content)) for message in messages) // 4 + 4 * len(messages)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter refilled continuously at a per-minute rate.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate_per_minute: Units added per minute
+            capacity: Maximum burst size (defaults to one minute's worth)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """
+        Wait until ``amount`` units are available and take them.
+
+        Waiters are served in arrival order.
+
+        Args:
+            amount: Units to take (capped at capacity)
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+    def consume(self, amount: float) -> None:
+        """
+        Take units without waiting, allowing the bucket to go into debt.
+
+        Used to reconcile the difference between estimated and actual usage.
+
+        Args:
+            amount: Units to take
+        """
+        self._refill()
+        self._tokens -= amount
+
+
+class LLMGateway:
+    """
+    Shared entry point for all agent LLM calls.
+
+    Every call passes through a requests-per-minute bucket, a
+    tokens-per-minute bucket and a concurrency semaphore before reaching the
+    model. Transient failures (429s, timeouts, 5xx) are retried here with
+    full-jitter exponential backoff, so a rate-limit burst does not make
+    every agent retry independently. Provider SDK retries should be
+    disabled so they do not stack on top. Cached responses are served
+    before any of this, so they cost neither rate budget nor a slot.
+
+    Cache lookups, queue wait, token usage, cost and retries are recorded
+    on the trace of the graph node making the call (see
+    ``app.services.metrics``).
+
+    Inject any ``BaseChatModel`` for tests, e.g. langchain's
+    ``FakeListChatModel``.
+    """
+
+    def __init__(
+        self,
+        model: Optional[BaseChatModel],
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 90000,
+        max_concurrency: int = 16,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5,
+        http_client: Any = None,
+        cache: Optional[LLMResponseCache] = None,
+        model_name: str = "",
+        temperature: float = 0.0,
+        prompt_cost_per_1k: float = 0.0,
+        completion_cost_per_1k: float = 0.0
+    ):
+        """
+        Initialize the gateway.
+
+        Args:
+            model: Chat model to call (None disables LLM calls)
+            requests_per_minute: Request rate limit
+            tokens_per_minute: Prompt plus completion token rate limit
+            max_concurrency: Maximum calls in flight
+            max_retries: Retries after the first attempt for transient errors
+            retry_base_delay: Base delay in seconds for backoff
+            http_client: Shared HTTP client to close on shutdown
+            cache: Response cache (None disables caching)
+            model_name: Model name, part of the cache key
+            temperature: Sampling temperature, part of the cache key
+            prompt_cost_per_1k: US dollars per 1,000 prompt tokens
+            completion_cost_per_1k: US dollars per 1,000 completion tokens
+        """
+        self.model = model
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._request_bucket = TokenBucket(requests_per_minute)
+        self._token_bucket = TokenBucket(tokens_per_minute)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http_client = http_client
+        self.cache = cache
+        self.model_name = model_name
+        self.temperature = temperature
+        self.prompt_cost_per_1k = prompt_cost_per_1k
+        self.completion_cost_per_1k = completion_cost_per_1k
+
+    @property
+    def available(self) -> bool:
+        """Whether a model is configured."""
+        return self.model is not None
+
+    def with_temperature(self, temperature: float) -> "LLMGateway":
+        """
+        Get a view of this gateway that samples at another temperature.
+
+        The view shares the model, rate limits, concurrency slots and cache;
+        cached responses are keyed by the view's temperature.
+
+        Args:
+            temperature: Sampling temperature
+
+        Returns:
+            Gateway view
+        """
+        view = copy.copy(self)
+        view.temperature = temperature
+        if self.model is not None:
+            view.model = self.model.bind(temperature=temperature)
+        return view
+
+    async def ainvoke(
+        self,
+        messages: List[BaseMessage],
+        near_duplicates: bool = False,
+        **kwargs
+    ) -> BaseMessage:
+        """
+        Call the model with caching, rate limiting, bounded concurrency and retries.
+
+        Args:
+            messages: Chat messages
+            near_duplicates: Whether a cached response to a similar prompt
+                may be reused (only for output that need not be user-specific)
+            **kwargs: Extra arguments for the model call
+
+        Returns:
+            Model response message
+
+        Raises:
+            RuntimeError: If no model is configured
+        """
+        if self.model is None:
+            raise RuntimeError("No LLM configured")
+
+        trace = current_trace()
+        if self.cache is not None:
+            cached = self.cache.get(messages, self.model_name, self.temperature, near_duplicates)
+            trace.record_cache(cached is not None)
+            if cached is not None:
+                return AIMessage(content=cached)
+
+        estimated = estimate_tokens(messages)
+        attempt = 0
+        queue_wait = 0.0
+
+        while True:
+            queued = time.monotonic()
+            await self._request_bucket.acquire()
+            await self._token_bucket.acquire(estimated)
+
+            try:
+                async with self._semaphore:
+                    queue_wait += time.monotonic() - queued
+                    response = await self.model.ainvoke(messages, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                attempt += 1
+                trace.retries += 1
+                delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+                logger.warning(
+                    f"LLM call failed ({type(e).__name__}), "
+                    f"retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self._reconcile_usage(response, estimated, trace, queue_wait)
+            if self.cache is not None and isinstance(response.content, str):
+                self.cache.set(messages, self.model_name, self.temperature, response.content)
+            return response
+
+    async def astream(
+        self,
+        messages: List[BaseMessage],
+        near_duplicates: bool = False,
+        use_cache: bool = True,
+        **kwargs
+    ) -> AsyncIterator[BaseMessage]:
+        """
+        Stream the model response with caching, rate limiting and bounded concurrency.
+
+        Transient errors are retried only until the first chunk arrives;
+        after that the caller has seen output and the error is raised. A
+        cached response is yielded as a single chunk. Streamed responses
+        are not cached here: the caller stores one with ``cache_response``
+        once it has checked the output is usable.
+
+        Args:
+            messages: Chat messages
+            near_duplicates: Whether a cached response to a similar prompt
+                may be reused
+            use_cache: Whether a cached response may be served (False always
+                calls the model, e.g. to retry after a bad cached response)
+            **kwargs: Extra arguments for the model call
+
+        Yields:
+            Response message chunks
+
+        Raises:
+            RuntimeError: If no model is configured
+        """
+        if self.model is None:
+            raise RuntimeError("No LLM configured")
+
+        trace = current_trace()
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(messages, self.model_name, self.temperature, near_duplicates)
+            trace.record_cache(cached is not None)
+            if cached is not None:
+                yield AIMessage(content=cached)
+                return
+
+        estimated = estimate_tokens(messages)
+        attempt = 0
+        queue_wait = 0.0
+
+        while True:
+            queued = time.monotonic()
+            await self._request_bucket.acquire()
+            await self._token_bucket.acquire(estimated)
+
+            parts = []
+            usage = None
+            try:
+                async with self._semaphore:
+                    queue_wait += time.monotonic() - queued
+                    async for chunk in self.model.astream(messages, **kwargs):
+                        parts.append(str(chunk.content))
+                        # Providers report streamed usage on a single chunk
+                        usage = getattr(chunk, "usage_metadata", None) or usage
+                        yield chunk
+            except Exception as e:
+                if parts or attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                attempt += 1
+                trace.retries += 1
+                delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+                logger.warning(
+                    f"LLM stream failed ({type(e).__name__}), "
+                    f"retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            content = "".join(parts)
+            response = AIMessage(content=content, usage_metadata=usage) if usage else AIMessage(content=content)
+            self._reconcile_usage(response, estimated, trace, queue_wait)
+            return
+
+    def cache_response(self, messages: List[BaseMessage], content: str) -> None:
+        """
+        Store a validated response for a prompt.
+
+        Args:
+            messages: Chat messages the response answers
+            content: Full response text
+        """
+        if self.cache is not None:
+            self.cache.set(messages, self.model_name, self.temperature, content)
+
+    def _reconcile_usage(
+        self,
+        response: BaseMessage,
+        estimated: int,
+        trace: NodeTrace,
+        queue_wait: float
+    ) -> None:
+        """
+        Charge the token bucket for usage beyond the prompt estimate and
+        record the call on the node trace.
+
+        Args:
+            response: Model response
+            estimated: Tokens already taken for the prompt
+            trace: Trace of the calling node
+            queue_wait: Seconds spent waiting for rate limits and a slot
+        """
+        prompt_tokens, completion_tokens = self._usage(response, estimated)
+        actual = prompt_tokens + completion_tokens
+        if actual > estimated:
+            self._token_bucket.consume(actual - estimated)
+
+        cost = (
+            prompt_tokens * self.prompt_cost_per_1k
+            + completion_tokens * self.completion_cost_per_1k
+        ) / 1000
+        trace.record_call(queue_wait, prompt_tokens, completion_tokens, cost)
+
+    @staticmethod
+    def _usage(response: BaseMessage, estimated: int) -> Tuple[int, int]:
+        """
+        Get prompt and completion token counts, estimating any the provider
+        did not report.
+
+        Args:
+            response: Model response
+            estimated: Estimated prompt tokens
+
+        Returns:
+            Tuple of (prompt tokens, completion tokens)
+        """
+        usage = getattr(response, "usage_metadata", None)
+        if isinstance(usage, dict) and "input_tokens" in usage and "output_tokens" in usage:
+            return usage["input_tokens"], usage["output_tokens"]
+        return estimated, len(str(getattr(response, "content", ""))) // 4
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """
+        Decide whether an error is transient.
+
+        Args:
+            error: Exception raised by the model
+
+        Returns:
+            True if the call should be retried
+        """
+        if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+            return True
+
+        status = getattr(error, "status_code", None) or getattr(
+            getattr(error, "response", None), "status_code", None
+        )
+        if status in _RETRYABLE_STATUS:
+            return True
+
+        return any(name in type(error).__name__ for name in _RETRYABLE_ERRORS)
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client, if any."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+def build_chat_model(http_client: Any = None, model_name: Optional[str] = None) -> Optional[BaseChatModel]:
+    """
+    Initialize the language model configured in settings.
+
+    Provider SDK retries are disabled because the gateway retries. Only
+    the OpenAI model takes the shared HTTP client; ChatAnthropic manages
+    its own connection pool.
+
+    Args:
+        http_client: Shared async HTTP client (used by OpenAI only)
+        model_name: Model to use (defaults to ``llm_model``)
+
+    Returns:
+        Chat model instance, or None if the provider package is not installed
+    """
+    model_name = model_name or settings.llm_model
+    try:
+        if settings.llm_provider == "openai":
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(
+                model=model_name,
+                temperature=settings.llm_temperature,
+                max_retries=0,
+                timeout=settings.llm_timeout_seconds,
+                http_async_client=http_client
+            )
+        elif settings.llm_provider == "anthropic":
+            from langchain_anthropic import ChatAnthropic
+            return ChatAnthropic(
+                model=model_name,
+                temperature=settings.llm_temperature,
+                max_retries=0,
+                timeout=settings.llm_timeout_seconds
+            )
+    except ImportError as e:
+        logger.warning(f"LLM provider '{settings.llm_provider}' unavailable: {str(e)}")
+        return None
+
+    logger.warning(f"Unknown LLM provider: {settings.llm_provider}")
+    return None
+
+
+def create_llm_gateway(model: Optional[BaseChatModel] = None, tier: str = "large") -> LLMGateway:
+    """
+    Create a gateway from settings.
+
+    The ``large`` tier uses ``llm_model`` and the ``small`` tier
+    ``llm_small_model``, each with its own rate limits and prices. Without
+    a small model configured, the small tier is the large model at its
+    prices.
+
+    Args:
+        model: Chat model to use (built from settings if not provided)
+        tier: Model tier, ``large`` or ``small``
+
+    Returns:
+        LLM gateway
+    """
+    if tier == "small" and settings.llm_small_model:
+        model_name = settings.llm_small_model
+        prompt_cost = settings.llm_small_prompt_cost_per_1k
+        completion_cost = settings.llm_small_completion_cost_per_1k
+    else:
+        model_name = settings.llm_model
+        prompt_cost = settings.llm_prompt_cost_per_1k
+        completion_cost = settings.llm_completion_cost_per_1k
+
+    http_client = None
+    if model is None:
+        if settings.llm_provider == "openai":
+            import httpx
+
+            # One pooled client so connections are reused across all agents
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_concurrency,
+                    max_keepalive_connections=settings.llm_max_concurrency
+                ),
+                timeout=settings.llm_timeout_seconds
+            )
+        model = build_chat_model(http_client, model_name)
+
+    return LLMGateway(
+        model,
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        max_concurrency=settings.llm_max_concurrency,
+        max_retries=settings.llm_max_retries,
+        retry_base_delay=settings.llm_retry_base_delay,
+        http_client=http_client,
+        cache=create_llm_response_cache(),
+        model_name=model_name,
+        temperature=settings.llm_temperature,
+        prompt_cost_per_1k=prompt_cost,
+        completion_cost_per_1k=completion_cost
+    )
+
+
+# Shared gateways by tier (built lazily or at startup)
+_llm_gateways: Dict[str, LLMGateway] = {}
+
+
+def get_llm_gateway(tier: str = "large") -> LLMGateway:
+    """
+    Get the shared LLM gateway for a model tier, building it on first use.
+
+    Without a separate small model, both tiers share one gateway.
+
+    Args:
+        tier: Model tier, ``large`` or ``small``
+
+    Returns:
+        LLM gateway
+    """
+    if tier == "small" and not settings.llm_small_model:
+        tier = "large"
+    if tier not in _llm_gateways:
+        _llm_gateways[tier] = create_llm_gateway(tier=tier)
+    return _llm_gateways[tier]
+
+
+async def close_llm_gateways() -> None:
+    """Close the shared gateways' HTTP clients."""
+    for gateway in _llm_gateways.values():
+        await gateway.aclose()
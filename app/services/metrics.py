@@ -0,0 +1,223 @@
+"""
+Per-node tracing for the briefing graph.
+Records wall time, LLM queue wait, token usage, cost, cache hits and
+retries for each graph node run, and exports the totals as Prometheus
+metrics.
+"""
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+# Upper bounds of the node duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass(slots=True)
+class NodeTrace:
+    """Measurements for one graph node run."""
+    node: str
+    status: str = "ok"
+    wall_seconds: float = 0.0
+    queue_wait_seconds: float = 0.0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    retries: int = 0
+
+    def record_cache(self, hit: bool) -> None:
+        """Count an LLM response cache lookup."""
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    def record_call(
+        self,
+        queue_wait: float,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cost: float
+    ) -> None:
+        """Add a completed LLM call."""
+        self.llm_calls += 1
+        self.queue_wait_seconds += queue_wait
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost_usd += cost
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dict for the graph state."""
+        return asdict(self)
+
+
+_current_trace: ContextVar[Optional[NodeTrace]] = ContextVar("node_trace", default=None)
+
+
+def current_trace() -> NodeTrace:
+    """
+    Get the trace of the graph node currently running.
+
+    Outside a traced node a detached trace is returned, so callers can
+    record unconditionally; its measurements are discarded.
+
+    Returns:
+        Active node trace
+    """
+    trace = _current_trace.get()
+    return trace if trace is not None else NodeTrace(node="")
+
+
+@dataclass(slots=True)
+class _NodeStats:
+    """Running totals for one node."""
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * len(DURATION_BUCKETS))
+    duration_sum: float = 0.0
+    runs: Dict[str, int] = field(default_factory=dict)
+    queue_wait: float = 0.0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    retries: int = 0
+
+
+class MetricsRegistry:
+    """
+    Aggregates node traces and renders them in the Prometheus text format.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._nodes: Dict[str, _NodeStats] = {}
+
+    def record(self, trace: NodeTrace) -> None:
+        """
+        Add a finished node run to the totals.
+
+        Args:
+            trace: Node trace
+        """
+        stats = self._nodes.setdefault(trace.node, _NodeStats())
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if trace.wall_seconds <= bound:
+                stats.bucket_counts[i] += 1
+        stats.duration_sum += trace.wall_seconds
+        stats.runs[trace.status] = stats.runs.get(trace.status, 0) + 1
+        stats.queue_wait += trace.queue_wait_seconds
+        stats.llm_calls += trace.llm_calls
+        stats.prompt_tokens += trace.prompt_tokens
+        stats.completion_tokens += trace.completion_tokens
+        stats.cost_usd += trace.cost_usd
+        stats.cache_hits += trace.cache_hits
+        stats.cache_misses += trace.cache_misses
+        stats.retries += trace.retries
+
+    def reset(self) -> None:
+        """Clear all totals."""
+        self._nodes.clear()
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Metrics text
+        """
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str, samples: List[Tuple[str, Dict[str, str], float]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{name}{suffix}{{{label_text}}} {value:g}")
+
+        nodes = sorted(self._nodes.items())
+
+        duration = []
+        for node, stats in nodes:
+            for bound, count in zip(DURATION_BUCKETS, stats.bucket_counts):
+                duration.append(("_bucket", {"node": node, "le": f"{bound:g}"}, count))
+            total = sum(stats.runs.values())
+            duration.append(("_bucket", {"node": node, "le": "+Inf"}, total))
+            duration.append(("_sum", {"node": node}, stats.duration_sum))
+            duration.append(("_count", {"node": node}, total))
+        family("briefing_node_duration_seconds", "histogram", "Wall time of each graph node run.", duration)
+
+        family("briefing_node_runs_total", "counter", "Graph node runs by status.", [
+            ("", {"node": node, "status": status}, count)
+            for node, stats in nodes for status, count in sorted(stats.runs.items())
+        ])
+        family("briefing_node_queue_wait_seconds_total", "counter", "Time LLM calls waited for rate limits and concurrency slots.", [
+            ("", {"node": node}, stats.queue_wait) for node, stats in nodes
+        ])
+        family("briefing_node_llm_calls_total", "counter", "LLM calls that reached the model.", [
+            ("", {"node": node}, stats.llm_calls) for node, stats in nodes
+        ])
+        family("briefing_node_tokens_total", "counter", "LLM tokens used, by prompt or completion.", [
+            ("", {"node": node, "type": kind}, count)
+            for node, stats in nodes
+            for kind, count in (("prompt", stats.prompt_tokens), ("completion", stats.completion_tokens))
+        ])
+        family("briefing_node_cost_usd_total", "counter", "Estimated LLM spend in US dollars.", [
+            ("", {"node": node}, stats.cost_usd) for node, stats in nodes
+        ])
+        family("briefing_node_llm_cache_total", "counter", "LLM response cache lookups by result.", [
+            ("", {"node": node, "result": result}, count)
+            for node, stats in nodes
+            for result, count in (("hit", stats.cache_hits), ("miss", stats.cache_misses))
+        ])
+        family("briefing_node_llm_retries_total", "counter", "LLM calls retried after a transient error.", [
+            ("", {"node": node}, stats.retries) for node, stats in nodes
+        ])
+
+        return "\n".join(lines) + "\n"
+
+
+# Global registry instance
+metrics_registry = MetricsRegistry()
+
+
+def traced_node(
+    name: str,
+    node: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+) -> Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]:
+    """
+    Wrap a graph node so each run is traced.
+
+    The node's trace is added to its state update under ``node_metrics``
+    and recorded in the global registry. A run is counted as an error if
+    the node raises or reports ``errors``.
+
+    Args:
+        name: Graph node name
+        node: Node function
+
+    Returns:
+        Traced node function
+    """
+    async def run(state: Dict[str, Any]) -> Dict[str, Any]:
+        trace = NodeTrace(node=name)
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+        try:
+            update = await node(state)
+        except Exception:
+            trace.status = "error"
+            raise
+        finally:
+            trace.wall_seconds = time.perf_counter() - started
+            _current_trace.reset(token)
+            if trace.status == "ok" and update.get("errors"):
+                trace.status = "error"
+            metrics_registry.record(trace)
+        return {**update, "node_metrics": [trace.to_dict()]}
+
+    return run
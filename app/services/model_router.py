@@ -0,0 +1,156 @@
+"""
+Per-agent model routing.
+Sends each agent's LLM calls to a small or large model tier at the agent's
+own temperature, escalating small-tier agents to the large model on heavy
+days.
+"""
+from typing import Any, Dict, Optional, Union
+
+from app.core.config import settings
+from app.services.llm_gateway import LLMGateway, get_llm_gateway
+
+
+def is_heavy_day(state: Dict[str, Any], max_events: int, max_tasks: int) -> bool:
+    """
+    Decide whether a day is too complex for the small model.
+
+    Args:
+        state: Briefing state with event and task records
+        max_events: Most calendar events the small model handles
+        max_tasks: Most open tasks the small model handles
+
+    Returns:
+        True if either limit is exceeded
+    """
+    events = state.get("calendar_events") or []
+    open_tasks = sum(1 for task in state.get("tasks") or [] if not task.completed)
+    return len(events) > max_events or open_tasks > max_tasks
+
+
+class AgentLLM:
+    """
+    One agent's LLM: its default tier, escalated on heavy days.
+    """
+
+    def __init__(
+        self,
+        default: LLMGateway,
+        escalated: Optional[LLMGateway] = None,
+        heavy_day_events: int = 8,
+        heavy_day_tasks: int = 15
+    ):
+        """
+        Initialize the route.
+
+        Args:
+            default: Gateway for ordinary days
+            escalated: Gateway for heavy days (None never escalates)
+            heavy_day_events: Events above which a day is heavy
+            heavy_day_tasks: Open tasks above which a day is heavy
+        """
+        self.default = default
+        self.escalated = escalated
+        self.heavy_day_events = heavy_day_events
+        self.heavy_day_tasks = heavy_day_tasks
+
+    def select(self, state: Dict[str, Any]) -> LLMGateway:
+        """
+        Pick the gateway for a briefing.
+
+        Args:
+            state: Briefing state
+
+        Returns:
+            LLM gateway
+        """
+        if self.escalated is not None and is_heavy_day(state, self.heavy_day_events, self.heavy_day_tasks):
+            return self.escalated
+        return self.default
+
+
+def route_llm(llm: Union[LLMGateway, AgentLLM], state: Dict[str, Any]) -> LLMGateway:
+    """
+    Resolve an agent's LLM for a briefing.
+
+    Args:
+        llm: Agent route, or a gateway used as is
+        state: Briefing state
+
+    Returns:
+        LLM gateway
+    """
+    return llm.select(state) if isinstance(llm, AgentLLM) else llm
+
+
+class ModelRouter:
+    """
+    Builds each agent's route from tier gateways and per-agent settings.
+    """
+
+    def __init__(
+        self,
+        tiers: Dict[str, LLMGateway],
+        agent_tiers: Dict[str, str],
+        agent_temperatures: Dict[str, float],
+        heavy_day_events: int = 8,
+        heavy_day_tasks: int = 15
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            tiers: Gateways by tier name (must include ``large``)
+            agent_tiers: Tier for each agent (``large`` if not listed)
+            agent_temperatures: Temperature for each agent (the gateway's if not listed)
+            heavy_day_events: Events above which a day is heavy
+            heavy_day_tasks: Open tasks above which a day is heavy
+        """
+        self.tiers = tiers
+        self.agent_tiers = agent_tiers
+        self.agent_temperatures = agent_temperatures
+        self.heavy_day_events = heavy_day_events
+        self.heavy_day_tasks = heavy_day_tasks
+
+    def for_agent(self, agent: str) -> AgentLLM:
+        """
+        Get an agent's route.
+
+        Args:
+            agent: Agent (graph node) name
+
+        Returns:
+            Agent LLM route
+        """
+        temperature = self.agent_temperatures.get(agent)
+
+        def gateway(tier: str) -> LLMGateway:
+            base = self.tiers[tier]
+            return base if temperature is None else base.with_temperature(temperature)
+
+        tier = self.agent_tiers.get(agent, "large")
+        escalated = None
+        if self.tiers[tier] is not self.tiers["large"]:
+            escalated = gateway("large")
+
+        return AgentLLM(
+            gateway(tier),
+            escalated,
+            heavy_day_events=self.heavy_day_events,
+            heavy_day_tasks=self.heavy_day_tasks
+        )
+
+
+def create_model_router() -> ModelRouter:
+    """
+    Create a router over the shared gateways from settings.
+
+    Returns:
+        Model router
+    """
+    return ModelRouter(
+        tiers={"large": get_llm_gateway("large"), "small": get_llm_gateway("small")},
+        agent_tiers=settings.agent_model_tiers,
+        agent_temperatures=settings.agent_temperatures,
+        heavy_day_events=settings.routing_heavy_day_events,
+        heavy_day_tasks=settings.routing_heavy_day_tasks
+    )
@@ -0,0 +1,247 @@
+"""
+Briefing pre-generation scheduler.
+Generates each user's briefing shortly before their wake time so the
+morning request is served from the briefing cache.
+"""
+import asyncio
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.core.logger import logger
+from app.core.config import settings
+from app.schemas.dashboard import BriefingRequest
+from app.services.briefing_service import run_briefing_batch
+from app.services.user_memory import user_memory
+from app.utils.time_engine import local_date, localize
+from app.utils.time_helpers import parse_time_string
+
+
+class BriefingScheduler:
+    """
+    Background scheduler that pre-generates briefings ahead of wake time.
+
+    Users are bucketed by (timezone, wake_time). Every user in a bucket
+    shares a target instant, so rather than all firing at once their runs
+    are spread evenly over ``spread_minutes``, starting ``lead_minutes``
+    before wake time. Due runs are drained through the batch API.
+    """
+
+    def __init__(
+        self,
+        lead_minutes: int = 30,
+        spread_minutes: int = 20,
+        tick_seconds: float = 30,
+        refresh_seconds: float = 3600
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            lead_minutes: How long before wake time the spread window opens
+            spread_minutes: Width of the window a bucket's runs are spread over
+            tick_seconds: How often due runs are checked
+            refresh_seconds: How often new users are picked up
+        """
+        self.lead_minutes = lead_minutes
+        self.spread_minutes = min(spread_minutes, lead_minutes)
+        self.tick_seconds = tick_seconds
+        self.refresh_seconds = refresh_seconds
+
+        self._queue: List[Tuple[float, str]] = []
+        self._scheduled: Dict[str, Tuple[str, str]] = {}
+        self._in_flight = 0
+        self._task: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+        self._last_refresh = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of scheduled runs waiting to become due."""
+        return len(self._queue)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of briefings currently being generated."""
+        return self._in_flight
+
+    def next_wake_time(
+        self,
+        timezone: str,
+        wake_time: str,
+        now: datetime
+    ) -> datetime:
+        """
+        Get the next wake time that is still far enough ahead to pre-generate.
+
+        Args:
+            timezone: User timezone string
+            wake_time: Wake time (HH:MM)
+            now: Current aware datetime
+
+        Returns:
+            Aware datetime of the next wake time
+        """
+        wake = parse_time_string(wake_time)
+        today = local_date(timezone, now)
+
+        # Wake time is wall-clock time, so it is localized on each day rather
+        # than added to midnight, which would drift by an hour across DST
+        for days_ahead in (0, 1):
+            target = localize(timezone, datetime.combine(today + timedelta(days=days_ahead), wake))
+            if target - timedelta(minutes=self.lead_minutes) > now:
+                return target
+
+        return localize(timezone, datetime.combine(today + timedelta(days=2), wake))
+
+    def schedule_bucket(
+        self,
+        timezone: str,
+        wake_time: str,
+        user_ids: List[str],
+        now: datetime
+    ) -> None:
+        """
+        Schedule runs for all users sharing a timezone and wake time.
+
+        Args:
+            timezone: Bucket timezone
+            wake_time: Bucket wake time (HH:MM)
+            user_ids: Users in the bucket
+            now: Current aware datetime
+        """
+        target = self.next_wake_time(timezone, wake_time, now)
+        window_start = (target - timedelta(minutes=self.lead_minutes)).timestamp()
+        step = self.spread_minutes * 60 / max(len(user_ids), 1)
+
+        for i, user_id in enumerate(sorted(user_ids)):
+            heapq.heappush(self._queue, (window_start + i * step, user_id))
+            self._scheduled[user_id] = (timezone, wake_time)
+
+    async def refresh(self, now: Optional[datetime] = None) -> None:
+        """
+        Bucket users that are not yet scheduled and add them to the queue.
+
+        Args:
+            now: Current aware datetime (defaults to now)
+        """
+        now = now or datetime.now(pytz.UTC)
+        buckets: Dict[Tuple[str, str], List[str]] = {}
+
+        for user_id in await user_memory.list_user_ids():
+            if user_id in self._scheduled:
+                continue
+
+            profile = await user_memory.get_user_profile(user_id)
+            preferences = profile.get("preferences", {})
+            timezone = preferences.get("timezone") or profile.get("timezone", "UTC")
+            wake_time = preferences.get("wake_time", "07:00")
+
+            if timezone not in pytz.all_timezones_set:
+                logger.warning(f"Unknown timezone '{timezone}' for user {user_id}, using UTC")
+                timezone = "UTC"
+
+            buckets.setdefault((timezone, wake_time), []).append(user_id)
+
+        for (timezone, wake_time), user_ids in buckets.items():
+            self.schedule_bucket(timezone, wake_time, user_ids, now)
+
+        if buckets:
+            logger.info(f"Scheduled pre-generation for {sum(map(len, buckets.values()))} users")
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Remove and return users whose run time has arrived.
+
+        Args:
+            now: Current aware datetime (defaults to now)
+
+        Returns:
+            User IDs due for pre-generation
+        """
+        now_ts = (now or datetime.now(pytz.UTC)).timestamp()
+        due = []
+        while self._queue and self._queue[0][0] <= now_ts:
+            _, user_id = heapq.heappop(self._queue)
+            due.append(user_id)
+        return due
+
+    async def _generate(self, user_ids: List[str]) -> None:
+        """
+        Pre-generate briefings for due users.
+
+        Users are released from the schedule afterwards, so the next refresh
+        books their following run with up-to-date preferences.
+
+        Args:
+            user_ids: Users to generate briefings for
+        """
+        # Keep the briefing cached until past the user's wake time
+        ttl = (self.lead_minutes * 60) + settings.briefing_cache_ttl_seconds
+        requests = [BriefingRequest(user_id=user_id) for user_id in user_ids]
+        remaining = len(requests)
+        self._in_flight += remaining
+
+        try:
+            async for result in run_briefing_batch(requests, cache_ttl_seconds=ttl):
+                remaining -= 1
+                self._in_flight -= 1
+                if result.status != "success":
+                    logger.warning(f"Pre-generation failed for user {result.user_id}: {result.error}")
+        except Exception as e:
+            logger.error(f"Error in pre-generation batch: {str(e)}")
+        finally:
+            self._in_flight -= remaining
+            for user_id in user_ids:
+                self._scheduled.pop(user_id, None)
+
+    async def _run(self) -> None:
+        """Main scheduler loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if loop.time() - self._last_refresh >= self.refresh_seconds:
+                    await self.refresh()
+                    self._last_refresh = loop.time()
+
+                due = self.pop_due()
+                if due:
+                    logger.info(f"Pre-generating briefings for {len(due)} users")
+                    task = asyncio.create_task(self._generate(due))
+                    self._batches.add(task)
+                    task.add_done_callback(self._batches.discard)
+
+            except Exception as e:
+                logger.error(f"Error in pre-generation scheduler: {str(e)}")
+
+            await asyncio.sleep(self.tick_seconds)
+
+    def start(self) -> None:
+        """Start the scheduler loop in the background."""
+        if self._task is None:
+            self._last_refresh = float("-inf")
+            self._task = asyncio.create_task(self._run())
+            logger.info("Briefing pre-generation scheduler started")
+
+    async def stop(self) -> None:
+        """Stop the scheduler loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+            for task in list(self._batches):
+                task.cancel()
+            logger.info("Briefing pre-generation scheduler stopped")
+
+
+# Global scheduler instance
+briefing_scheduler = BriefingScheduler(
+    lead_minutes=settings.pregeneration_lead_minutes,
+    spread_minutes=settings.pregeneration_spread_minutes
+)
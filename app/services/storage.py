@@ -0,0 +1,392 @@
+"""
+Storage backends for user memory.
+Provides a common async interface over in-process and SQLite storage.
+"""
+import asyncio
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
+from typing import Dict, Any, Deque, List, Optional, Tuple
+from datetime import datetime
+
+from app.core.logger import logger
+
+
+class StorageBackend(ABC):
+    """
+    Interface for persisting user profiles and briefing history.
+    """
+
+    name = "base"
+
+    async def open(self) -> None:
+        """Open connections and prepare the schema."""
+
+    async def close(self) -> None:
+        """Release all connections."""
+
+    @abstractmethod
+    async def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored user profile.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            Profile data, or None if the user has no stored profile
+        """
+
+    @abstractmethod
+    async def save_profile(self, user_id: str, profile: Dict[str, Any]) -> None:
+        """
+        Create or replace a user profile.
+
+        Args:
+            user_id: User identifier
+            profile: Profile data
+        """
+
+    @abstractmethod
+    async def list_user_ids(self) -> List[str]:
+        """
+        List all users with a stored profile or history.
+
+        Returns:
+            List of user IDs
+        """
+
+    @abstractmethod
+    async def add_briefing(
+        self,
+        user_id: str,
+        briefing: Dict[str, Any],
+        created_at: datetime
+    ) -> None:
+        """
+        Append a briefing to a user's history.
+
+        Args:
+            user_id: User identifier
+            briefing: Briefing data
+            created_at: Creation time (UTC)
+        """
+
+    @abstractmethod
+    async def get_briefings(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get a user's most recent briefings, oldest first.
+
+        Args:
+            user_id: User identifier
+            limit: Maximum number of briefings
+
+        Returns:
+            List of ``{"briefing": ..., "created_at": ...}`` entries
+        """
+
+    @abstractmethod
+    async def prune_briefings(self, cutoff: datetime) -> int:
+        """
+        Delete briefings created before a cutoff.
+
+        Args:
+            cutoff: Oldest creation time (UTC) to keep
+
+        Returns:
+            Number of briefings deleted
+        """
+
+
+class InMemoryStorage(StorageBackend):
+    """
+    Process-local storage. History is lost on restart and not shared
+    between workers; use it for development and tests.
+
+    Each user's history is a fixed-capacity ring buffer (``deque`` with
+    ``maxlen``), so appends are O(1) and the oldest entry is dropped once a
+    user reaches ``max_history``. Entries are in creation order, which lets
+    age-based pruning stop at the first entry that is still fresh.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_history: int = 50):
+        """
+        Initialize in-memory storage.
+
+        Args:
+            max_history: Maximum briefings retained per user
+        """
+        self.max_history = max_history
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._history: Dict[str, Deque[Tuple[datetime, Dict[str, Any]]]] = {}
+
+    async def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._profiles.get(user_id)
+
+    async def save_profile(self, user_id: str, profile: Dict[str, Any]) -> None:
+        self._profiles[user_id] = profile
+
+    async def list_user_ids(self) -> List[str]:
+        return list(dict.fromkeys([*self._profiles, *self._history]))
+
+    async def add_briefing(
+        self,
+        user_id: str,
+        briefing: Dict[str, Any],
+        created_at: datetime
+    ) -> None:
+        history = self._history.get(user_id)
+        if history is None:
+            history = self._history[user_id] = deque(maxlen=self.max_history)
+
+        history.append((created_at, {
+            "briefing": briefing,
+            "created_at": created_at.isoformat()
+        }))
+
+    async def get_briefings(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        history = self._history.get(user_id)
+        if not history or limit <= 0:
+            return []
+
+        # Walk back from the newest entry so the cost is O(limit)
+        recent = [entry for _, entry in islice(reversed(history), limit)]
+        recent.reverse()
+        return recent
+
+    async def prune_briefings(self, cutoff: datetime) -> int:
+        removed = 0
+        for user_id in list(self._history):
+            history = self._history[user_id]
+            while history and history[0][0] < cutoff:
+                history.popleft()
+                removed += 1
+            if not history:
+                del self._history[user_id]
+        return removed
+
+
+# SQL statements are module constants so sqlite3's per-connection statement
+# cache reuses the prepared statement on every call.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS briefings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    briefing TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_briefings_user_created
+    ON briefings (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_briefings_created
+    ON briefings (created_at);
+"""
+
+_SELECT_PROFILE = "SELECT profile FROM users WHERE user_id = ?"
+
+_UPSERT_PROFILE = (
+    "INSERT INTO users (user_id, profile, updated_at) VALUES (?, ?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET profile = excluded.profile, updated_at = excluded.updated_at"
+)
+
+_SELECT_USER_IDS = "SELECT user_id FROM users UNION SELECT DISTINCT user_id FROM briefings"
+
+_INSERT_BRIEFING = "INSERT INTO briefings (user_id, briefing, created_at) VALUES (?, ?, ?)"
+
+_TRIM_BRIEFINGS = (
+    "DELETE FROM briefings WHERE user_id = ? AND id NOT IN ("
+    "SELECT id FROM briefings WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?)"
+)
+
+_PRUNE_BRIEFINGS = "DELETE FROM briefings WHERE created_at < ?"
+
+_SELECT_BRIEFINGS = (
+    "SELECT briefing, created_at FROM briefings WHERE user_id = ? "
+    "ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite storage with a fixed pool of connections.
+
+    sqlite3 is blocking, so each query borrows a pooled connection and runs
+    on a worker thread. WAL mode lets readers proceed while a write is in
+    progress, which matters once several workers share one database file.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, pool_size: int = 5, max_history: int = 50):
+        """
+        Initialize SQLite storage.
+
+        Args:
+            path: Database file path, or ":memory:" for a shared in-memory database
+            pool_size: Number of pooled connections
+            max_history: Maximum briefings retained per user
+        """
+        self.path = path
+        self.pool_size = pool_size
+        self.max_history = max_history
+        self._pool: Optional[asyncio.Queue] = None
+        self._connections: List[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open and configure a single connection.
+
+        Returns:
+            SQLite connection
+        """
+        if self.path == ":memory:":
+            # Named shared-cache database so every pooled connection sees it
+            conn = sqlite3.connect(
+                f"file:daily_briefings_{id(self)}?mode=memory&cache=shared",
+                uri=True,
+                check_same_thread=False,
+                cached_statements=64
+            )
+        else:
+            conn = sqlite3.connect(
+                self.path,
+                check_same_thread=False,
+                cached_statements=64,
+                timeout=5.0
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    async def open(self) -> None:
+        if self._pool is not None:
+            return
+
+        self._pool = asyncio.Queue()
+        for _ in range(self.pool_size):
+            conn = await asyncio.to_thread(self._connect)
+            self._connections.append(conn)
+            self._pool.put_nowait(conn)
+
+        await self._run(lambda conn: conn.executescript(_SCHEMA))
+        logger.info(f"Opened SQLite storage at {self.path} with {self.pool_size} connections")
+
+    async def close(self) -> None:
+        if self._pool is None:
+            return
+
+        for conn in self._connections:
+            await asyncio.to_thread(conn.close)
+        self._connections.clear()
+        self._pool = None
+        logger.info("Closed SQLite storage")
+
+    async def _run(self, fn, *args):
+        """
+        Run a blocking function with a pooled connection on a worker thread.
+
+        Args:
+            fn: Callable taking a connection followed by ``args``
+            *args: Extra arguments for ``fn``
+
+        Returns:
+            Whatever ``fn`` returns
+        """
+        if self._pool is None:
+            await self.open()
+
+        conn = await self._pool.get()
+        try:
+            return await asyncio.to_thread(fn, conn, *args)
+        finally:
+            self._pool.put_nowait(conn)
+
+    async def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        def query(conn):
+            return conn.execute(_SELECT_PROFILE, (user_id,)).fetchone()
+
+        row = await self._run(query)
+        return json.loads(row[0]) if row else None
+
+    async def save_profile(self, user_id: str, profile: Dict[str, Any]) -> None:
+        payload = json.dumps(profile, default=str)
+        updated_at = datetime.utcnow().isoformat()
+
+        def query(conn):
+            with conn:
+                conn.execute(_UPSERT_PROFILE, (user_id, payload, updated_at))
+
+        await self._run(query)
+
+    async def list_user_ids(self) -> List[str]:
+        def query(conn):
+            return conn.execute(_SELECT_USER_IDS).fetchall()
+
+        return [row[0] for row in await self._run(query)]
+
+    async def add_briefing(
+        self,
+        user_id: str,
+        briefing: Dict[str, Any],
+        created_at: datetime
+    ) -> None:
+        payload = json.dumps(briefing, default=str)
+
+        def query(conn):
+            with conn:
+                conn.execute(_INSERT_BRIEFING, (user_id, payload, created_at.isoformat()))
+                conn.execute(_TRIM_BRIEFINGS, (user_id, user_id, self.max_history))
+
+        await self._run(query)
+
+    async def get_briefings(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        def query(conn):
+            return conn.execute(_SELECT_BRIEFINGS, (user_id, limit)).fetchall()
+
+        rows = await self._run(query)
+        return [
+            {"briefing": json.loads(briefing), "created_at": created_at}
+            for briefing, created_at in reversed(rows)
+        ]
+
+    async def prune_briefings(self, cutoff: datetime) -> int:
+        def query(conn):
+            with conn:
+                return conn.execute(_PRUNE_BRIEFINGS, (cutoff.isoformat(),)).rowcount
+
+        return await self._run(query)
+
+
+def create_storage_backend(
+    database_url: Optional[str],
+    pool_size: int = 5,
+    max_history: int = 50
+) -> StorageBackend:
+    """
+    Select a storage backend from a database URL.
+
+    Args:
+        database_url: ``sqlite:///path/to.db``, ``sqlite:///:memory:``, or None
+        pool_size: Connection pool size for pooled backends
+        max_history: Maximum briefings retained per user
+
+    Returns:
+        Storage backend (in-memory if the URL is unset or unsupported)
+    """
+    if not database_url:
+        return InMemoryStorage(max_history=max_history)
+
+    if database_url.startswith("sqlite://"):
+        path = database_url[len("sqlite:///"):] if database_url.startswith("sqlite:///") else ""
+        return SQLiteStorage(path or ":memory:", pool_size=pool_size, max_history=max_history)
+
+    logger.warning(f"Unsupported database URL scheme, falling back to in-memory storage: {database_url.split(':', 1)[0]}")
+    return InMemoryStorage(max_history=max_history)
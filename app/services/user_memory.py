@@ -2,28 +2,89 @@
 User memory and preference management.
 Stores and retrieves user context, preferences, and historical data.
 """
-from typing import Dict, Any, List, Optional
+import asyncio
+from typing import Dict, Any, Iterable, List, Optional
 from datetime import datetime, timedelta
 
 from app.core.logger import logger
 from app.core.config import settings
+from app.services.keyword_index import KeywordIndex, briefing_text
+from app.services.storage import StorageBackend, create_storage_backend
+from app.utils.timestamps import parse_iso
 
 
 class UserMemory:
     """
     Manages user-specific memory including preferences, goals, and history.
     Can be backed by a database, cache, or file storage.
+
+    A keyword index summarizes each user's history as its top terms. It
+    lives in process, is fed as briefings are saved and context is loaded,
+    and is backfilled from stored history the first time a user is queried.
+    The history sweeper forgets users whose indexed documents have expired,
+    so they are rebuilt from the remaining history.
     """
 
-    def __init__(self):
+    def __init__(self, backend: Optional[StorageBackend] = None):
         """
         Initialize user memory service.
+
+        Args:
+            backend: Storage backend (selected from settings.database_url if not provided)
+        """
+        self.db = backend or self._init_database()
+        self._sweeper: Optional[asyncio.Task] = None
+        self.keywords = KeywordIndex(
+            top_k=settings.keyword_top_terms,
+            max_terms_per_user=settings.keyword_max_terms_per_user,
+            max_users=settings.keyword_max_users
+        )
+
+    async def connect(self) -> None:
+        """
+        Open the storage backend and start the history sweeper.
+        """
+        await self.db.open()
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def close(self) -> None:
+        """
+        Stop the history sweeper and close the storage backend.
         """
-        # TODO: Initialize database connection or storage backend
-        # self.db = self._init_database()
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
 
-        # In-memory storage for now (replace with persistent storage)
-        self._memory_store: Dict[str, Dict[str, Any]] = {}
+        await self.db.close()
+
+    async def sweep_history(self) -> int:
+        """
+        Delete briefing history older than ``settings.memory_ttl_hours``.
+
+        Returns:
+            Number of briefings deleted
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=settings.memory_ttl_hours)
+        removed = await self.db.prune_briefings(cutoff)
+        if removed:
+            logger.info(f"Swept {removed} expired briefings from history")
+        for user_id in self.keywords.users_older_than(cutoff):
+            self.forget_keywords(user_id)
+        return removed
+
+    async def _sweep_loop(self) -> None:
+        """Periodically sweep expired briefing history."""
+        while True:
+            await asyncio.sleep(settings.history_sweep_interval_seconds)
+            try:
+                await self.sweep_history()
+            except Exception as e:
+                logger.error(f"Error sweeping briefing history: {str(e)}")
 
     async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
         """
@@ -38,11 +99,12 @@ class UserMemory:
         try:
             logger.info(f"Fetching profile for user: {user_id}")
 
-            # TODO: Fetch from database
-            # profile = await self.db.users.find_one({"user_id": user_id})
+            profile = await self.db.get_profile(user_id)
+            if profile is not None:
+                return profile
 
-            # Placeholder data
-            profile = self._memory_store.get(user_id, {
+            # Placeholder defaults for users without a stored profile
+            return {
                 "user_id": user_id,
                 "preferences": {
                     "wake_time": "07:00",
@@ -57,14 +119,26 @@ class UserMemory:
                     "Read 30 minutes daily"
                 ],
                 "timezone": "UTC"
-            })
-
-            return profile
+            }
 
         except Exception as e:
             logger.error(f"Error fetching user profile: {str(e)}")
             return {}
 
+    async def list_user_ids(self) -> List[str]:
+        """
+        List all known user identifiers.
+
+        Returns:
+            List of user IDs
+        """
+        try:
+            return await self.db.list_user_ids()
+
+        except Exception as e:
+            logger.error(f"Error listing users: {str(e)}")
+            return []
+
     async def get_user_tasks(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Retrieve user's task list.
@@ -81,27 +155,28 @@ class UserMemory:
             # TODO: Fetch from task management system or database
             # tasks = await self.db.tasks.find({"user_id": user_id, "completed": False})
 
-            # Placeholder data
+            # Placeholder data (due dates pinned to end of day so they are stable)
+            due_today = datetime.now().replace(hour=17, minute=0, second=0, microsecond=0)
             tasks = [
                 {
                     "id": "task1",
                     "title": "Review pull requests",
                     "priority": "high",
-                    "due_date": datetime.now().isoformat(),
+                    "due_date": due_today.isoformat(),
                     "estimated_duration": 30  # minutes
                 },
                 {
                     "id": "task2",
                     "title": "Update documentation",
                     "priority": "medium",
-                    "due_date": (datetime.now() + timedelta(days=1)).isoformat(),
+                    "due_date": (due_today + timedelta(days=1)).isoformat(),
                     "estimated_duration": 60
                 },
                 {
                     "id": "task3",
                     "title": "Respond to client emails",
                     "priority": "high",
-                    "due_date": datetime.now().isoformat(),
+                    "due_date": due_today.isoformat(),
                     "estimated_duration": 20
                 }
             ]
@@ -130,24 +205,13 @@ class UserMemory:
         try:
             logger.info(f"Saving briefing for user: {user_id}")
 
-            # TODO: Save to database
-            # await self.db.briefings.insert_one({
-            #     "user_id": user_id,
-            #     "briefing": briefing,
-            #     "created_at": datetime.utcnow()
-            # })
-
-            # Placeholder: store in memory
-            if user_id not in self._memory_store:
-                self._memory_store[user_id] = {"briefing_history": []}
-
-            if "briefing_history" not in self._memory_store[user_id]:
-                self._memory_store[user_id]["briefing_history"] = []
-
-            self._memory_store[user_id]["briefing_history"].append({
-                "briefing": briefing,
-                "created_at": datetime.utcnow().isoformat()
-            })
+            created_at = datetime.utcnow()
+            await self.db.add_briefing(user_id, briefing, created_at)
+            # Users not yet indexed pick this up from history when backfilled
+            if user_id in self.keywords:
+                self.keywords.add(
+                    user_id, f"briefing:{created_at.isoformat()}", briefing_text(briefing), created_at
+                )
 
             return True
 
@@ -173,20 +237,80 @@ class UserMemory:
         try:
             logger.info(f"Fetching briefing history for user: {user_id}")
 
-            # TODO: Fetch from database
-            # briefings = await self.db.briefings.find(
-            #     {"user_id": user_id}
-            # ).sort("created_at", -1).limit(limit)
-
-            # Placeholder
-            user_data = self._memory_store.get(user_id, {})
-            history = user_data.get("briefing_history", [])
-            return history[-limit:]
+            return await self.db.get_briefings(user_id, limit)
 
         except Exception as e:
             logger.error(f"Error fetching briefing history: {str(e)}")
             return []
 
+    def index_context(
+        self,
+        user_id: str,
+        events: Iterable[Dict[str, Any]],
+        tasks: Iterable[Dict[str, Any]]
+    ) -> int:
+        """
+        Add event and task titles to the user's keyword index.
+
+        Items already indexed are skipped, so the same day's context can be
+        passed on every request. Users are only indexed once backfilled by
+        ``get_top_keywords``.
+
+        Args:
+            user_id: User identifier
+            events: Calendar event dicts
+            tasks: Task dicts
+
+        Returns:
+            Number of newly indexed items
+        """
+        documents = [
+            (f"{kind}:{item.get('id') or item.get('title', '')}", item.get("title", ""))
+            for kind, items in (("event", events), ("task", tasks))
+            for item in items
+        ]
+        if user_id not in self.keywords:
+            return 0
+        return self.keywords.add_many(user_id, documents, datetime.utcnow())
+
+    async def get_top_keywords(self, user_id: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Get the terms that best characterize a user's history.
+
+        Args:
+            user_id: User identifier
+            limit: Number of terms (defaults to ``settings.keyword_top_terms``)
+
+        Returns:
+            Terms, most characteristic first
+        """
+        try:
+            if user_id not in self.keywords:
+                history = await self.db.get_briefings(user_id, settings.history_max_entries)
+                self.keywords.add_many(
+                    user_id,
+                    [
+                        (f"briefing:{entry['created_at']}", briefing_text(entry["briefing"]))
+                        for entry in history
+                    ],
+                    parse_iso(history[0]["created_at"]) if history else None
+                )
+
+            return self.keywords.top_terms(user_id, limit)
+
+        except Exception as e:
+            logger.error(f"Error fetching keywords: {str(e)}")
+            return []
+
+    def forget_keywords(self, user_id: str) -> None:
+        """
+        Drop a user's keywords, to be rebuilt from history on next query.
+
+        Args:
+            user_id: User identifier
+        """
+        self.keywords.forget(user_id)
+
     async def update_preferences(
         self,
         user_id: str,
@@ -205,39 +329,29 @@ class UserMemory:
         try:
             logger.info(f"Updating preferences for user: {user_id}")
 
-            # TODO: Update in database
-            # await self.db.users.update_one(
-            #     {"user_id": user_id},
-            #     {"$set": {"preferences": preferences}}
-            # )
+            profile = await self.get_user_profile(user_id)
+            profile.setdefault("user_id", user_id)
+            profile["preferences"] = {**profile.get("preferences", {}), **preferences}
+            await self.db.save_profile(user_id, profile)
 
-            # Placeholder
-            if user_id not in self._memory_store:
-                self._memory_store[user_id] = {}
-
-            if "preferences" not in self._memory_store[user_id]:
-                self._memory_store[user_id]["preferences"] = {}
-
-            self._memory_store[user_id]["preferences"].update(preferences)
             return True
 
         except Exception as e:
             logger.error(f"Error updating preferences: {str(e)}")
             return False
 
-    def _init_database(self):
+    def _init_database(self) -> StorageBackend:
         """
-        Initialize database connection.
+        Initialize the storage backend from settings.
 
         Returns:
-            Database client
-        """
-        # TODO: Implement database initialization
-        # Example with MongoDB:
-        # from motor.motor_asyncio import AsyncIOMotorClient
-        # client = AsyncIOMotorClient(settings.database_url)
-        # return client.daily_briefings
-        pass
+            Storage backend
+        """
+        return create_storage_backend(
+            settings.database_url,
+            settings.database_pool_size,
+            settings.history_max_entries
+        )
 
 
 # Global user memory instance
@@ -0,0 +1,222 @@
+"""
+Break and hydration schedule computation.
+Places a day's breaks and hydration reminders around each user's meetings,
+vectorized with NumPy across users for batch runs.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.schemas.records import EventRecord
+from app.services.free_busy import FreeBusyIndex
+from app.utils.time_helpers import parse_time_string
+from app.utils.timestamps import to_wall_seconds
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+# Whether batch schedules are vectorized (install the ``batch`` extra)
+VECTORIZED = np is not None
+
+
+MINUTES_PER_DAY = 24 * 60
+
+# Length of a suggested break, in minutes
+BREAK_MINUTES = 5
+
+# Minutes between hydration reminders
+HYDRATION_INTERVAL = 120
+
+# Below this many users the pure-Python path is faster than building arrays
+_VECTORIZE_MIN_USERS = 32
+
+
+@dataclass(slots=True)
+class WellnessInputs:
+    """One user's day, in minutes since midnight."""
+    work_start: int
+    work_end: int
+    break_frequency: int
+    busy: List[Tuple[int, int]] = field(default_factory=list)
+
+    @classmethod
+    def from_context(
+        cls,
+        calendar_events: List[EventRecord],
+        preferences: Dict[str, Any]
+    ) -> "WellnessInputs":
+        """
+        Build inputs from loaded briefing context.
+
+        Busy time is taken on the day of the first event, rounded out to
+        whole minutes.
+
+        Args:
+            calendar_events: Calendar event records
+            preferences: User preferences with ``work_hours`` and ``break_frequency``
+
+        Returns:
+            Wellness inputs
+        """
+        work_hours = preferences.get("work_hours") or {}
+        work_start = parse_time_string(work_hours.get("start", "09:00"))
+        work_end = parse_time_string(work_hours.get("end", "17:00"))
+
+        busy = []
+        if calendar_events:
+            midnight = to_wall_seconds(calendar_events[0].start) // 86400 * 86400
+            for event in calendar_events:
+                start = (to_wall_seconds(event.start) - midnight) // 60
+                end = -(-(to_wall_seconds(event.end) - midnight) // 60)
+                start, end = max(start, 0), min(end, MINUTES_PER_DAY)
+                if start < end:
+                    busy.append((start, end))
+
+        return cls(
+            work_start=work_start.hour * 60 + work_start.minute,
+            work_end=work_end.hour * 60 + work_end.minute,
+            break_frequency=max(int(preferences.get("break_frequency") or 120), BREAK_MINUTES),
+            busy=busy
+        )
+
+
+@dataclass(slots=True)
+class WellnessSchedule:
+    """Break and hydration times, in minutes since midnight."""
+    breaks: List[int] = field(default_factory=list)
+    hydration: List[int] = field(default_factory=list)
+
+
+def compute_wellness_schedules(inputs: Sequence[WellnessInputs]) -> List[WellnessSchedule]:
+    """
+    Compute break and hydration schedules for many users at once.
+
+    A break is due every ``break_frequency`` minutes after the previous one
+    (the first after work starts) and moves to the next gap of at least
+    ``BREAK_MINUTES`` if it lands in a meeting. Hydration reminders fall
+    every ``HYDRATION_INTERVAL`` minutes from the start of work, moved to
+    the end of any meeting they land in.
+
+    Large batches are computed with NumPy across all users at once; small
+    ones, or all of them when NumPy is not installed, one user at a time.
+    Both give the same result.
+
+    Args:
+        inputs: One entry per user
+
+    Returns:
+        Schedules in input order
+    """
+    if np is not None and len(inputs) >= _VECTORIZE_MIN_USERS:
+        return _compute_vectorized(inputs)
+    return [_compute_one(user) for user in inputs]
+
+
+def _compute_one(user: WellnessInputs) -> WellnessSchedule:
+    """Compute one user's schedule from a free/busy index."""
+    index = FreeBusyIndex((start, end, None) for start, end in user.busy)
+    schedule = WellnessSchedule()
+
+    target = user.work_start + user.break_frequency
+    while target + BREAK_MINUTES <= user.work_end:
+        slots = index.free_slots(target, user.work_end, min_length=BREAK_MINUTES)
+        if not slots:
+            break
+        schedule.breaks.append(slots[0][0])
+        target = slots[0][0] + user.break_frequency
+
+    for due in range(user.work_start, user.work_end, HYDRATION_INTERVAL):
+        slots = index.free_slots(due, user.work_end, min_length=1)
+        if not slots:
+            break
+        if not schedule.hydration or schedule.hydration[-1] != slots[0][0]:
+            schedule.hydration.append(slots[0][0])
+
+    return schedule
+
+
+def _first_fit(
+    starts: "np.ndarray",
+    reach: "np.ndarray",
+    target: "np.ndarray",
+    length: int
+) -> "np.ndarray":
+    """
+    For each user, the earliest time at or after ``target`` with ``length``
+    free minutes.
+
+    ``starts`` holds each user's busy starts in order (padded with a large
+    value) and ``reach`` the running maximum of their ends. Any busy span
+    starting before ``t + length`` that is still running pushes ``t`` to
+    the furthest such end; repeating that reaches the first fit in at most
+    one step per busy span.
+
+    Args:
+        starts: (users, spans) sorted busy starts
+        reach: (users, spans) running maximum busy ends
+        target: (users,) earliest acceptable times
+        length: Free minutes required
+
+    Returns:
+        (users,) first fitting times
+    """
+    rows = np.arange(len(target))
+    t = target.copy()
+    for _ in range(starts.shape[1]):
+        last = (starts < (t + length)[:, None]).sum(axis=1) - 1
+        pushed = np.where(last >= 0, reach[rows, np.maximum(last, 0)], t)
+        moved = pushed > t
+        if not moved.any():
+            break
+        t = np.where(moved, pushed, t)
+    return t
+
+
+def _compute_vectorized(inputs: Sequence[WellnessInputs]) -> List[WellnessSchedule]:
+    """Compute schedules for all users on padded (users x busy spans) arrays."""
+    users = len(inputs)
+    work_start = np.array([user.work_start for user in inputs])
+    work_end = np.array([user.work_end for user in inputs])
+    frequency = np.array([user.break_frequency for user in inputs])
+
+    # Pad busy spans to a rectangle; padding starts after the end of any day
+    spans = max((len(user.busy) for user in inputs), default=0)
+    starts = np.full((users, max(spans, 1)), 2 * MINUTES_PER_DAY)
+    ends = np.zeros((users, max(spans, 1)), dtype=starts.dtype)
+    for i, user in enumerate(inputs):
+        if user.busy:
+            busy = np.array(user.busy)
+            starts[i, :len(busy)] = busy[:, 0]
+            ends[i, :len(busy)] = busy[:, 1]
+    order = np.argsort(starts, axis=1, kind="stable")
+    starts = np.take_along_axis(starts, order, axis=1)
+    reach = np.maximum.accumulate(np.take_along_axis(ends, order, axis=1), axis=1)
+
+    schedules = [WellnessSchedule() for _ in inputs]
+
+    # Each break depends on the previous one, so step all users together
+    target = work_start + frequency
+    active = target + BREAK_MINUTES <= work_end
+    while active.any():
+        found = _first_fit(starts, reach, target, BREAK_MINUTES)
+        active &= found + BREAK_MINUTES <= work_end
+        for i in np.flatnonzero(active).tolist():
+            schedules[i].breaks.append(int(found[i]))
+        target = found + frequency
+        active &= target + BREAK_MINUTES <= work_end
+
+    # Hydration reminders are independent, so look up each slot for everyone
+    for offset in range(0, MINUTES_PER_DAY, HYDRATION_INTERVAL):
+        due = work_start + offset
+        pending = due < work_end
+        if not pending.any():
+            break
+        found = _first_fit(starts, reach, due, 1)
+        pending &= found < work_end
+        for i in np.flatnonzero(pending).tolist():
+            hydration = schedules[i].hydration
+            if not hydration or hydration[-1] != found[i]:
+                hydration.append(int(found[i]))
+
+    return schedules
@@ -2,7 +2,27 @@
 Text cleaning and formatting utilities.
 """
 import re
-from typing import str, List
+from typing import Iterable, List, Optional
+
+# Patterns are compiled once at import
+_HTML_TAG = r'<[^>]*>'
+_UNSAFE_CHAR = r'[^\w\s\-.,!?@]'
+_HTML_TAG_RE = re.compile(_HTML_TAG)
+_UNSAFE_CHAR_RE = re.compile(_UNSAFE_CHAR)
+_WORD_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+# Removal pattern for each (strip_html, sanitize) combination
+_DROP_PATTERNS = {
+    (True, True): re.compile(f'{_HTML_TAG}|{_UNSAFE_CHAR}'),
+    (True, False): _HTML_TAG_RE,
+    (False, True): _UNSAFE_CHAR_RE,
+    (False, False): None
+}
+
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
+    'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are'
+})
 
 
 def clean_whitespace(text: str) -> str:
@@ -15,11 +35,8 @@ def clean_whitespace(text: str) -> str:
     Returns:
         Cleaned text
     """
-    # Remove multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-    # Remove leading/trailing whitespace
-    text = text.strip()
-    return text
+    # Splitting on whitespace collapses runs and trims the ends in one pass
+    return ' '.join(text.split())
 
 
 def remove_html_tags(text: str) -> str:
@@ -33,8 +50,7 @@ def remove_html_tags(text: str) -> str:
         Text without HTML tags
     """
     # TODO: Consider using a proper HTML parser like BeautifulSoup for complex cases
-    clean = re.compile('<.*?>')
-    return re.sub(clean, '', text)
+    return _HTML_TAG_RE.sub('', text)
 
 
 def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
@@ -90,18 +106,32 @@ def extract_keywords(text: str, max_keywords: int = 5) -> List[str]:
     words = text.lower().split()
 
     # Remove common stop words (basic list)
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
-        'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are'
-    }
-
-    keywords = [word for word in words if word not in stop_words and len(word) > 3]
+    keywords = [word for word in words if word not in _STOP_WORDS and len(word) > 3]
 
     # Return unique keywords
     unique_keywords = list(dict.fromkeys(keywords))
     return unique_keywords[:max_keywords]
 
 
+def keyword_tokens(text: str) -> List[str]:
+    """
+    Split text into keyword candidates for indexing.
+
+    Unlike ``extract_keywords`` this strips punctuation and keeps
+    duplicates, so the result can be counted.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Lowercase words longer than three letters, without stop words or numbers
+    """
+    return [
+        word for word in _WORD_RE.findall(text.lower())
+        if len(word) > 3 and word not in _STOP_WORDS and not word.isdigit()
+    ]
+
+
 def sanitize_user_input(text: str) -> str:
     """
     Sanitize user input to prevent injection attacks.
@@ -115,7 +145,7 @@ def sanitize_user_input(text: str) -> str:
     # Remove potentially dangerous characters
     # TODO: Customize based on your security requirements
     sanitized = text.replace('<', '&lt;').replace('>', '&gt;')
-    sanitized = re.sub(r'[^\w\s\-.,!?@]', '', sanitized)
+    sanitized = _UNSAFE_CHAR_RE.sub('', sanitized)
     return sanitized
 
 
@@ -132,3 +162,101 @@ def format_markdown_heading(text: str, level: int = 1) -> str:
     """
     level = max(1, min(6, level))  # Clamp between 1 and 6
     return f"{'#' * level} {text}"
+
+
+class TextCleaner:
+    """
+    Precompiled text cleaning pipeline.
+
+    HTML tags and unsafe characters are removed in a single regex pass,
+    whitespace is collapsed and the result truncated. With ``max_length``
+    set, long input is cleaned from a growing prefix, so a large HTML
+    calendar body is only scanned as far as the output needs.
+    """
+
+    def __init__(
+        self,
+        strip_html: bool = True,
+        sanitize: bool = False,
+        collapse_whitespace: bool = True,
+        max_length: Optional[int] = None,
+        suffix: str = "..."
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            strip_html: Remove HTML tags
+            sanitize: Remove characters outside letters, digits, whitespace
+                and ``-.,!?@`` (stray ``<`` and ``>`` included)
+            collapse_whitespace: Collapse whitespace runs and trim the ends
+            max_length: Truncate to this length (None keeps everything)
+            suffix: Suffix to add when truncated
+        """
+        self._drop = _DROP_PATTERNS[(strip_html, sanitize)]
+        self.collapse_whitespace = collapse_whitespace
+        self.max_length = max_length
+        self.suffix = suffix
+
+    def __call__(self, text: Optional[str]) -> str:
+        """
+        Clean a piece of text.
+
+        Args:
+            text: Input text (None is treated as empty)
+
+        Returns:
+            Cleaned text
+        """
+        if not text:
+            return ""
+
+        if self.max_length is not None and self.collapse_whitespace:
+            window = max(self.max_length * 8, 256)
+            while window < len(text):
+                head = self._head(text, window)
+                cleaned = self._clean(head)
+                # Only the last word of a cleaned prefix can differ from the
+                # full result, so anything before it is final
+                if cleaned.rfind(' ') > self.max_length:
+                    return truncate_text(cleaned, self.max_length, self.suffix)
+                window *= 4
+
+        cleaned = self._clean(text)
+        if self.max_length is not None:
+            cleaned = truncate_text(cleaned, self.max_length, self.suffix)
+        return cleaned
+
+    def clean_many(self, texts: Iterable[Optional[str]]) -> List[str]:
+        """
+        Clean a batch of texts, e.g. all event descriptions in a calendar.
+
+        Repeated texts (such as recurring meeting bodies) are cleaned once.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            Cleaned texts in input order
+        """
+        cleaned = {}
+        results = []
+        for text in texts:
+            if text not in cleaned:
+                cleaned[text] = self(text)
+            results.append(cleaned[text])
+        return results
+
+    def _clean(self, text: str) -> str:
+        if self._drop is not None:
+            text = self._drop.sub('', text)
+        if self.collapse_whitespace:
+            text = ' '.join(text.split())
+        return text
+
+    @staticmethod
+    def _head(text: str, length: int) -> str:
+        """Take a prefix of the text that does not end inside an HTML tag."""
+        head = text[:length]
+        unclosed = head.find('<', head.rfind('>') + 1)
+        return head[:unclosed] if unclosed != -1 else head
@@ -0,0 +1,115 @@
+"""
+Timezone and day-boundary engine.
+Resolves each timezone name once and caches local-midnight boundaries per
+(timezone, date), built with localize/normalize so they stay correct on
+days with a DST change.
+"""
+from datetime import date, datetime, time, timedelta, tzinfo
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pytz
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name: str) -> tzinfo:
+    """
+    Look up a timezone, once per name.
+
+    Args:
+        name: Timezone string (e.g., "America/New_York")
+
+    Returns:
+        pytz timezone
+
+    Raises:
+        pytz.UnknownTimeZoneError: If the name is not a known timezone
+    """
+    return pytz.timezone(name)
+
+
+def localize(timezone: str, wall: datetime) -> datetime:
+    """
+    Attach a timezone to a naive wall-clock time.
+
+    A time skipped by a DST change moves forward by the size of the gap
+    (02:30 on a spring-forward day becomes 03:30); a repeated time resolves
+    to its first occurrence.
+
+    Args:
+        timezone: Timezone string
+        wall: Naive wall-clock datetime
+
+    Returns:
+        Aware datetime in the timezone
+    """
+    tz = get_timezone(timezone)
+    try:
+        return tz.localize(wall, is_dst=None)
+    except pytz.AmbiguousTimeError:
+        return tz.localize(wall, is_dst=True)
+    except pytz.NonExistentTimeError:
+        return tz.normalize(tz.localize(wall, is_dst=False))
+
+
+@lru_cache(maxsize=4096)
+def day_boundaries(timezone: str, day: date) -> Tuple[datetime, datetime]:
+    """
+    Get the first and last instants of a local day.
+
+    Days with a DST change are 23 or 25 hours long, and in zones that change
+    at midnight the day starts at 01:00.
+
+    Args:
+        timezone: Timezone string
+        day: Local date
+
+    Returns:
+        Tuple of (start_of_day, end_of_day) as aware datetimes
+    """
+    tz = get_timezone(timezone)
+    start = localize(timezone, datetime.combine(day, time.min))
+    next_start = localize(timezone, datetime.combine(day + timedelta(days=1), time.min))
+    return start, tz.normalize(next_start - timedelta(microseconds=1))
+
+
+def local_date(timezone: str, now: Optional[datetime] = None) -> date:
+    """
+    Get the current date in a timezone.
+
+    Args:
+        timezone: Timezone string
+        now: Aware reference time (defaults to now)
+
+    Returns:
+        Local date
+    """
+    tz = get_timezone(timezone)
+    return (now.astimezone(tz) if now is not None else datetime.now(tz)).date()
+
+
+def bulk_day_boundaries(
+    timezones: Iterable[str],
+    now: Optional[datetime] = None
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Get today's boundaries for many users at once.
+
+    Each distinct timezone is resolved once, however many users share it.
+
+    Args:
+        timezones: Each user's timezone string
+        now: Aware reference time (defaults to now)
+
+    Returns:
+        (start_of_day, end_of_day) per user, in input order
+    """
+    now = now or datetime.now(pytz.utc)
+    resolved: Dict[str, Tuple[datetime, datetime]] = {}
+    boundaries = []
+    for timezone in timezones:
+        bounds = resolved.get(timezone)
+        if bounds is None:
+            bounds = resolved[timezone] = day_boundaries(timezone, local_date(timezone, now))
+        boundaries.append(bounds)
+    return boundaries
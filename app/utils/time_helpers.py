@@ -2,9 +2,12 @@
 Time and date utility functions.
 """
 from datetime import datetime, timedelta, time
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 import pytz
 
+from app.utils.time_engine import day_boundaries, get_timezone, local_date
+from app.utils.timestamps import datetime_to_epoch, parse_iso
+
 
 def get_current_time(timezone: str = "UTC") -> datetime:
     """
@@ -16,8 +19,7 @@ def get_current_time(timezone: str = "UTC") -> datetime:
     Returns:
         Current datetime in specified timezone
     """
-    tz = pytz.timezone(timezone)
-    return datetime.now(tz)
+    return datetime.now(get_timezone(timezone))
 
 
 def parse_time_string(time_str: str) -> time:
@@ -38,6 +40,48 @@ def parse_time_string(time_str: str) -> time:
         return time(hour=0, minute=0)
 
 
+def parse_wall_time(value: str) -> datetime:
+    """
+    Parse an ISO timestamp as local wall-clock time, dropping any offset.
+
+    Args:
+        value: ISO timestamp
+
+    Returns:
+        Naive datetime with the timestamp's wall-clock reading
+    """
+    return parse_iso(value).replace(tzinfo=None)
+
+
+def wall_seconds(dt: datetime) -> int:
+    """
+    Convert a naive wall-clock time to integer seconds on a fixed timeline.
+
+    Useful for interval arithmetic within a user's day without timezone
+    lookups.
+
+    Args:
+        dt: Naive wall-clock datetime
+
+    Returns:
+        Seconds since the epoch, reading the wall clock as UTC
+    """
+    return datetime_to_epoch(dt.replace(tzinfo=None))
+
+
+def from_wall_seconds(seconds: int) -> datetime:
+    """
+    Convert seconds from ``wall_seconds`` back to a naive datetime.
+
+    Args:
+        seconds: Wall-clock seconds
+
+    Returns:
+        Naive wall-clock datetime
+    """
+    return datetime.fromtimestamp(seconds, pytz.utc).replace(tzinfo=None)
+
+
 def format_time(dt: datetime, format: str = "%I:%M %p") -> str:
     """
     Format datetime as readable time string.
@@ -110,17 +154,21 @@ def get_greeting() -> str:
     return greetings.get(time_of_day, "Hello")
 
 
-def calculate_duration(start: datetime, end: datetime) -> int:
+def calculate_duration(start: Union[datetime, str], end: Union[datetime, str]) -> int:
     """
     Calculate duration between two datetimes in minutes.
 
     Args:
-        start: Start datetime
-        end: End datetime
+        start: Start datetime or ISO timestamp
+        end: End datetime or ISO timestamp
 
     Returns:
         Duration in minutes
     """
+    if isinstance(start, str):
+        start = parse_iso(start)
+    if isinstance(end, str):
+        end = parse_iso(end)
     delta = end - start
     return int(delta.total_seconds() / 60)
 
@@ -208,19 +256,23 @@ def get_day_boundaries(
     """
     Get start and end of day boundaries.
 
+    Boundaries are cached per (timezone, date) and correct on days with a
+    DST change (see ``app.utils.time_engine``).
+
     Args:
-        date: Date to get boundaries for (defaults to today)
+        date: Date to get boundaries for (defaults to today); an aware
+            datetime is converted to the timezone, a naive one is read as
+            local wall-clock time
         timezone: Timezone string
 
     Returns:
-        Tuple of (start_of_day, end_of_day)
+        Tuple of (start_of_day, end_of_day) as aware datetimes
     """
-    tz = pytz.timezone(timezone)
-
     if date is None:
-        date = datetime.now(tz)
-
-    start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day = date.replace(hour=23, minute=59, second=59, microsecond=999999)
+        day = local_date(timezone)
+    elif date.tzinfo is not None:
+        day = local_date(timezone, date)
+    else:
+        day = date.date()
 
-    return start_of_day, end_of_day
+    return day_boundaries(timezone, day)
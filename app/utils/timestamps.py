@@ -0,0 +1,152 @@
+"""
+Fast ISO-8601 timestamp parsing.
+Parses the timestamps calendar and task providers emit and interns the
+results in LRU caches, since the same values (meeting starts, end-of-day
+due dates) repeat across users, refreshes and graph nodes.
+"""
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Iterable, Mapping, Optional, Sequence, Tuple
+
+
+# Distinct timestamps kept per cache
+_CACHE_SIZE = 65536
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def parse_iso(value: str) -> datetime:
+    """
+    Parse an ISO-8601 timestamp.
+
+    Accepts everything ``datetime.fromisoformat`` does, including a ``Z``
+    suffix and the 7-digit fractions some providers emit. Results are
+    interned, so repeated values are parsed once.
+
+    Args:
+        value: ISO timestamp
+
+    Returns:
+        Parsed datetime (naive if the value has no offset)
+
+    Raises:
+        ValueError: If the value is not a valid timestamp
+    """
+    return datetime.fromisoformat(value)
+
+
+def datetime_to_epoch(dt: datetime) -> int:
+    """
+    Convert a datetime to epoch seconds with integer arithmetic.
+
+    Faster than ``datetime.timestamp()``, which goes through the platform
+    time functions.
+
+    Args:
+        dt: Datetime (naive datetimes are treated as UTC)
+
+    Returns:
+        Epoch seconds
+    """
+    seconds = (dt.toordinal() - _EPOCH_ORDINAL) * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+    offset = dt.utcoffset()
+    if offset is not None:
+        seconds -= offset.days * 86400 + offset.seconds
+    return seconds
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def to_epoch(value: Optional[str]) -> Optional[int]:
+    """
+    Convert an ISO-8601 timestamp to epoch seconds.
+
+    Args:
+        value: ISO timestamp (naive timestamps are treated as UTC)
+
+    Returns:
+        Epoch seconds, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return datetime_to_epoch(parse_iso(value))
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def to_wall_seconds(value: Optional[str]) -> Optional[int]:
+    """
+    Convert an ISO-8601 timestamp to wall-clock seconds, ignoring any offset.
+
+    Matches ``time_helpers.wall_seconds(time_helpers.parse_wall_time(value))``.
+
+    Args:
+        value: ISO timestamp
+
+    Returns:
+        Seconds since the epoch reading the wall clock as UTC, or None if
+        the value is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return datetime_to_epoch(parse_iso(value).replace(tzinfo=None))
+    except (TypeError, ValueError):
+        return None
+
+
+def epoch_array(values: Iterable[Optional[str]], wall: bool = False, missing: int = 0) -> array:
+    """
+    Convert many timestamps to a compact array of epoch seconds.
+
+    Args:
+        values: ISO timestamps
+        wall: Read wall-clock times, ignoring offsets
+        missing: Value for missing or invalid timestamps
+
+    Returns:
+        Signed 64-bit array (wrap with ``numpy.frombuffer`` if needed)
+    """
+    convert = to_wall_seconds if wall else to_epoch
+    result = array("q")
+    for value in values:
+        seconds = convert(value)
+        result.append(missing if seconds is None else seconds)
+    return result
+
+
+def event_epoch_arrays(
+    events: Sequence[Mapping[str, Any]],
+    wall: bool = False
+) -> Tuple[array, array]:
+    """
+    Convert a list of event dicts to start and end epoch arrays.
+
+    As for event records, a missing start reads as 0 and a missing end as
+    the start.
+
+    Args:
+        events: Event dicts with ISO ``start`` and ``end``
+        wall: Read wall-clock times, ignoring offsets
+
+    Returns:
+        Tuple of (starts, ends) as signed 64-bit arrays
+    """
+    convert = to_wall_seconds if wall else to_epoch
+    starts = array("q")
+    ends = array("q")
+    for event in events:
+        start = convert(event.get("start")) or 0
+        starts.append(start)
+        ends.append(convert(event.get("end")) or start)
+    return starts, ends
+
+
+def clear_cache() -> None:
+    """Drop all interned timestamps."""
+    parse_iso.cache_clear()
+    to_epoch.cache_clear()
+    to_wall_seconds.cache_clear()
@@ -1,14 +1,43 @@
 """
 Tests for agent functionality.
 """
+import re
 import pytest
 from unittest.mock import Mock, AsyncMock
 
-# TODO: Import agents once implemented
-# from app.agents.planner_agent import PlannerAgent
-# from app.agents.motivator_agent import MotivatorAgent
-# from app.agents.wellness_agent import WellnessAgent
-# from app.agents.summary_agent import SummaryAgent
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+
+from app.agents.planner_agent import PlannerAgent
+from app.agents.motivator_agent import MotivatorAgent
+from app.agents.wellness_agent import WellnessAgent
+from app.agents.summary_agent import SummaryAgent
+from app.agents.prompt_budget import estimate_text_tokens, format_events, format_tasks
+from app.agents.structured_output import (
+    IncrementalJSONParser,
+    StructuredOutputError,
+    parse_structured,
+    stream_structured,
+)
+from app.schemas.dashboard import MotivatorOutput, SummaryOutput
+from app.schemas.records import build_event_records, build_task_records
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_gateway import LLMGateway
+from app.services.wellness_schedule import WellnessSchedule
+
+
+def streaming_llm(*responses):
+    """Create a mock LLM that streams each response in small chunks, one per call."""
+    remaining = list(responses)
+
+    async def astream(messages, **kwargs):
+        text = remaining.pop(0) if len(remaining) > 1 else remaining[0]
+        for i in range(0, len(text), 7):
+            yield Mock(content=text[i:i + 7])
+
+    llm = Mock()
+    llm.astream = Mock(side_effect=astream)
+    return llm
 
 
 class TestPlannerAgent:
@@ -17,29 +46,65 @@ class TestPlannerAgent:
     @pytest.fixture
     def mock_llm(self):
         """Create a mock LLM."""
-        llm = Mock()
-        llm.ainvoke = AsyncMock(return_value=Mock(content="Mock response"))
-        return llm
+        return streaming_llm('{"daily_schedule": [], "recommendations": ["Start early"]}')
 
     @pytest.fixture
     def planner_agent(self, mock_llm):
         """Create a PlannerAgent instance."""
-        # TODO: Uncomment when agent is implemented
-        # return PlannerAgent(mock_llm)
-        pass
+        return PlannerAgent(mock_llm)
 
     @pytest.mark.asyncio
     async def test_planner_invoke(self, planner_agent):
         """Test planner agent invocation."""
-        # TODO: Implement test
-        # state = {
-        #     "calendar_events": [],
-        #     "tasks": [],
-        #     "priorities": []
-        # }
-        # result = await planner_agent.invoke(state)
-        # assert "planner_output" in result
-        pass
+        state = {
+            "calendar_events": [],
+            "tasks": [],
+            "priorities": []
+        }
+        result = await planner_agent.invoke(state)
+        assert "planner_output" in result
+
+    @pytest.mark.asyncio
+    async def test_simple_day_skips_llm(self, planner_agent, mock_llm):
+        """Test that a light day is packed by the rules without an LLM call."""
+        state = {
+            "calendar_events": build_event_records([
+                {"id": "e1", "title": "Standup", "start": "2024-01-15T09:00:00", "end": "2024-01-15T09:30:00"},
+                {"id": "e2", "title": "Review", "start": "2024-01-15T10:00:00", "end": "2024-01-15T12:00:00"}
+            ]),
+            "tasks": build_task_records([
+                {"id": "t1", "title": "Email", "priority": "low", "estimated_duration": 15},
+                {"id": "t2", "title": "Proposal", "priority": "high", "estimated_duration": 90}
+            ]),
+            "priorities": [],
+            "preferences": {"work_hours": {"start": "09:00", "end": "17:00"}}
+        }
+        plan = (await planner_agent.invoke(state))["planner_output"]
+
+        mock_llm.astream.assert_not_called()
+        assert plan["source"] == "rules"
+        assert plan["top_priorities"] == ["Proposal", "Email"]
+        # The high-priority task takes the first gap long enough for it
+        assert plan["time_blocks"][0]["start"] == "2024-01-15T12:05:00"
+        assert plan["time_blocks"][1]["start"] == "2024-01-15T09:35:00"
+
+    @pytest.mark.asyncio
+    async def test_overbooked_day_uses_llm(self, planner_agent, mock_llm):
+        """Test that tasks that do not fit send the day to the LLM."""
+        state = {
+            "calendar_events": [],
+            "tasks": build_task_records([
+                {"id": "t1", "title": "Marathon", "priority": "high", "estimated_duration": 600}
+            ]),
+            "priorities": [],
+            "preferences": {}
+        }
+        plan = (await planner_agent.invoke(state))["planner_output"]
+
+        mock_llm.astream.assert_called_once()
+        assert plan["source"] == "llm"
+        assert plan["recommendations"] == ["Start early"]
+        assert plan["unscheduled_tasks"] == ["Marathon"]
 
 
 class TestMotivatorAgent:
@@ -48,25 +113,28 @@ class TestMotivatorAgent:
     @pytest.fixture
     def mock_llm(self):
         """Create a mock LLM."""
-        llm = Mock()
-        llm.ainvoke = AsyncMock(return_value=Mock(content="You've got this!"))
-        return llm
+        return streaming_llm('{"message": "You\'ve got this!", "quote": null}')
 
     @pytest.fixture
     def motivator_agent(self, mock_llm):
         """Create a MotivatorAgent instance."""
-        # TODO: Uncomment when agent is implemented
-        # return MotivatorAgent(mock_llm)
-        pass
+        return MotivatorAgent(mock_llm)
 
     @pytest.mark.asyncio
     async def test_motivator_invoke(self, motivator_agent):
         """Test motivator agent invocation."""
-        # TODO: Implement test
-        # state = {"planner_output": {}, "user_goals": []}
-        # result = await motivator_agent.invoke(state)
-        # assert "motivator_output" in result
-        pass
+        state = {"planner_output": {}, "user_goals": []}
+        result = await motivator_agent.invoke(state)
+        assert "motivator_output" in result
+
+    @pytest.mark.asyncio
+    async def test_falls_back_on_malformed_output(self):
+        """Test that output that stays malformed falls back to the default message."""
+        llm = streaming_llm("Sure! Here is your motivation.")
+        result = await MotivatorAgent(llm).invoke({"planner_output": {}})
+
+        assert llm.astream.call_count == 2
+        assert result["motivator_output"]["message"].startswith("You've got this!")
 
 
 class TestWellnessAgent:
@@ -82,18 +150,37 @@ class TestWellnessAgent:
     @pytest.fixture
     def wellness_agent(self, mock_llm):
         """Create a WellnessAgent instance."""
-        # TODO: Uncomment when agent is implemented
-        # return WellnessAgent(mock_llm)
-        pass
+        return WellnessAgent(mock_llm)
 
     @pytest.mark.asyncio
     async def test_wellness_invoke(self, wellness_agent):
         """Test wellness agent invocation."""
-        # TODO: Implement test
-        # state = {"planner_output": {}}
-        # result = await wellness_agent.invoke(state)
-        # assert "wellness_output" in result
-        pass
+        state = {"planner_output": {}}
+        result = await wellness_agent.invoke(state)
+        assert "wellness_output" in result
+
+
+    @pytest.mark.asyncio
+    async def test_uses_precomputed_schedule(self, wellness_agent):
+        """Test that a batch-precomputed schedule is used as given."""
+        state = {"planner_output": {}, "wellness_schedule": WellnessSchedule(breaks=[630], hydration=[540])}
+        result = await wellness_agent.invoke(state)
+
+        assert [b["time"] for b in result["wellness_output"]["break_reminders"]] == ["10:30 AM"]
+        assert result["wellness_output"]["hydration_times"] == ["09:00 AM"]
+
+    def test_breaks_avoid_meetings(self, wellness_agent):
+        """Test that a break due during a meeting moves to the next free gap."""
+        events = build_event_records([
+            {"id": "e1", "title": "Workshop", "start": "2024-01-15T10:30:00", "end": "2024-01-15T12:00:00"}
+        ])
+        schedule = wellness_agent._wellness_schedule({
+            "calendar_events": events,
+            "preferences": {"work_hours": {"start": "09:00", "end": "17:00"}, "break_frequency": 120}
+        })
+
+        assert schedule.breaks == [12 * 60, 14 * 60, 16 * 60]
+        assert schedule.hydration == [9 * 60, 12 * 60, 13 * 60, 15 * 60]
 
 
 class TestSummaryAgent:
@@ -102,26 +189,181 @@ class TestSummaryAgent:
     @pytest.fixture
     def mock_llm(self):
         """Create a mock LLM."""
-        llm = Mock()
-        llm.ainvoke = AsyncMock(return_value=Mock(content="Daily briefing"))
-        return llm
+        return streaming_llm('{"briefing": "Daily briefing"}')
 
     @pytest.fixture
     def summary_agent(self, mock_llm):
         """Create a SummaryAgent instance."""
-        # TODO: Uncomment when agent is implemented
-        # return SummaryAgent(mock_llm)
-        pass
+        return SummaryAgent(mock_llm)
 
     @pytest.mark.asyncio
     async def test_summary_invoke(self, summary_agent):
         """Test summary agent invocation."""
-        # TODO: Implement test
-        # state = {
-        #     "planner_output": {},
-        #     "motivator_output": {},
-        #     "wellness_output": {}
-        # }
-        # result = await summary_agent.invoke(state)
-        # assert "summary_output" in result
-        pass
+        state = {
+            "planner_output": {},
+            "motivator_output": {},
+            "wellness_output": {}
+        }
+        result = await summary_agent.invoke(state)
+        assert "summary_output" in result
+
+    @pytest.mark.asyncio
+    async def test_merge_fills_draft_slots(self, summary_agent, mock_llm):
+        """Test that a draft is completed from the branch outputs without an LLM call."""
+        state = {
+            "summary_draft": {"briefing": "Three meetings today.", "top_3_priorities": ["Ship"]},
+            "motivator_output": {"message": "You've got this!"},
+            "wellness_output": {"hydration_reminder": "Drink water every 2 hours"}
+        }
+        summary = (await summary_agent.merge(state))["summary_output"]
+
+        mock_llm.astream.assert_not_called()
+        assert summary["top_3_priorities"] == ["Ship"]
+        assert summary["briefing"] == "Three meetings today.\n\nDrink water every 2 hours\n\nYou've got this!"
+
+
+class TestPromptBudget:
+    """Tests for token-budgeted prompt assembly."""
+
+    @staticmethod
+    def _events(count):
+        return build_event_records([
+            {
+                "id": str(i),
+                "title": f"Meeting {i}",
+                "start": f"2024-01-15T{8 + i % 10:02d}:00:00",
+                "end": f"2024-01-15T{8 + i % 10:02d}:30:00",
+                "location": "Room 4B",
+                "attendees": ["alice@example.com", "bob@example.com"] if i % 2 else []
+            }
+            for i in range(count)
+        ])
+
+    def test_events_fit_budget_and_dedupe(self):
+        """Test that a heavy calendar is trimmed and repeats are aliased."""
+        text = format_events(self._events(40), max_tokens=150)
+
+        assert estimate_text_tokens(text) <= 150
+        assert text.count("alice@example.com") == 1
+        assert text.count("Room 4B") == 1
+        assert "lower-priority events omitted" in text
+        # Meetings with attendees are kept ahead of solo blocks
+        assert "with P1" in text
+
+    @pytest.mark.parametrize("budget", [20, 200, 500])
+    def test_event_legend_within_budget(self, budget):
+        """Test that the legend is charged to the budget and only covers kept events."""
+        events = build_event_records([
+            {
+                "id": str(i),
+                "title": f"Meeting {i}",
+                "start": f"2024-01-15T{8 + i % 10:02d}:00:00",
+                "end": f"2024-01-15T{8 + i % 10:02d}:30:00",
+                "location": f"Room {i % 30}",
+                "attendees": [f"user{i % 40 + j}@example.com" for j in range(4)]
+            }
+            for i in range(100)
+        ])
+        text = format_events(events, max_tokens=budget)
+
+        assert estimate_text_tokens(text) <= budget
+        legend = [line for line in text.splitlines() if line.startswith(("People:", "Places:"))]
+        event_lines = [line for line in text.splitlines() if line.startswith("- ")]
+        for line in legend:
+            for entry in line.split(": ", 1)[1].split(", "):
+                alias = entry.split("=", 1)[0]
+                # Every alias stands for a value repeated among the kept events
+                assert sum(bool(re.search(rf"\b{alias}\b", event)) for event in event_lines) >= 2
+
+    def test_tasks_ordered_by_priority(self):
+        """Test that high-priority tasks are kept and completed ones dropped."""
+        tasks = build_task_records([
+            {"id": "1", "title": "Low", "priority": "low"},
+            {"id": "2", "title": "Done", "priority": "high", "completed": True},
+            {"id": "3", "title": "Urgent", "priority": "high"}
+        ])
+        text = format_tasks(tasks, max_tokens=8)
+
+        assert text.startswith("- [high] Urgent")
+        assert "Done" not in text
+        assert "+1 lower-priority tasks omitted" in text
+
+    @pytest.mark.parametrize("budget", [200, 500, 2000])
+    def test_planner_prompt_respects_budget(self, budget):
+        """Test that the whole planner prompt fits the budget on a heavy day."""
+        tasks = build_task_records([
+            {"id": str(i), "title": f"Review document {i}", "priority": "high", "estimated_duration": 30}
+            for i in range(200)
+        ])
+        schedule = {
+            "free_slots": [{"start": "09:00", "end": "09:30", "minutes": 30}] * 60,
+            "unscheduled_tasks": [f"Review document {i}" for i in range(100)]
+        }
+        planner = PlannerAgent(Mock(), max_prompt_tokens=budget)
+        prompt = planner._build_prompt(self._events(200), tasks, ["health", "learning"] * 50, schedule)
+        assert estimate_text_tokens(prompt) <= budget
+
+
+class TestStructuredOutput:
+    """Tests for incremental structured-output parsing."""
+
+    def test_partial_snapshots(self):
+        """Test that fields appear as they stream, including unfinished strings."""
+        parser = IncrementalJSONParser(SummaryOutput)
+        parser.feed('```json\n{"briefing": "Good mor')
+        assert parser.snapshot() == {"briefing": "Good mor"}
+
+        parser.feed('ning", "top_3_priorities": ["Ship')
+        assert parser.snapshot() == {"briefing": "Good morning", "top_3_priorities": ["Ship"]}
+
+        parser.feed(' it"]}\n```')
+        assert parser.done
+        assert parser.result().top_3_priorities == ["Ship it"]
+
+    @pytest.mark.parametrize("text", [
+        "Here is the JSON: {",
+        '{"briefing" "missing colon"',
+        '{"briefing": "ok", "top_3_priorities": 5, ',
+        '{"briefing": nope',
+    ])
+    def test_malformed_output_fails_early(self, text):
+        """Test that output that cannot become valid is rejected before it ends."""
+        parser = IncrementalJSONParser(SummaryOutput)
+        with pytest.raises(StructuredOutputError):
+            parser.feed(text)
+
+    def test_unicode_escapes(self):
+        """Test that escapes, including surrogate pairs, are decoded."""
+        result = parse_structured('{"message": "caf\\u00e9 \\ud83d\\ude80\\n"}', MotivatorOutput)
+        assert result.message == "caf\u00e9 \U0001f680\n"
+
+    def test_incomplete_output_rejected(self):
+        """Test that a truncated object is not accepted."""
+        with pytest.raises(StructuredOutputError):
+            parse_structured('{"message": "Keep go', MotivatorOutput)
+
+    @pytest.mark.asyncio
+    async def test_stream_retries_malformed_output(self):
+        """Test that a malformed stream is abandoned and retried."""
+        llm = streaming_llm('{"message": 42}', '{"message": "Keep going"} trailing text')
+        partials = []
+        result = await stream_structured(llm, [], MotivatorOutput, on_partial=partials.append)
+
+        assert result.message == "Keep going"
+        assert llm.astream.call_count == 2
+        assert partials[-1] == {"message": "Keep going"}
+
+    @pytest.mark.asyncio
+    async def test_invalid_output_not_cached(self):
+        """Test that only validated output is cached and retries bypass the cache."""
+        model = FakeListChatModel(responses=['{"affirmation": "x"}', '{"message": "Keep going"}'])
+        gateway = LLMGateway(model, cache=LLMResponseCache(), model_name="fake")
+        messages = [HumanMessage(content="Motivate me")]
+
+        result = await stream_structured(gateway, messages, MotivatorOutput, near_duplicates=True)
+        assert result.message == "Keep going"
+        assert gateway.cache.get(messages, "fake", gateway.temperature) == '{"message": "Keep going"}'
+
+        model.responses = ['{"message": "Other"}']
+        again = await stream_structured(gateway, messages, MotivatorOutput)
+        assert again.message == "Keep going"
@@ -1,21 +1,21 @@
 """
 Tests for API endpoints.
 """
+import json
 import pytest
-from httpx import AsyncClient
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
 from unittest.mock import patch, AsyncMock
 
-# TODO: Import FastAPI app once implemented
-# from app.main import app
+from app.main import app
+from app.services.briefing_jobs import BriefingJobQueue
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def client():
     """Create a test client."""
-    # TODO: Uncomment when app is implemented
-    # async with AsyncClient(app=app, base_url="http://test") as ac:
-    #     yield ac
-    pass
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
 
 
 class TestHealthEndpoints:
@@ -24,29 +24,33 @@ class TestHealthEndpoints:
     @pytest.mark.asyncio
     async def test_health_check(self, client):
         """Test health check endpoint."""
-        # TODO: Implement test
-        # response = await client.get("/health/")
-        # assert response.status_code == 200
-        # assert response.json()["status"] == "healthy"
-        pass
+        response = await client.get("/health/")
+        assert response.status_code == 200
+        assert response.json()["status"] == "healthy"
 
     @pytest.mark.asyncio
     async def test_readiness_check(self, client):
         """Test readiness check endpoint."""
-        # TODO: Implement test
-        # response = await client.get("/health/ready")
-        # assert response.status_code == 200
-        # assert "dependencies" in response.json()
-        pass
+        response = await client.get("/health/ready")
+        assert response.status_code == 200
+        assert "dependencies" in response.json()
 
     @pytest.mark.asyncio
     async def test_liveness_check(self, client):
         """Test liveness check endpoint."""
-        # TODO: Implement test
-        # response = await client.get("/health/live")
-        # assert response.status_code == 200
-        # assert response.json()["status"] == "alive"
-        pass
+        response = await client.get("/health/live")
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, client):
+        """Test that node metrics are exported in the Prometheus format."""
+        await client.post("/dashboard/briefing", json={"user_id": "metrics_user"})
+        response = await client.get("/health/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE briefing_node_duration_seconds histogram" in response.text
+        assert 'briefing_node_runs_total{node="planner",status="ok"}' in response.text
 
 
 class TestDashboardEndpoints:
@@ -55,49 +59,94 @@ class TestDashboardEndpoints:
     @pytest.mark.asyncio
     async def test_generate_briefing(self, client):
         """Test briefing generation endpoint."""
-        # TODO: Implement test
-        # request_data = {
-        #     "user_id": "test_user",
-        #     "context": {},
-        #     "include_calendar": True,
-        #     "include_tasks": True
-        # }
-        # response = await client.post("/dashboard/briefing", json=request_data)
-        # assert response.status_code == 200
-        # assert "summary" in response.json()
-        pass
+        request_data = {
+            "user_id": "test_user",
+            "context": {},
+            "include_calendar": True,
+            "include_tasks": True
+        }
+        response = await client.post("/dashboard/briefing", json=request_data)
+        assert response.status_code == 200
+        assert "summary" in response.json()
+        assert all("start" in event for event in response.json()["calendar_events"])
+        assert len(response.json()["tasks"]) > 0
+
+    @pytest.mark.asyncio
+    async def test_stream_briefing(self, client):
+        """Test streaming briefing events arrive in graph order."""
+        request_data = {"user_id": "stream_user", "context": {"mood": "focused"}}
+        response = await client.post("/dashboard/briefing/stream", json=request_data)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = [
+            line.split(": ", 1)[1]
+            for line in response.text.splitlines()
+            if line.startswith("event: ")
+        ]
+        assert events[0] == "planner"
+        assert set(events[1:3]) == {"motivator", "wellness"}
+        assert events[-2:] == ["summary", "done"]
+
+    @pytest.mark.asyncio
+    async def test_generate_briefing_batch(self, client):
+        """Test batch generation streams one NDJSON line per user."""
+        request_data = {
+            "requests": [{"user_id": f"batch_user{i}"} for i in range(3)],
+            "concurrency": 2
+        }
+        response = await client.post("/dashboard/briefing/batch", json=request_data)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(r["user_id"] for r in results) == ["batch_user0", "batch_user1", "batch_user2"]
+        assert all(r["status"] == "success" for r in results)
+
+    @pytest.mark.asyncio
+    async def test_briefing_job_long_poll(self, client):
+        """Test a queued briefing job can be long-polled to completion."""
+        jobs = BriefingJobQueue(workers=1, queue_size=4)
+        with patch("app.api.routes_dashboard.briefing_jobs", jobs):
+            response = await client.post("/dashboard/briefing/jobs", json={"user_id": "job_user"})
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+            assert response.headers["location"] == f"/dashboard/briefing/jobs/{job_id}"
+
+            response = await client.get(f"/dashboard/briefing/jobs/{job_id}", params={"wait": 10})
+            missing = await client.get("/dashboard/briefing/jobs/unknown")
+        await jobs.stop()
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "success"
+        assert response.json()["briefing"]["user_id"] == "job_user"
+        assert missing.status_code == 404
 
     @pytest.mark.asyncio
     async def test_get_dashboard_data(self, client):
         """Test dashboard data retrieval."""
-        # TODO: Implement test
-        # response = await client.get("/dashboard/data/test_user")
-        # assert response.status_code == 200
-        # assert "user_id" in response.json()
-        # assert "recent_briefings" in response.json()
-        pass
+        response = await client.get("/dashboard/data/test_user")
+        assert response.status_code == 200
+        assert "user_id" in response.json()
+        assert "recent_briefings" in response.json()
 
     @pytest.mark.asyncio
     async def test_submit_feedback(self, client):
         """Test feedback submission."""
-        # TODO: Implement test
-        # feedback_data = {
-        #     "rating": 5,
-        #     "comment": "Great briefing!"
-        # }
-        # response = await client.post(
-        #     "/dashboard/feedback?user_id=test_user",
-        #     json=feedback_data
-        # )
-        # assert response.status_code == 200
-        # assert response.json()["status"] == "success"
-        pass
+        feedback_data = {
+            "rating": 5,
+            "comment": "Great briefing!"
+        }
+        response = await client.post(
+            "/dashboard/feedback?user_id=test_user",
+            json=feedback_data
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "success"
 
     @pytest.mark.asyncio
     async def test_generate_briefing_error_handling(self, client):
         """Test error handling in briefing generation."""
-        # TODO: Implement test
-        # Test with invalid user_id or missing required fields
-        # response = await client.post("/dashboard/briefing", json={})
-        # assert response.status_code == 422  # Validation error
-        pass
+        # Missing required fields
+        response = await client.post("/dashboard/briefing", json={})
+        assert response.status_code == 422  # Validation error
@@ -0,0 +1,1000 @@
+"""
+Tests for service layer functionality.
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytz
+from unittest.mock import patch, AsyncMock, Mock
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.core.config import settings
+from app.schemas.dashboard import BriefingRequest, BriefingResponse
+from app.schemas.records import build_event_records, build_task_records
+from app.services.briefing_cache import (
+    BriefingCache,
+    InMemorySharedCache,
+    LRUCache,
+    briefing_cache,
+    fingerprint_briefing_inputs
+)
+from app.services.briefing_jobs import BriefingJobQueue, JobQueueFull
+from app.services.briefing_service import run_briefing, run_briefing_batch, stream_briefing
+from app.services.calendar_service import (
+    CalendarClient,
+    CalendarService,
+    CalendarSyncResult,
+    SyncTokenExpired
+)
+from app.services.free_busy import FreeBusyIndex
+from app.services.keyword_index import KeywordIndex
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_gateway import (
+    LLMGateway,
+    TokenBucket,
+    close_llm_gateways,
+    create_llm_gateway,
+    get_llm_gateway
+)
+from app.services.model_router import ModelRouter
+from app.services.metrics import MetricsRegistry, NodeTrace, traced_node
+from app.services.scheduler import BriefingScheduler
+from app.services.storage import InMemoryStorage, SQLiteStorage, create_storage_backend
+from app.services.user_memory import UserMemory
+from app.services import wellness_schedule
+from app.utils.text_cleaner import (
+    TextCleaner,
+    clean_whitespace,
+    keyword_tokens,
+    remove_html_tags,
+    truncate_text,
+)
+from app.utils.time_engine import bulk_day_boundaries, day_boundaries
+from app.utils.time_helpers import calculate_duration, get_day_boundaries
+from app.utils.timestamps import event_epoch_arrays, parse_iso, to_epoch, to_wall_seconds
+from app.services.wellness_schedule import WellnessInputs, compute_wellness_schedules
+
+
+class TestBriefingCache:
+    """Tests for the briefing result cache."""
+
+    def test_fingerprint_is_order_independent(self):
+        """Test that dict key order does not change the fingerprint."""
+        a = fingerprint_briefing_inputs("u1", {"a": 1, "b": 2}, [], [], {"mood": "calm"})
+        b = fingerprint_briefing_inputs("u1", {"b": 2, "a": 1}, [], [], {"mood": "calm"})
+        c = fingerprint_briefing_inputs("u1", {"a": 1, "b": 2}, [], [], {"mood": "tired"})
+        assert a == b
+        assert a != c
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = LRUCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+    def test_lru_ttl(self):
+        """Test that expired entries are not returned."""
+        cache = LRUCache(max_size=2, ttl_seconds=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_shared_hit_promotes_to_local(self):
+        """Test that a shared-tier hit is copied into the local tier."""
+        shared = InMemorySharedCache()
+        await shared.set("key", {"summary": "hi"}, 60)
+
+        cache = BriefingCache(max_size=4, ttl_seconds=60, shared=shared)
+        assert await cache.get("key") == {"summary": "hi"}
+        assert cache.local.get("key") == {"summary": "hi"}
+
+    @pytest.mark.asyncio
+    async def test_run_briefing_serves_repeat_from_cache(self):
+        """Test that unchanged inputs skip the graph on the second request."""
+        briefing_cache.local.clear()
+        graph = AsyncMock()
+        graph.ainvoke = AsyncMock(return_value={
+            "summary_output": {"briefing": "Morning!"},
+            "errors": []
+        })
+
+        with patch("app.services.briefing_service.get_briefing_graph", return_value=graph):
+            request = BriefingRequest(user_id="cache_user", context={"mood": "calm"})
+            first = await run_briefing(request)
+            second = await run_briefing(request)
+
+        assert graph.ainvoke.await_count == 1
+        assert first.summary == second.summary == "Morning!"
+        assert first.timestamp == second.timestamp
+
+    @pytest.mark.asyncio
+    async def test_stream_tokens_are_briefing_text(self):
+        """Test that token events carry summary text, not the raw JSON stream."""
+        briefing_cache.local.clear()
+
+        async def astream(state, stream_mode):
+            yield "custom", {"node": "planner", "partial": {"top_priorities": ["Ship"]}}
+            for text in ("Good", "Good morning", "Good morning team"):
+                yield "custom", {"node": "summary", "partial": {"briefing": text}}
+            yield "custom", {"node": "summary", "partial": {"briefing": "Good morning team", "top_3_priorities": []}}
+            yield "updates", {"summary": {"summary_output": {"briefing": "Good morning team"}}}
+
+        graph = Mock()
+        graph.astream = astream
+        with patch("app.services.briefing_service.get_briefing_graph", return_value=graph):
+            events = [event async for event in stream_briefing(BriefingRequest(user_id="token_user"))]
+
+        tokens = [data["content"] for name, data in events if name == "token"]
+        assert tokens == ["Good", " morning", " team"]
+        assert [name for name, _ in events][-2:] == ["summary", "done"]
+
+
+class TestBriefingBatch:
+    """Tests for batch briefing generation."""
+
+    @pytest.mark.asyncio
+    async def test_batch_isolates_failures_and_bounds_concurrency(self):
+        """Test that one failing user does not affect others and concurrency is capped."""
+        in_flight = 0
+        peak = 0
+
+        async def fake_run_briefing(request, cache_ttl_seconds=None, prepared=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if request.user_id == "user3":
+                raise RuntimeError("calendar exploded")
+            return BriefingResponse(user_id=request.user_id, summary="", timestamp="now")
+
+        requests = [BriefingRequest(user_id=f"user{i}") for i in range(10)]
+        with patch("app.services.briefing_service.run_briefing", fake_run_briefing):
+            results = [r async for r in run_briefing_batch(requests, concurrency=3)]
+
+        assert len(results) == 10
+        assert peak == 3
+        failed = [r for r in results if r.status == "error"]
+        assert [r.user_id for r in failed] == ["user3"]
+        assert failed[0].error == "calendar exploded"
+
+    @pytest.mark.asyncio
+    async def test_batch_concurrency_capped_by_settings(self):
+        """Test that a caller cannot raise concurrency above the server limit."""
+        in_flight = 0
+        peak = 0
+
+        async def fake_run_briefing(request, cache_ttl_seconds=None, prepared=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return BriefingResponse(user_id=request.user_id, summary="", timestamp="now")
+
+        requests = [BriefingRequest(user_id=f"user{i}") for i in range(6)]
+        with patch("app.services.briefing_service.run_briefing", fake_run_briefing), \
+                patch.object(settings, "batch_concurrency", 2):
+            results = [r async for r in run_briefing_batch(requests, concurrency=10_000)]
+
+        assert len(results) == 6
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_precomputes_wellness_schedules(self):
+        """Test that each prepared state carries its wellness schedule."""
+        seen = {}
+
+        async def fake_run_briefing(request, cache_ttl_seconds=None, prepared=None):
+            seen[request.user_id] = prepared[0]["wellness_schedule"]
+            return BriefingResponse(user_id=request.user_id, summary="", timestamp="now")
+
+        requests = [BriefingRequest(user_id=f"user{i}") for i in range(5)]
+        with patch("app.services.briefing_service.run_briefing", fake_run_briefing):
+            results = [r async for r in run_briefing_batch(requests, concurrency=2)]
+
+        assert len(results) == 5
+        # Placeholder calendar: standup 9:00-9:30 and review 14:00-15:00
+        assert seen["user0"].breaks == [11 * 60, 13 * 60, 15 * 60]
+
+
+class TestBriefingJobs:
+    """Tests for the background briefing job queue."""
+
+    @pytest.mark.asyncio
+    async def test_full_queue_refuses_jobs(self):
+        """Test that submissions beyond the queue's capacity are refused."""
+        release = asyncio.Event()
+
+        async def slow_briefing(request):
+            await release.wait()
+            raise RuntimeError("provider down")
+
+        jobs = BriefingJobQueue(workers=1, queue_size=1)
+        with patch("app.services.briefing_jobs.run_briefing", slow_briefing):
+            running = await jobs.submit(BriefingRequest(user_id="u1"))
+            await asyncio.sleep(0)
+            queued = await jobs.submit(BriefingRequest(user_id="u2"))
+            with pytest.raises(JobQueueFull):
+                await jobs.submit(BriefingRequest(user_id="u3"))
+
+            assert (jobs.get(running.job_id).status, jobs.get(queued.job_id).status) == ("running", "queued")
+            assert (await jobs.wait(queued.job_id, timeout=0.01)).status == "queued"
+
+            release.set()
+            failed = await jobs.wait(running.job_id, timeout=1)
+        await jobs.stop()
+
+        assert failed.status == "error"
+        assert failed.error == "provider down"
+        assert jobs.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_stop_fails_queued_jobs(self):
+        """Test that jobs no worker has started are failed on shutdown."""
+        async def slow_briefing(request):
+            await asyncio.Event().wait()
+
+        jobs = BriefingJobQueue(workers=1, queue_size=2)
+        with patch("app.services.briefing_jobs.run_briefing", slow_briefing):
+            running = await jobs.submit(BriefingRequest(user_id="u1"))
+            await asyncio.sleep(0)
+            queued = await jobs.submit(BriefingRequest(user_id="u2"))
+            waiter = asyncio.create_task(jobs.wait(queued.job_id, timeout=5))
+            await jobs.stop()
+
+            assert (await asyncio.wait_for(waiter, 1)).status == "error"
+            assert queued.error == "Briefing job was not started before shutdown"
+            assert running.error == "Briefing job was interrupted"
+
+            # A restarted pool skips the abandoned job left on the broker
+            jobs.start()
+            await asyncio.sleep(0)
+            assert jobs.in_flight == 0
+            assert queued.status == "error"
+        await jobs.stop()
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_expire(self):
+        """Test that finished jobs are forgotten after their retention."""
+        response = AsyncMock(return_value=BriefingResponse(
+            user_id="u1", summary="Morning!", timestamp=datetime.utcnow().isoformat()
+        ))
+
+        jobs = BriefingJobQueue(workers=1, queue_size=1, result_ttl_seconds=0)
+        with patch("app.services.briefing_jobs.run_briefing", response):
+            job = await jobs.submit(BriefingRequest(user_id="u1"))
+            done = jobs._done[job.job_id]
+            await asyncio.wait_for(done.wait(), 1)
+        await jobs.stop()
+
+        assert job.status == "success"
+        assert job.briefing.summary == "Morning!"
+        assert jobs.get(job.job_id) is None
+
+
+class TestBriefingScheduler:
+    """Tests for the pre-generation scheduler."""
+
+    def test_next_wake_time_rolls_to_tomorrow(self):
+        """Test that a wake time inside the lead window moves to the next day."""
+        scheduler = BriefingScheduler(lead_minutes=30, spread_minutes=20)
+        now = pytz.UTC.localize(datetime(2024, 1, 15, 6, 45))
+
+        target = scheduler.next_wake_time("UTC", "07:00", now)
+        assert target == pytz.UTC.localize(datetime(2024, 1, 16, 7, 0))
+
+        target = scheduler.next_wake_time("UTC", "08:00", now)
+        assert target == pytz.UTC.localize(datetime(2024, 1, 15, 8, 0))
+
+    def test_bucket_runs_are_spread_before_wake_time(self):
+        """Test that a bucket's runs are spread evenly across the window."""
+        scheduler = BriefingScheduler(lead_minutes=30, spread_minutes=20)
+        now = pytz.UTC.localize(datetime(2024, 1, 15, 0, 0))
+        users = [f"user{i}" for i in range(4)]
+
+        scheduler.schedule_bucket("America/New_York", "07:00", users, now)
+        assert scheduler.queue_depth == 4
+
+        wake = datetime(2024, 1, 15, 12, 0, tzinfo=pytz.UTC)
+        run_times = sorted(ts for ts, _ in scheduler._queue)
+        assert run_times[0] == (wake - timedelta(minutes=30)).timestamp()
+        assert [b - a for a, b in zip(run_times, run_times[1:])] == [300.0] * 3
+
+        due = scheduler.pop_due(wake - timedelta(minutes=20))
+        assert due == ["user0", "user1", "user2"]
+        assert scheduler.queue_depth == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_buckets_known_users(self):
+        """Test that refresh schedules each stored user exactly once."""
+        scheduler = BriefingScheduler()
+        with patch("app.services.scheduler.user_memory.list_user_ids",
+                   AsyncMock(return_value=["a", "b"])):
+            await scheduler.refresh()
+            await scheduler.refresh()
+
+        assert scheduler.queue_depth == 2
+
+
+class TestTimeEngine:
+    """Tests for timezone and day-boundary resolution."""
+
+    def test_dst_day_boundaries(self):
+        """Test that days with a DST change are 23 and 25 hours long."""
+        start, end = get_day_boundaries(datetime(2024, 3, 10), "America/New_York")
+        assert start.isoformat() == "2024-03-10T00:00:00-05:00"
+        assert end.isoformat() == "2024-03-10T23:59:59.999999-04:00"
+        assert end - start == timedelta(hours=23, microseconds=-1)
+
+        start, end = day_boundaries("America/New_York", date(2024, 11, 3))
+        assert end - start == timedelta(hours=25, microseconds=-1)
+
+    def test_midnight_dst_change(self):
+        """Test that a day whose midnight is skipped starts at 01:00."""
+        start, _ = day_boundaries("America/Santiago", date(2024, 9, 8))
+        assert start.isoformat() == "2024-09-08T01:00:00-03:00"
+
+    def test_bulk_boundaries_follow_local_date(self):
+        """Test that each user gets the boundaries of their own local day."""
+        now = pytz.UTC.localize(datetime(2024, 1, 15, 2, 0))
+        boundaries = bulk_day_boundaries(["UTC", "America/Los_Angeles", "UTC"], now)
+
+        assert [start.date() for start, _ in boundaries] == [date(2024, 1, 15), date(2024, 1, 14), date(2024, 1, 15)]
+        assert boundaries[0] is boundaries[2]
+
+    def test_wake_time_across_spring_forward(self):
+        """Test that the wake time stays at wall-clock time on a DST day."""
+        scheduler = BriefingScheduler(lead_minutes=30)
+        now = pytz.UTC.localize(datetime(2024, 3, 10, 5, 0))
+
+        target = scheduler.next_wake_time("America/New_York", "07:00", now)
+        assert target.isoformat() == "2024-03-10T07:00:00-04:00"
+
+
+class TestTimestamps:
+    """Tests for shared ISO-8601 parsing."""
+
+    @pytest.mark.parametrize("value", [
+        "2024-01-15T09:00:00",
+        "2024-01-15T09:00:00.123456",
+        "2024-01-15T09:00:00Z",
+        "2024-01-15T09:00:00.0000000Z",
+        "2024-01-15T09:00:00+05:30",
+        "1969-12-31T23:59:59-08:00",
+    ])
+    def test_epoch_matches_datetime(self, value):
+        """Test that fast epoch conversion agrees with datetime.timestamp()."""
+        dt = datetime.fromisoformat(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=pytz.UTC)
+        assert to_epoch(value) == int(dt.timestamp() // 1)
+
+    def test_invalid_and_interned(self):
+        """Test that bad values read as missing and repeats are parsed once."""
+        assert to_epoch("not a date") is None
+        assert to_epoch(None) is None
+        assert parse_iso("2024-01-15T09:00:00") is parse_iso("2024-01-15T09:00:00")
+
+    def test_event_arrays(self):
+        """Test bulk conversion, wall-clock reading and missing ends."""
+        starts, ends = event_epoch_arrays([
+            {"start": "2024-01-15T09:00:00+02:00", "end": "2024-01-15T10:00:00+02:00"},
+            {"start": "2024-01-15T12:00:00", "end": None}
+        ], wall=True)
+
+        assert list(starts) == [to_wall_seconds("2024-01-15T09:00:00"), to_wall_seconds("2024-01-15T12:00:00")]
+        assert ends[1] == starts[1]
+        assert calculate_duration("2024-01-15T09:00:00+02:00", "2024-01-15T10:30:00+02:00") == 90
+
+
+class TestTextCleaner:
+    """Tests for the text cleaning pipeline."""
+
+    HTML = "<div class='note'>\n  Agenda:<br/>  review <b>Q3</b> plan &amp; budget (draft) </div>"
+
+    def test_matches_separate_steps(self):
+        """Test that the fused pipeline matches the individual helpers."""
+        assert TextCleaner()(self.HTML) == clean_whitespace(remove_html_tags(self.HTML))
+        assert TextCleaner(sanitize=True)(self.HTML) == "Agenda review Q3 plan amp budget draft"
+
+    def test_long_input_truncates_from_prefix(self):
+        """Test that a large body is truncated exactly as a full clean would be."""
+        body = self.HTML * 2000
+        cleaner = TextCleaner(max_length=50)
+        assert cleaner(body) == truncate_text(TextCleaner()(body), 50)
+        assert len(cleaner(body)) == 50
+
+    def test_clean_many(self):
+        """Test batch cleaning keeps order and handles missing text."""
+        cleaner = TextCleaner(max_length=20)
+        assert cleaner.clean_many(["<p>Standup</p>", None, "<p>Standup</p>"]) == ["Standup", "", "Standup"]
+
+
+class TestKeywordIndex:
+    """Tests for the per-user TF-IDF keyword index."""
+
+    def test_tokens(self):
+        """Test that punctuation, stop words, short words and numbers are dropped."""
+        assert keyword_tokens("Review the Q3 pull-requests, 2024 budget!") == ["review", "pull-requests", "budget"]
+
+    def test_distinctive_terms_rank_first(self):
+        """Test that terms shared by every user rank below a user's own themes."""
+        index = KeywordIndex(top_k=3)
+        index.add_many("u1", [("e1", "Team meeting"), ("e2", "Marathon training"), ("e3", "Marathon training")])
+        index.add_many("u2", [("e1", "Team meeting"), ("e2", "Budget review")])
+        index.add("u1", "e4", "Team meeting")
+
+        assert index.top_terms("u1")[:2] == ["marathon", "training"]
+        assert index.top_terms("u1", limit=1) == ["marathon"]
+        assert index.top_terms("unknown") == []
+
+    def test_documents_indexed_once(self):
+        """Test that re-offering a document leaves the counts unchanged."""
+        index = KeywordIndex()
+        assert index.add("u1", "task1", "Update documentation")
+        assert not index.add("u1", "task1", "Update documentation")
+        assert index.add_many("u1", [("task1", "Update documentation"), ("task2", "Write tests")]) == 1
+
+    def test_vocabulary_cap(self):
+        """Test that the rarest terms are dropped beyond the per-user cap."""
+        index = KeywordIndex(max_terms_per_user=2)
+        index.add_many("u1", [("a", "yoga yoga"), ("b", "yoga reading"), ("c", "reading cooking")])
+        assert sorted(index.top_terms("u1")) == ["reading", "yoga"]
+        assert "cooking" not in index._document_frequency
+
+    def test_least_recently_used_user_evicted(self):
+        """Test that the user cap evicts the least recently used user and its terms."""
+        index = KeywordIndex(max_users=2)
+        index.add("u1", "a", "yoga")
+        index.add("u2", "a", "chess")
+        index.top_terms("u1")
+        index.add("u3", "a", "sailing")
+
+        assert "u2" not in index and "u1" in index and len(index) == 2
+        assert "chess" not in index._document_frequency
+        assert index.forget("u1") and not index.forget("u1")
+        assert "yoga" not in index._document_frequency
+
+    @pytest.mark.asyncio
+    async def test_sweep_forgets_expired_keywords(self):
+        """Test that swept history leaves the keywords and is not rebuilt."""
+        storage = InMemoryStorage()
+        await storage.add_briefing("u1", {"summary": "Marathon prep"}, datetime.utcnow() - timedelta(days=3))
+        memory = UserMemory(storage)
+        assert await memory.get_top_keywords("u1") == ["marathon", "prep"]
+
+        await memory.sweep_history()
+        assert "u1" not in memory.keywords
+        assert await memory.get_top_keywords("u1") == []
+
+    @pytest.mark.asyncio
+    async def test_user_memory_feeds_index(self):
+        """Test that saved briefings and loaded context feed a user's keywords."""
+        storage = InMemoryStorage()
+        await storage.add_briefing("u1", {"summary": "Marathon prep"}, datetime(2024, 1, 1))
+        memory = UserMemory(storage)
+
+        assert await memory.get_top_keywords("u1") == ["marathon", "prep"]
+
+        await memory.save_briefing_history("u1", {"priorities": ["Marathon taper"]})
+        memory.index_context("u1", [{"id": "e1", "title": "Physio appointment"}], [])
+        assert (await memory.get_top_keywords("u1"))[0] == "marathon"
+        assert "physio" in await memory.get_top_keywords("u1")
+
+
+class TestUserMemoryStorage:
+    """Tests for user memory storage backends."""
+
+    def test_backend_selection(self):
+        """Test that the database URL picks the backend."""
+        assert isinstance(create_storage_backend(None), InMemoryStorage)
+        assert isinstance(create_storage_backend("sqlite:///briefings.db"), SQLiteStorage)
+        assert create_storage_backend("sqlite:////tmp/briefings.db").path == "/tmp/briefings.db"
+
+    @pytest.mark.asyncio
+    async def test_sqlite_round_trip(self, tmp_path):
+        """Test that profiles and history persist across reopening the database."""
+        path = str(tmp_path / "briefings.db")
+        memory = UserMemory(SQLiteStorage(path, pool_size=2))
+        await memory.connect()
+
+        await memory.update_preferences("u1", {"wake_time": "06:30"})
+        for i in range(3):
+            await memory.save_briefing_history("u1", {"summary": f"day {i}"})
+        await memory.close()
+
+        reopened = UserMemory(SQLiteStorage(path, pool_size=2))
+        await reopened.connect()
+        try:
+            profile = await reopened.get_user_profile("u1")
+            history = await reopened.get_briefing_history("u1", limit=2)
+            users = await reopened.list_user_ids()
+        finally:
+            await reopened.close()
+
+        assert profile["preferences"]["wake_time"] == "06:30"
+        assert "goals" in profile
+        assert [h["briefing"]["summary"] for h in history] == ["day 1", "day 2"]
+        assert users == ["u1"]
+
+    @pytest.mark.asyncio
+    async def test_sqlite_history_index(self):
+        """Test that history lookups are served by the (user_id, created_at) index."""
+        storage = SQLiteStorage(":memory:", pool_size=1)
+        await storage.open()
+        try:
+            plan = await storage._run(lambda conn: conn.execute(
+                "EXPLAIN QUERY PLAN SELECT briefing, created_at FROM briefings "
+                "WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", ("u1", 5)
+            ).fetchall())
+        finally:
+            await storage.close()
+
+        assert "idx_briefings_user_created" in " ".join(str(row) for row in plan)
+
+    @pytest.mark.asyncio
+    async def test_history_ring_buffer_and_sweep(self):
+        """Test that history is capped per user and swept by age."""
+        for storage in (InMemoryStorage(max_history=3), SQLiteStorage(":memory:", pool_size=1, max_history=3)):
+            await storage.open()
+            try:
+                old = datetime(2024, 1, 1)
+                for i in range(5):
+                    await storage.add_briefing("u1", {"n": i}, old + timedelta(hours=i))
+
+                history = await storage.get_briefings("u1", limit=10)
+                assert [h["briefing"]["n"] for h in history] == [2, 3, 4]
+
+                removed = await storage.prune_briefings(old + timedelta(hours=4))
+                assert removed == 2
+                assert [h["briefing"]["n"] for h in await storage.get_briefings("u1", 10)] == [4]
+            finally:
+                await storage.close()
+
+
+class FakeCalendarClient(CalendarClient):
+    """Test double for a calendar provider supporting sync tokens."""
+
+    def __init__(self):
+        self.calls = []
+        self.changes = CalendarSyncResult(events=[], sync_token="t2")
+        self.expired = False
+
+    async def list_events(self, user_id, start_date, end_date, sync_token=None):
+        self.calls.append(sync_token)
+        await asyncio.sleep(0)
+        if sync_token is None:
+            return CalendarSyncResult(
+                events=[
+                    {"id": "b", "title": "Lunch", "start": "2024-01-15T12:00:00", "end": "2024-01-15T13:00:00"},
+                    {"id": "a", "title": "Standup", "start": "2024-01-15T09:00:00", "end": "2024-01-15T09:15:00"}
+                ],
+                sync_token="t1"
+            )
+        if self.expired:
+            raise SyncTokenExpired()
+        return self.changes
+
+
+class TestCalendarCache:
+    """Tests for calendar event caching and incremental sync."""
+
+    START = datetime(2024, 1, 15)
+    END = datetime(2024, 1, 15, 23, 59, 59)
+
+    @pytest.mark.asyncio
+    async def test_fresh_entry_skips_provider(self):
+        """Test that repeated and concurrent reads share one full fetch."""
+        client = FakeCalendarClient()
+        service = CalendarService(client=client, cache_ttl_seconds=60)
+
+        results = await asyncio.gather(*[
+            service.get_events("u1", self.START, self.END) for _ in range(5)
+        ])
+
+        assert client.calls == [None]
+        assert [e["id"] for e in results[0]] == ["a", "b"]
+        assert service._locks == {}
+
+    @pytest.mark.asyncio
+    async def test_failed_fetch_releases_lock(self):
+        """Test that ranges whose fetch fails do not keep a lock behind."""
+        client = FakeCalendarClient()
+        client.list_events = AsyncMock(side_effect=RuntimeError("provider down"))
+        service = CalendarService(client=client, cache_ttl_seconds=60)
+
+        results = await asyncio.gather(*[
+            service.get_events(f"u{i % 3}", self.START, self.END) for i in range(6)
+        ])
+
+        assert results == [[]] * 6
+        assert service._locks == {}
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_syncs_incrementally(self):
+        """Test that an expired entry merges changes and deletions via the sync token."""
+        client = FakeCalendarClient()
+        service = CalendarService(client=client, cache_ttl_seconds=0)
+        await service.get_events("u1", self.START, self.END)
+
+        client.changes = CalendarSyncResult(
+            events=[{"id": "c", "title": "Review", "start": "2024-01-15T10:00:00", "end": "2024-01-15T11:00:00"}],
+            sync_token="t2",
+            deleted_ids=["b"]
+        )
+        events = await service.get_events("u1", self.START, self.END)
+
+        assert client.calls == [None, "t1"]
+        assert [e["id"] for e in events] == ["a", "c"]
+
+    @pytest.mark.asyncio
+    async def test_push_notification_and_expired_token(self):
+        """Test that a push marks entries stale and an expired token forces a full fetch."""
+        client = FakeCalendarClient()
+        service = CalendarService(client=client, cache_ttl_seconds=60)
+        await service.get_events("u1", self.START, self.END)
+
+        assert service.handle_push_notification("u1") == 1
+        client.expired = True
+        events = await service.get_events("u1", self.START, self.END)
+
+        assert client.calls == [None, "t1", None]
+        assert len(events) == 2
+
+    @pytest.mark.asyncio
+    async def test_upcoming_events_window(self):
+        """Test that the upcoming window is measured on the events' timeline."""
+        now = datetime.now(pytz.UTC)
+        client = FakeCalendarClient()
+        client.list_events = AsyncMock(return_value=CalendarSyncResult(events=[
+            {
+                "id": "soon",
+                "title": "Standup",
+                "start": (now + timedelta(minutes=30)).astimezone(pytz.timezone("Asia/Tokyo")).isoformat(),
+                "end": (now + timedelta(minutes=45)).astimezone(pytz.timezone("Asia/Tokyo")).isoformat()
+            },
+            {
+                "id": "past",
+                "title": "Breakfast",
+                "start": (now - timedelta(hours=3)).isoformat(),
+                "end": (now - timedelta(hours=2)).isoformat()
+            },
+            {
+                "id": "later",
+                "title": "Offsite",
+                "start": (now + timedelta(hours=5)).astimezone(pytz.timezone("America/New_York")).isoformat(),
+                "end": (now + timedelta(hours=6)).astimezone(pytz.timezone("America/New_York")).isoformat()
+            }
+        ]))
+        service = CalendarService(client=client, cache_ttl_seconds=60)
+
+        events = await service.get_upcoming_events("u1", hours=2)
+        assert [e["id"] for e in events] == ["soon"]
+
+
+class RateLimitError(Exception):
+    """Stand-in for a provider 429 error."""
+    status_code = 429
+
+
+class TestLLMGateway:
+    """Tests for the shared LLM gateway."""
+
+    @pytest.mark.asyncio
+    async def test_calls_injected_model(self):
+        """Test that a local fake model can be injected."""
+        gateway = LLMGateway(FakeListChatModel(responses=["Plan ready"]))
+        response = await gateway.ainvoke([HumanMessage(content="Plan my day")])
+        assert response.content == "Plan ready"
+
+    @pytest.mark.asyncio
+    async def test_retries_rate_limit_once_per_call(self):
+        """Test that a 429 is retried in the gateway and other errors are not."""
+        model = AsyncMock()
+        model.ainvoke = AsyncMock(side_effect=[RateLimitError(), HumanMessage(content="ok")])
+        gateway = LLMGateway(model, retry_base_delay=0)
+
+        response = await gateway.ainvoke([HumanMessage(content="hi")])
+        assert response.content == "ok"
+        assert model.ainvoke.await_count == 2
+
+        model.ainvoke = AsyncMock(side_effect=ValueError("bad prompt"))
+        with pytest.raises(ValueError):
+            await gateway.ainvoke([HumanMessage(content="hi")])
+        assert model.ainvoke.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency(self):
+        """Test that no more than max_concurrency calls are in flight."""
+        in_flight = 0
+        peak = 0
+
+        async def slow_call(messages, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return HumanMessage(content="done")
+
+        model = AsyncMock()
+        model.ainvoke = slow_call
+        gateway = LLMGateway(model, max_concurrency=2)
+
+        await asyncio.gather(*[
+            gateway.ainvoke([HumanMessage(content="hi")]) for _ in range(6)
+        ])
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_shared_http_client_openai_only(self):
+        """Test that the pooled HTTP client is only built for the OpenAI provider."""
+        with patch("app.services.llm_gateway.build_chat_model", return_value=None) as build:
+            with patch.object(settings, "llm_provider", "openai"):
+                openai = create_llm_gateway()
+            with patch.object(settings, "llm_provider", "anthropic"):
+                anthropic = create_llm_gateway()
+
+        assert openai._http_client is not None
+        assert build.call_args_list[0].args[0] is openai._http_client
+        assert anthropic._http_client is None
+        assert build.call_args_list[1].args[0] is None
+        await openai.aclose()
+
+    @pytest.mark.asyncio
+    async def test_stream_is_cached(self):
+        """Test that a stored stream is replayed as one chunk unless bypassed."""
+        model = FakeListChatModel(responses=["Plan ready"])
+        gateway = LLMGateway(model, cache=LLMResponseCache(), model_name="fake")
+        messages = [HumanMessage(content="Plan my day")]
+
+        chunks = [chunk.content async for chunk in gateway.astream(messages)]
+        assert "".join(chunks) == "Plan ready"
+        assert len(chunks) > 1
+        assert gateway.cache.get(messages, "fake", gateway.temperature) is None
+
+        gateway.cache_response(messages, "".join(chunks))
+        model.responses = ["Other"]
+        chunks = [chunk.content async for chunk in gateway.astream(messages)]
+        assert chunks == ["Plan ready"]
+
+        chunks = [chunk.content async for chunk in gateway.astream(messages, use_cache=False)]
+        assert "".join(chunks) == "Other"
+
+    @pytest.mark.asyncio
+    async def test_records_node_trace(self):
+        """Test that retries, usage and cache lookups land on the node's trace."""
+        model = AsyncMock()
+        model.ainvoke = AsyncMock(side_effect=[
+            RateLimitError(),
+            AIMessage(content="ok", usage_metadata={"input_tokens": 100, "output_tokens": 50, "total_tokens": 150})
+        ])
+        gateway = LLMGateway(
+            model, retry_base_delay=0, cache=LLMResponseCache(),
+            prompt_cost_per_1k=0.01, completion_cost_per_1k=0.02
+        )
+
+        async def node(state):
+            await gateway.ainvoke([HumanMessage(content="hi")])
+            await gateway.ainvoke([HumanMessage(content="hi")])
+            return {}
+
+        update = await traced_node("motivator", node)({})
+        trace = update["node_metrics"][0]
+
+        assert trace["retries"] == 1
+        assert trace["llm_calls"] == 1
+        assert (trace["prompt_tokens"], trace["completion_tokens"]) == (100, 50)
+        assert trace["cost_usd"] == pytest.approx(0.002)
+        assert (trace["cache_hits"], trace["cache_misses"]) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_waits_when_empty(self):
+        """Test that the bucket blocks once its burst capacity is spent."""
+        bucket = TokenBucket(rate_per_minute=600, capacity=1)
+        await bucket.acquire()
+
+        started = asyncio.get_running_loop().time()
+        await bucket.acquire()
+        assert asyncio.get_running_loop().time() - started >= 0.05
+
+
+class TestModelRouter:
+    """Tests for per-agent model routing."""
+
+    @pytest.fixture
+    def router(self):
+        """Create a router over fake small and large gateways."""
+        return ModelRouter(
+            tiers={
+                "large": LLMGateway(FakeListChatModel(responses=["large"]), model_name="large"),
+                "small": LLMGateway(FakeListChatModel(responses=["small"]), model_name="small")
+            },
+            agent_tiers={"planner": "large", "motivator": "small"},
+            agent_temperatures={"planner": 0.3, "motivator": 0.9},
+            heavy_day_events=2,
+            heavy_day_tasks=2
+        )
+
+    @staticmethod
+    def _state(events: int, tasks: int):
+        return {
+            "calendar_events": build_event_records([
+                {"id": str(i), "title": "Meeting", "start": "2024-01-15T09:00:00", "end": "2024-01-15T09:30:00"}
+                for i in range(events)
+            ]),
+            "tasks": build_task_records([{"id": str(i), "title": "Task"} for i in range(tasks)])
+        }
+
+    @pytest.mark.asyncio
+    async def test_small_tier_follows_provider(self):
+        """Test that without a small model the small tier is the provider's configured model."""
+        with patch.object(settings, "llm_provider", "anthropic"), \
+                patch.object(settings, "llm_model", "claude-sonnet"), \
+                patch("app.services.llm_gateway._llm_gateways", {}):
+            small = create_llm_gateway(tier="small")
+            assert small.model_name == "claude-sonnet"
+            assert small.prompt_cost_per_1k == settings.llm_prompt_cost_per_1k
+            assert get_llm_gateway("small") is get_llm_gateway("large")
+            await close_llm_gateways()
+        await small.aclose()
+
+    @pytest.mark.asyncio
+    async def test_small_tier_escalates_on_heavy_days(self, router):
+        """Test that a small-tier agent uses the large model only for heavy days."""
+        motivator = router.for_agent("motivator")
+
+        light = motivator.select(self._state(events=1, tasks=1))
+        assert (light.model_name, light.temperature) == ("small", 0.9)
+        assert (await light.ainvoke([HumanMessage(content="hi")])).content == "small"
+
+        heavy = motivator.select(self._state(events=1, tasks=3))
+        assert (heavy.model_name, heavy.temperature) == ("large", 0.9)
+
+    def test_large_tier_agent_is_not_escalated(self, router):
+        """Test that large-tier agents and unlisted agents stay on the large model."""
+        planner = router.for_agent("planner")
+        assert planner.escalated is None
+        assert planner.select(self._state(events=5, tasks=5)).temperature == 0.3
+        assert router.for_agent("summary").select({}).model_name == "large"
+
+    def test_temperature_view_shares_limits(self, router):
+        """Test that a temperature view shares the tier's limits and cache."""
+        base = router.tiers["small"]
+        view = base.with_temperature(0.1)
+        assert view._semaphore is base._semaphore
+        assert view._request_bucket is base._request_bucket
+        assert base.temperature == 0.0
+
+
+class TestMetricsRegistry:
+    """Tests for Prometheus metrics export."""
+
+    def test_render(self):
+        """Test that traces aggregate into histogram and counter samples."""
+        registry = MetricsRegistry()
+        registry.record(NodeTrace(node="planner", wall_seconds=0.2, prompt_tokens=10, cache_hits=1))
+        registry.record(NodeTrace(node="planner", status="error", wall_seconds=3.0, prompt_tokens=5))
+        text = registry.render()
+
+        assert 'briefing_node_duration_seconds_bucket{node="planner",le="0.25"} 1' in text
+        assert 'briefing_node_duration_seconds_bucket{node="planner",le="+Inf"} 2' in text
+        assert 'briefing_node_duration_seconds_count{node="planner"} 2' in text
+        assert 'briefing_node_runs_total{node="planner",status="error"} 1' in text
+        assert 'briefing_node_tokens_total{node="planner",type="prompt"} 15' in text
+        assert 'briefing_node_llm_cache_total{node="planner",result="hit"} 1' in text
+
+
+class TestLLMResponseCache:
+    """Tests for the agent LLM response cache."""
+
+    SYSTEM = SystemMessage(content="You are a motivational coach.")
+
+    def test_exact_key_ignores_formatting(self):
+        """Test that whitespace-only prompt differences share an entry."""
+        cache = LLMResponseCache()
+        cache.set([self.SYSTEM, HumanMessage(content="Goals: ship it")], "gpt-4", 0.7, "Go!")
+
+        hit = cache.get([self.SYSTEM, HumanMessage(content="\n   Goals:  ship it\n")], "gpt-4", 0.7)
+        assert hit == "Go!"
+        assert cache.get([self.SYSTEM, HumanMessage(content="Goals: ship it")], "gpt-4", 0.2) is None
+
+    def test_near_duplicate_tier_is_opt_in(self):
+        """Test that a similar prompt matches only when near duplicates are allowed."""
+        cache = LLMResponseCache(similar_max_size=16)
+        prompt = (
+            "Today's Plan: standup at 9, design review at 11, focus block 13 to 16, "
+            "gym at 18. Goals: ship the launch, run a 10k, read more. "
+            "Achievements: closed the billing migration."
+        )
+        cache.set([self.SYSTEM, HumanMessage(content=prompt)], "gpt-4", 0.7, "Go!")
+
+        similar = [self.SYSTEM, HumanMessage(content=prompt.replace("gym at 18", "yoga at 18"))]
+        assert cache.get(similar, "gpt-4", 0.7) is None
+        assert cache.get(similar, "gpt-4", 0.7, near_duplicates=True) == "Go!"
+
+        unrelated = [self.SYSTEM, HumanMessage(content="Today's Plan: nothing scheduled, rest day.")]
+        assert cache.get(unrelated, "gpt-4", 0.7, near_duplicates=True) is None
+
+        other_agent = [SystemMessage(content="You are a wellness advisor."), similar[1]]
+        assert cache.get(other_agent, "gpt-4", 0.7, near_duplicates=True) is None
+
+    @pytest.mark.asyncio
+    async def test_gateway_serves_cached_response(self):
+        """Test that a repeated prompt does not reach the model."""
+        model = AsyncMock()
+        model.ainvoke = AsyncMock(return_value=HumanMessage(content="Stay hydrated"))
+        gateway = LLMGateway(model, cache=LLMResponseCache(), model_name="gpt-4")
+
+        messages = [self.SYSTEM, HumanMessage(content="Schedule: busy")]
+        await gateway.ainvoke(messages)
+        response = await gateway.ainvoke(messages)
+
+        assert response.content == "Stay hydrated"
+        assert model.ainvoke.await_count == 1
+
+
+class TestFreeBusyIndex:
+    """Tests for the calendar free/busy index."""
+
+    @staticmethod
+    def _index(*spans):
+        return FreeBusyIndex([(start, end, name) for name, start, end in spans])
+
+    def test_overlap_and_conflicts(self):
+        """Test overlap queries and conflict pairs, including a long enclosing event."""
+        index = self._index(("offsite", 0, 100), ("sync", 10, 20), ("lunch", 50, 60), ("late", 120, 130))
+
+        assert index.overlapping(15, 55) == ["offsite", "sync", "lunch"]
+        assert index.overlapping(100, 120) == []
+        assert sorted(index.conflicts()) == [("offsite", "lunch"), ("offsite", "sync")]
+        assert index.has_conflicts()
+        assert not self._index(("a", 0, 10), ("b", 10, 20)).has_conflicts()
+
+    def test_free_slots_and_next_event(self):
+        """Test free time across merged busy blocks and next-event lookup."""
+        index = self._index(("a", 10, 20), ("b", 15, 30), ("c", 40, 45))
+
+        assert index.free_slots(0, 60) == [(0, 10), (30, 40), (45, 60)]
+        assert index.free_slots(0, 60, min_length=12, buffer=2) == [(47, 60)]
+        assert index.is_busy(25, 26) and not index.is_busy(30, 40)
+        assert index.next_event(21) == "c"
+        assert index.next_event(46) is None
+
+    def test_merged_calendars_dedupe_shared_events(self):
+        """Test that an event on several calendars is indexed once."""
+        event = {"id": "e1", "title": "Sync", "start": "2024-01-15T09:00:00", "end": "2024-01-15T09:30:00"}
+        personal = build_event_records([event])
+        team = build_event_records([event, {**event, "id": "e2", "title": "Team lunch"}])
+
+        index = FreeBusyIndex.from_events(personal, team)
+        assert len(index) == 2
+
+
+class TestWellnessSchedule:
+    """Tests for batch break and hydration schedules."""
+
+    def test_vectorized_matches_per_user(self):
+        """Test that the NumPy path gives the same schedules as the per-user path."""
+        np = pytest.importorskip("numpy")
+        rng = np.random.default_rng(7)
+        inputs = []
+        for _ in range(200):
+            start = int(rng.integers(360, 600))
+            busy = []
+            for _ in range(int(rng.integers(0, 8))):
+                begin = int(rng.integers(start, start + 600))
+                busy.append((begin, begin + int(rng.choice([15, 30, 60, 120]))))
+            inputs.append(WellnessInputs(start, start + 540, int(rng.choice([45, 90, 120])), busy))
+
+        per_user = [wellness_schedule._compute_one(user) for user in inputs]
+        assert compute_wellness_schedules(inputs) == per_user